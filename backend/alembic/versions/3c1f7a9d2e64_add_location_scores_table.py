@@ -0,0 +1,39 @@
+"""Add location scores table
+
+Revision ID: 3c1f7a9d2e64
+Revises: fae3d815c9b6
+Create Date: 2025-09-02 19:12:44.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9d2e64'
+down_revision: Union[str, None] = 'fae3d815c9b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create precomputed location scores table keyed by geohash tile
+    op.create_table('location_scores',
+        sa.Column('geohash', sa.String(length=12), nullable=False),
+        sa.Column('transport_score', sa.Integer(), nullable=True),
+        sa.Column('environmental_score', sa.Integer(), nullable=True),
+        sa.Column('amenity_score', sa.Integer(), nullable=True),
+        sa.Column('overall_score', sa.Integer(), nullable=True),
+        sa.Column('amenity_density', sa.JSON(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('geohash')
+    )
+
+    op.create_index('idx_location_scores_computed_at', 'location_scores', ['computed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_location_scores_computed_at', table_name='location_scores')
+    op.drop_table('location_scores')
@@ -0,0 +1,33 @@
+"""Add amenity density tiles table
+
+Revision ID: 8d4e2b6f0a17
+Revises: 3c1f7a9d2e64
+Create Date: 2025-09-03 10:27:05.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e2b6f0a17'
+down_revision: Union[str, None] = '3c1f7a9d2e64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create precomputed amenity density table keyed by geohash tile and category
+    op.create_table('amenity_density_tiles',
+        sa.Column('geohash', sa.String(length=12), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('amenity_count', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('geohash', 'category')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('amenity_density_tiles')
@@ -45,6 +45,10 @@ celery_app.conf.update(
             "schedule": 24 * 3600.0,  # Daily
             "args": (30,),  # days_old
         },
+        "refresh-amenity-density-tiles": {
+            "task": "app.modules.ingestion.tasks.refresh_amenity_density_tiles",
+            "schedule": 24 * 3600.0,  # Daily
+        },
     },
 )
 
@@ -0,0 +1,32 @@
+"""
+Outbound HTTP client shared across modules
+"""
+import asyncio
+import weakref
+
+import httpx
+
+# One HTTP client per event loop, shared by the listing adapters and
+# the TfL client so connections are pooled across sources
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Get the HTTP client shared by outbound API callers on the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+        _shared_clients[loop] = client
+    return client
+
+
+async def close_shared_client() -> None:
+    """Close the shared HTTP client for the running event loop, e.g. on shutdown"""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -216,6 +216,46 @@ class EnvironmentalData(Base):
     )
 
 
+class LocationScore(Base):
+    """Precomputed location scores keyed by geohash tile"""
+    __tablename__ = "location_scores"
+
+    # Geohash tile (precision 7, ~150m) the scores were computed for
+    geohash = Column(String(12), primary_key=True)
+
+    # Score components (0-100)
+    transport_score = Column(Integer)
+    environmental_score = Column(Integer)
+    amenity_score = Column(Integer)
+    overall_score = Column(Integer)
+
+    # Amenity counts by category within 1km of the tile
+    amenity_density = Column(JSON)
+
+    # Timestamps
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_location_scores_computed_at', 'computed_at'),
+    )
+
+
+class AmenityDensityTile(Base):
+    """Precomputed amenity counts by category around each geohash tile"""
+    __tablename__ = "amenity_density_tiles"
+
+    # Geohash tile (precision 7) and amenity category
+    geohash = Column(String(12), primary_key=True)
+    category = Column(String(100), primary_key=True)
+
+    # Number of amenities of this category within 1km of the tile centre
+    amenity_count = Column(Integer, nullable=False)
+
+    # Timestamps
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class SearchSuggestionPattern(Base):
     """Common search patterns and suggestions for autocomplete"""
     __tablename__ = "search_suggestion_patterns"
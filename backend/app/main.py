@@ -4,6 +4,7 @@ from app.api.routers import search, properties, users
 from app.core.config import settings
 from app.core.elasticsearch import es_client
 from app.modules.search.elasticsearch_service import elasticsearch_service
+from app.core.http import close_shared_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     try:
         await es_client.disconnect()
+        await close_shared_client()
         logger.info("Application shutdown completed successfully")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
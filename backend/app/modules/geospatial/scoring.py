@@ -0,0 +1,52 @@
+"""
+Table-driven location scoring helpers
+"""
+from bisect import bisect_left
+from typing import Optional
+
+NEUTRAL_ENVIRONMENTAL_SCORE = 50
+
+# AQI bands: <=50, <=100, <=150, >150 (lower AQI is better)
+AQI_THRESHOLDS = (50, 100, 150)
+AQI_SCORE_DELTAS = (20, 10, 0, -20)
+
+# Crime rate bands: <20, 20-50 inclusive, >50 (lower is better)
+CRIME_RATE_LOW, CRIME_RATE_HIGH = 20, 50
+CRIME_RATE_SCORE_DELTAS = (15, 0, -20)
+
+FLOOD_RISK_SCORE_DELTAS = {'low': 15, 'high': -25}
+
+# Weights applied to the transport, environmental and amenity components
+OVERALL_SCORE_WEIGHTS = (0.4, 0.35, 0.25)
+
+
+def environmental_score(
+    air_quality_index: Optional[float] = None,
+    flood_risk_level: Optional[str] = None,
+    crime_rate: Optional[float] = None
+) -> int:
+    """Score environmental conditions (0-100) by summing per-band deltas"""
+    score = NEUTRAL_ENVIRONMENTAL_SCORE
+    if air_quality_index is not None:
+        score += AQI_SCORE_DELTAS[bisect_left(AQI_THRESHOLDS, air_quality_index)]
+    if flood_risk_level is not None:
+        score += FLOOD_RISK_SCORE_DELTAS.get(flood_risk_level, 0)
+    if crime_rate is not None:
+        # Both bounds belong to the middle band, so the band index is two explicit comparisons
+        score += CRIME_RATE_SCORE_DELTAS[(crime_rate >= CRIME_RATE_LOW) + (crime_rate > CRIME_RATE_HIGH)]
+    return max(0, min(100, score))
+
+
+def amenity_score(total_amenities: int) -> int:
+    """Scale an amenity count to a 0-100 score"""
+    return min(100, total_amenities * 2)
+
+
+def overall_score(transport: float, environmental: float, amenities: float) -> int:
+    """Combine component scores into the weighted overall score"""
+    transport_weight, environmental_weight, amenity_weight = OVERALL_SCORE_WEIGHTS
+    return int(
+        transport * transport_weight +
+        environmental * environmental_weight +
+        amenities * amenity_weight
+    )
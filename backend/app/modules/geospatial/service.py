@@ -1,21 +1,54 @@
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Awaitable
 import math
 import httpx
+import orjson
 import asyncio
-from datetime import datetime
-from geopy.distance import geodesic
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
+from sqlalchemy import text, func, cast
+from geoalchemy2 import Geography, Geometry
 from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_GeogFromText, ST_AsText
 from app.models.geospatial import Location, Amenity, CommuteInfo, EnvironmentalData, TransportLink
-from app.db.models import Amenity as AmenityDB, Property as PropertyDB
+from app.db.models import (
+    Amenity as AmenityDB, Property as PropertyDB, LocationScore as LocationScoreDB,
+    AmenityDensityTile as AmenityDensityTileDB
+)
 from app.core.config import settings
 from .environmental_service import EnvironmentalDataService
 from .transport_service import TransportDataService
+from .tiles import encode_geohash, DEFAULT_TILE_PRECISION
+from .distance import haversine_km
+from .scoring import environmental_score, amenity_score, overall_score
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Statements are built once at import so SQLAlchemy reuses their compiled form;
+# coordinates are bound as floats so the SQL text is identical across calls
+POINT_DISTANCE_SQL = text("""
+    SELECT ST_Distance(
+        ST_SetSRID(ST_MakePoint(:lon1, :lat1), 4326)::geography,
+        ST_SetSRID(ST_MakePoint(:lon2, :lat2), 4326)::geography
+    ) AS distance
+""")
+
+# Radius the precomputed amenity density tiles are aggregated over
+AMENITY_TILE_RADIUS_KM = 1.0
+
+# Recount amenities by category around every tile that contains a property in
+# one set-based scan, instead of one density query per location
+REFRESH_AMENITY_DENSITY_TILES_SQL = text("""
+    INSERT INTO amenity_density_tiles (geohash, category, amenity_count, computed_at)
+    SELECT t.geohash, a.category, count(*), now()
+    FROM (
+        SELECT DISTINCT ST_GeoHash(location::geometry, :precision) AS geohash
+        FROM properties
+    ) t
+    JOIN amenities a
+      ON ST_DWithin(a.location, ST_PointFromGeoHash(t.geohash)::geography, :radius_meters)
+    GROUP BY t.geohash, a.category
+""")
+
 
 class GeospatialService:
     """Service for geospatial operations and location-based queries"""
@@ -25,12 +58,18 @@ class GeospatialService:
         self.mapbox_api_key = getattr(settings, 'MAPBOX_API_KEY', None)
         self.environmental_service = EnvironmentalDataService(db)
         self.transport_service = TransportDataService(db)
+        self.location_score_cache_hours = 24  # Precomputed tile scores are reused for 24 hours
+        self.insights_timeout_seconds = 2.5  # Overall budget for live location insights
+        self.insights_subcall_timeout_seconds = 1.5  # Budget for each remote sub-service
         
     def calculate_distance(self, point1: Location, point2: Location) -> float:
         """
         Calculate straight-line distance between two points using geodesic calculation
         Returns distance in kilometers
         """
+        # geopy is only needed for precise geodesic distances, so load it lazily
+        from geopy.distance import geodesic
+        
         try:
             coord1 = (point1.latitude, point1.longitude)
             coord2 = (point2.latitude, point2.longitude)
@@ -46,14 +85,7 @@ class GeospatialService:
         Returns distance in meters, converted to kilometers
         """
         try:
-            query = text("""
-                SELECT ST_Distance(
-                    ST_GeogFromText('POINT(:lon1 :lat1)'),
-                    ST_GeogFromText('POINT(:lon2 :lat2)')
-                ) as distance
-            """)
-            
-            result = self.db.execute(query, {
+            result = self.db.execute(POINT_DISTANCE_SQL, {
                 'lat1': point1.latitude,
                 'lon1': point1.longitude,
                 'lat2': point2.latitude,
@@ -75,7 +107,9 @@ class GeospatialService:
         """
         if not self.mapbox_api_key:
             logger.warning("Mapbox API key not configured, falling back to straight-line distance")
-            straight_distance = self.calculate_distance(point1, point2)
+            straight_distance = round(haversine_km(
+                point1.latitude, point1.longitude, point2.latitude, point2.longitude
+            ), 3)
             # Estimate walking time: average 5 km/h walking speed
             estimated_minutes = int((straight_distance / 5) * 60)
             return CommuteInfo(
@@ -87,7 +121,8 @@ class GeospatialService:
             )
         
         try:
-            url = f"https://api.mapbox.com/directions/v5/mapbox/walking/{point1.longitude},{point1.latitude};{point2.longitude},{point2.latitude}"
+            # Six decimal places (~11cm) keeps URLs short and stable for caching
+            url = f"https://api.mapbox.com/directions/v5/mapbox/walking/{point1.longitude:.6f},{point1.latitude:.6f};{point2.longitude:.6f},{point2.latitude:.6f}"
             params = {
                 'access_token': self.mapbox_api_key,
                 'geometries': 'geojson',
@@ -98,7 +133,7 @@ class GeospatialService:
                 response = await client.get(url, params=params, timeout=10.0)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     if data.get('routes'):
                         route = data['routes'][0]
                         duration_seconds = route['duration']
@@ -126,9 +161,11 @@ class GeospatialService:
     
     async def _fallback_walking_estimate(self, point1: Location, point2: Location) -> CommuteInfo:
         """Fallback walking estimate when API is unavailable"""
-        straight_distance = self.calculate_distance(point1, point2)
+        straight_distance = haversine_km(
+            point1.latitude, point1.longitude, point2.latitude, point2.longitude
+        )
         # Estimate walking time with 1.3x factor for actual walking routes
-        estimated_distance = straight_distance * 1.3
+        estimated_distance = round(straight_distance * 1.3, 3)
         estimated_minutes = int((estimated_distance / 5) * 60)  # 5 km/h average
         
         return CommuteInfo(
@@ -139,6 +176,17 @@ class GeospatialService:
             transport_mode="walking_estimated"
         )
     
+    def _bounding_box(self, location: Location, radius_km: float):
+        """
+        Build a geography bounding box covering radius_km around a location
+        Used as a cheap index-only prefilter ahead of ST_DWithin
+        """
+        lat_delta = radius_km / 111.32
+        lon_delta = radius_km / (111.32 * max(math.cos(math.radians(location.latitude)), 0.01))
+        
+        search_geometry = func.ST_SetSRID(func.ST_MakePoint(location.longitude, location.latitude), 4326)
+        return cast(func.ST_Expand(search_geometry, lon_delta, lat_delta), Geography(srid=4326))
+    
     def find_nearby_amenities(
         self, 
         location: Location, 
@@ -156,41 +204,39 @@ class GeospatialService:
             # Create point geometry for the search location
             search_point = func.ST_GeogFromText(f'POINT({location.longitude} {location.latitude})')
             
-            # Query amenities within radius
-            query = self.db.query(AmenityDB).filter(
+            # Query amenities and their coordinates within radius, pruning by bounding box before the exact distance check
+            query = self.db.query(
+                AmenityDB,
+                func.ST_Y(cast(AmenityDB.location, Geometry(srid=4326))).label('lat'),
+                func.ST_X(cast(AmenityDB.location, Geometry(srid=4326))).label('lng')
+            ).filter(
                 AmenityDB.category == amenity_category,
+                AmenityDB.location.op('&&')(self._bounding_box(location, radius_km)),
                 ST_DWithin(AmenityDB.location, search_point, radius_meters)
             ).order_by(
                 ST_Distance(AmenityDB.location, search_point)
             ).limit(limit)
             
             amenities = []
-            for amenity_db in query.all():
-                # Extract coordinates from PostGIS geometry
-                coords_result = self.db.execute(
-                    text("SELECT ST_Y(location::geometry) as lat, ST_X(location::geometry) as lng FROM amenities WHERE id = :id"),
-                    {'id': str(amenity_db.id)}
-                ).fetchone()
+            for amenity_db, lat, lng in query.all():
+                amenity_location = Location(
+                    latitude=lat,
+                    longitude=lng,
+                    address=amenity_db.address
+                )
                 
-                if coords_result:
-                    amenity_location = Location(
-                        latitude=coords_result.lat,
-                        longitude=coords_result.lng,
-                        address=amenity_db.address
-                    )
-                    
-                    amenity = Amenity(
-                        id=str(amenity_db.id),
-                        name=amenity_db.name,
-                        category=amenity_db.category,
-                        location=amenity_location,
-                        opening_hours=amenity_db.opening_hours or {},
-                        contact_info={
-                            'website': amenity_db.website,
-                            'phone': amenity_db.phone
-                        } if amenity_db.website or amenity_db.phone else {}
-                    )
-                    amenities.append(amenity)
+                amenity = Amenity(
+                    id=str(amenity_db.id),
+                    name=amenity_db.name,
+                    category=amenity_db.category,
+                    location=amenity_location,
+                    opening_hours=amenity_db.opening_hours or {},
+                    contact_info={
+                        'website': amenity_db.website,
+                        'phone': amenity_db.phone
+                    } if amenity_db.website or amenity_db.phone else {}
+                )
+                amenities.append(amenity)
             
             return amenities
             
@@ -215,36 +261,32 @@ class GeospatialService:
             # Query properties within radius with distance calculation
             query = self.db.query(
                 PropertyDB,
-                ST_Distance(PropertyDB.location, search_point).label('distance_meters')
+                ST_Distance(PropertyDB.location, search_point).label('distance_meters'),
+                func.ST_Y(cast(PropertyDB.location, Geometry(srid=4326))).label('lat'),
+                func.ST_X(cast(PropertyDB.location, Geometry(srid=4326))).label('lng')
             ).filter(
+                PropertyDB.location.op('&&')(self._bounding_box(location, radius_km)),
                 ST_DWithin(PropertyDB.location, search_point, radius_meters)
             ).order_by(
                 ST_Distance(PropertyDB.location, search_point)
             ).limit(limit)
             
             properties = []
-            for property_db, distance_meters in query.all():
-                # Extract coordinates
-                coords_result = self.db.execute(
-                    text("SELECT ST_Y(location::geometry) as lat, ST_X(location::geometry) as lng FROM properties WHERE id = :id"),
-                    {'id': str(property_db.id)}
-                ).fetchone()
-                
-                if coords_result:
-                    property_data = {
-                        'id': str(property_db.id),
-                        'title': property_db.title,
-                        'price': property_db.price,
-                        'bedrooms': property_db.bedrooms,
-                        'property_type': property_db.property_type,
-                        'address': property_db.address,
-                        'location': {
-                            'latitude': coords_result.lat,
-                            'longitude': coords_result.lng
-                        },
-                        'distance_km': round(distance_meters / 1000, 3)
-                    }
-                    properties.append(property_data)
+            for property_db, distance_meters, lat, lng in query.all():
+                property_data = {
+                    'id': str(property_db.id),
+                    'title': property_db.title,
+                    'price': property_db.price,
+                    'bedrooms': property_db.bedrooms,
+                    'property_type': property_db.property_type,
+                    'address': property_db.address,
+                    'location': {
+                        'latitude': lat,
+                        'longitude': lng
+                    },
+                    'distance_km': round(distance_meters / 1000, 3)
+                }
+                properties.append(property_data)
             
             return properties
             
@@ -270,7 +312,7 @@ class GeospatialService:
             # Convert minutes to seconds
             max_seconds = max_minutes * 60
             
-            url = f"https://api.mapbox.com/isochrone/v1/mapbox/{transport_mode}/{location.longitude},{location.latitude}"
+            url = f"https://api.mapbox.com/isochrone/v1/mapbox/{transport_mode}/{location.longitude:.6f},{location.latitude:.6f}"
             params = {
                 'contours_minutes': max_minutes,
                 'polygons': 'true',
@@ -281,7 +323,7 @@ class GeospatialService:
                 response = await client.get(url, params=params, timeout=15.0)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     return {
                         'type': 'isochrone',
                         'transport_mode': transport_mode,
@@ -305,6 +347,14 @@ class GeospatialService:
         Calculate amenity density around a location
         Returns count of amenities by category within radius
         """
+        # Serve the default radius from the precomputed tile counts when available
+        if radius_km == AMENITY_TILE_RADIUS_KM:
+            tile_density = self._get_tile_amenity_density(
+                encode_geohash(location.latitude, location.longitude)
+            )
+            if tile_density:
+                return tile_density
+        
         try:
             radius_meters = radius_km * 1000
             search_point = func.ST_GeogFromText(f'POINT({location.longitude} {location.latitude})')
@@ -327,38 +377,113 @@ class GeospatialService:
             logger.error(f"Error calculating amenity density: {e}")
             return {}
     
+    def _get_tile_amenity_density(self, tile: str) -> Dict[str, int]:
+        """Get precomputed amenity counts by category for a geohash tile"""
+        try:
+            query = self.db.query(
+                AmenityDensityTileDB.category,
+                AmenityDensityTileDB.amenity_count
+            ).filter(
+                AmenityDensityTileDB.geohash == tile
+            )
+            
+            return {category: count for category, count in query.all()}
+            
+        except Exception as e:
+            logger.error(f"Error retrieving amenity density tile: {e}")
+            return {}
+    
+    def refresh_amenity_density_tiles(self) -> int:
+        """
+        Recompute amenity density for every tile containing a property
+        Returns the number of (tile, category) rows written
+        """
+        try:
+            self.db.query(AmenityDensityTileDB).delete(synchronize_session=False)
+            result = self.db.execute(REFRESH_AMENITY_DENSITY_TILES_SQL, {
+                'precision': DEFAULT_TILE_PRECISION,
+                'radius_meters': AMENITY_TILE_RADIUS_KM * 1000
+            })
+            self.db.commit()
+            
+            logger.info(f"Refreshed {result.rowcount} amenity density tile rows")
+            return result.rowcount
+            
+        except Exception as e:
+            logger.error(f"Error refreshing amenity density tiles: {e}")
+            self.db.rollback()
+            return 0
+    
     async def get_location_insights(self, location: Location) -> Dict[str, Any]:
         """
         Get comprehensive location insights including environmental and transport data
+        Fresh precomputed tile scores replace the amenity query and score calculation; the
+        environmental and transport details are always fetched (each is cached by its service),
+        so the response has the same shape whether or not the tile was cached
         """
+        tile = encode_geohash(location.latitude, location.longitude)
+        cached_scores = self.get_cached_location_scores(tile)
+        
         try:
-            # Fetch all data concurrently
-            environmental_data_task = self.environmental_service.refresh_environmental_data_if_stale(location)
-            transport_score_task = self.transport_service.calculate_transport_score(location)
-            amenity_density_task = self.get_amenity_density(location, radius_km=1.0)
-            nearby_transport_task = self.transport_service.get_nearby_transport_links(location, radius_meters=500)
-            
-            environmental_data, transport_score, amenity_density, nearby_transport = await asyncio.gather(
-                environmental_data_task,
-                transport_score_task,
-                amenity_density_task,
-                nearby_transport_task,
-                return_exceptions=True
-            )
+            if cached_scores is not None:
+                amenity_density = cached_scores.pop('amenity_density')
+            else:
+                # Amenity density is a synchronous database query
+                amenity_density = self.get_amenity_density(location, radius_km=1.0)
+            
+            # Fetch remote data concurrently; each sub-service degrades independently
+            environmental_data = transport_score = None
+            nearby_transport = []
+            tasks = {}
+            try:
+                async with asyncio.timeout(self.insights_timeout_seconds):
+                    async with asyncio.TaskGroup() as tg:
+                        tasks['environmental_data'] = tg.create_task(self._bounded_insight_call(
+                            'environmental data',
+                            self.environmental_service.refresh_environmental_data_if_stale(location)
+                        ))
+                        tasks['transport_score'] = tg.create_task(self._bounded_insight_call(
+                            'transport score',
+                            self.transport_service.calculate_transport_score(location)
+                        ))
+                        tasks['nearby_transport'] = tg.create_task(self._bounded_insight_call(
+                            'nearby transport',
+                            self.transport_service.get_nearby_transport_links(location, radius_meters=500)
+                        ))
+            except TimeoutError:
+                logger.warning("Location insights timed out, returning partial results")
+            
+            degraded = False
+            for name, task in tasks.items():
+                result = task.result() if task.done() and not task.cancelled() else None
+                if result is None:
+                    degraded = True
+                elif name == 'environmental_data':
+                    environmental_data = result
+                elif name == 'transport_score':
+                    transport_score = result
+                    # A score computed while TfL was unreachable is served but counts as degraded
+                    if result.get('degraded') or 'error' in result:
+                        degraded = True
+                else:
+                    nearby_transport = result
             
             # Compile insights
             insights = {
                 'location': location,
                 'timestamp': datetime.now().isoformat(),
-                'environmental_data': environmental_data if not isinstance(environmental_data, Exception) else None,
-                'transport_score': transport_score if not isinstance(transport_score, Exception) else None,
-                'amenity_density': amenity_density if not isinstance(amenity_density, Exception) else {},
-                'nearby_transport': nearby_transport if not isinstance(nearby_transport, Exception) else [],
-                'overall_score': self._calculate_overall_location_score(
-                    environmental_data, transport_score, amenity_density
-                )
+                'environmental_data': environmental_data,
+                'transport_score': transport_score,
+                'amenity_density': amenity_density,
+                'nearby_transport': nearby_transport,
+                'overall_score': cached_scores if cached_scores is not None else
+                    self._calculate_overall_location_score(environmental_data, transport_score, amenity_density)
             }
             
+            # Only cache complete results so a slow upstream doesn't pin degraded scores
+            if cached_scores is None and not degraded and 'error' not in insights['overall_score']:
+                self._cache_location_scores(tile, insights['overall_score'], amenity_density)
+            
             return insights
             
         except Exception as e:
@@ -369,6 +494,71 @@ class GeospatialService:
                 'timestamp': datetime.now().isoformat()
             }
     
+    async def _bounded_insight_call(self, name: str, coro: Awaitable[Any]) -> Any:
+        """
+        Await a location insight sub-service with its own timeout
+        Returns None on timeout or error so other sub-services are unaffected
+        """
+        try:
+            return await asyncio.wait_for(coro, timeout=self.insights_subcall_timeout_seconds)
+        except TimeoutError:
+            logger.warning(f"Timed out fetching {name} for location insights")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching {name} for location insights: {e}")
+            return None
+    
+    def get_cached_location_scores(self, tile: str) -> Optional[Dict[str, Any]]:
+        """
+        Get precomputed location scores for a geohash tile
+        Returns None if the tile has not been scored or the scores are stale
+        """
+        try:
+            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.location_score_cache_hours)
+            
+            result = self.db.query(LocationScoreDB).filter(
+                LocationScoreDB.geohash == tile,
+                LocationScoreDB.computed_at >= cutoff_time
+            ).first()
+            
+            if result:
+                return {
+                    'transport': int(result.transport_score),
+                    'environmental': int(result.environmental_score),
+                    'amenities': int(result.amenity_score),
+                    'overall': int(result.overall_score),
+                    'amenity_density': dict(result.amenity_density or {})
+                }
+                
+        except Exception as e:
+            logger.error(f"Error retrieving cached location scores: {e}")
+        
+        return None
+    
+    def _cache_location_scores(self, tile: str, scores: Dict[str, Any], 
+                               amenity_density: Dict[str, int]) -> None:
+        """
+        Store computed location scores for a geohash tile
+        Called from get_location_insights, so a read request writes and commits here: scores
+        need live TfL and environmental lookups, which no background task performs, so the
+        first complete request for a tile is what fills location_scores for later requests
+        """
+        try:
+            self.db.merge(LocationScoreDB(
+                geohash=tile,
+                transport_score=scores.get('transport', 0),
+                environmental_score=scores.get('environmental', 0),
+                amenity_score=scores.get('amenities', 0),
+                overall_score=scores.get('overall', 0),
+                amenity_density=amenity_density,
+                computed_at=datetime.now(timezone.utc)
+            ))
+            self.db.commit()
+            
+        except Exception as e:
+            logger.error(f"Error caching location scores: {e}")
+            self.db.rollback()
+    
     def _calculate_overall_location_score(
         self, 
         environmental_data: Dict[str, Any], 
@@ -389,49 +579,26 @@ class GeospatialService:
                 scores['transport'] = transport_score['transport_score']
             
             # Environmental score (0-100)
-            env_score = 50  # Default neutral score
+            air_quality_index = flood_risk_level = crime_rate = None
             if environmental_data and not isinstance(environmental_data, Exception):
-                # Air quality (lower AQI is better)
-                air_quality = environmental_data.get('air_quality', {})
-                if air_quality and 'air_quality_index' in air_quality:
-                    aqi = air_quality['air_quality_index']
-                    if aqi <= 50:
-                        env_score += 20
-                    elif aqi <= 100:
-                        env_score += 10
-                    elif aqi > 150:
-                        env_score -= 20
+                air_quality = environmental_data.get('air_quality') or {}
+                air_quality_index = air_quality.get('air_quality_index')
                 
-                # Flood risk
-                flood_risk = environmental_data.get('flood_risk', {})
-                if flood_risk and 'flood_risk_level' in flood_risk:
-                    risk_level = flood_risk['flood_risk_level']
-                    if risk_level == 'low':
-                        env_score += 15
-                    elif risk_level == 'high':
-                        env_score -= 25
+                flood_risk = environmental_data.get('flood_risk') or {}
+                flood_risk_level = flood_risk.get('flood_risk_level')
                 
-                # Crime rate (lower is better)
-                crime_stats = environmental_data.get('crime_statistics', {})
-                if crime_stats and 'crime_rate' in crime_stats:
-                    crime_rate = crime_stats['crime_rate']
-                    if crime_rate < 20:
-                        env_score += 15
-                    elif crime_rate > 50:
-                        env_score -= 20
+                crime_stats = environmental_data.get('crime_statistics') or {}
+                crime_rate = crime_stats.get('crime_rate')
             
-            scores['environmental'] = max(0, min(100, env_score))
+            scores['environmental'] = environmental_score(air_quality_index, flood_risk_level, crime_rate)
             
             # Amenities score (0-100)
             total_amenities = sum(amenity_density.values()) if amenity_density else 0
-            amenity_score = min(100, total_amenities * 2)  # Scale amenity count
-            scores['amenities'] = amenity_score
+            scores['amenities'] = amenity_score(total_amenities)
             
             # Overall score (weighted average)
-            scores['overall'] = int(
-                scores['transport'] * 0.4 +
-                scores['environmental'] * 0.35 +
-                scores['amenities'] * 0.25
+            scores['overall'] = overall_score(
+                scores['transport'], scores['environmental'], scores['amenities']
             )
             
             return scores
@@ -0,0 +1,45 @@
+"""
+Geohash tiling helpers used to key precomputed location data
+"""
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision 7 tiles are roughly 153m x 153m, fine enough for neighbourhood scores
+DEFAULT_TILE_PRECISION = 7
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = DEFAULT_TILE_PRECISION) -> str:
+    """Encode a coordinate pair into a geohash string of the given precision"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
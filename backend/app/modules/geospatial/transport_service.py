@@ -1,24 +1,231 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Mapping, Callable, Tuple
 import httpx
 import asyncio
+import hashlib
+import orjson
+import time
+import weakref
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+import redis.asyncio as redis
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 from geoalchemy2.functions import ST_DWithin, ST_GeogFromText
 from app.models.geospatial import Location, TransportLink, CommuteInfo
 from app.core.config import settings
+from app.core.http import get_shared_client
+from .distance import haversine_km
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only default for missing nested TfL objects, avoids allocating a dict per lookup
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# In-flight TfL fetches per event loop, keyed by cache key, so concurrent identical requests share one
+_inflight_requests: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=32)
+def _join_stop_types(transport_types: Tuple[str, ...]) -> str:
+    """Build the TfL stopTypes parameter for a combination of transport types"""
+    return ','.join(transport_types)
+
+
+# Redis client shared by all service instances for caching TfL responses
+redis_client = None
+
+
+def get_redis_client():
+    global redis_client
+    if redis_client is None:
+        redis_client = redis.from_url(settings.REDIS_URL)
+    return redis_client
+
+
+class TransportResultCache:
+    """Process-local LRU cache with expiry for computed transport results"""
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key: tuple) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: tuple, value: Any, ttl: float) -> None:
+        """Store a value, evicting the least recently used entries beyond maxsize"""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+# Shared across service instances; keys use coordinates rounded to 4 decimals (~11m)
+transport_result_cache = TransportResultCache()
+
 
 class TransportDataService:
     """Service for fetching and managing transport data, particularly TfL integration"""
     
+    # TfL mode names mapped to our transport types
+    MODE_MAPPING = {
+        'tube': 'tube',
+        'bus': 'bus',
+        'national-rail': 'train',
+        'dlr': 'dlr',
+        'overground': 'overground',
+        'tram': 'tram'
+    }
+    
+    # Stop types searched when the caller doesn't narrow them
+    DEFAULT_STOP_TYPES = 'tube,bus,rail,dlr,overground'
+    
+    ALL_LINES_STATUS_URL = "https://api.tfl.gov.uk/Line/Mode/tube,bus,dlr,overground,tram/Status"
+    
+    # Minimum score for each explanation, highest first
+    SCORE_EXPLANATIONS = (
+        (80, "Excellent transport connectivity"),
+        (60, "Very good transport connectivity"),
+        (40, "Good transport connectivity"),
+        (20, "Fair transport connectivity"),
+    )
+    
     def __init__(self, db: Session):
         self.db = db
         self.tfl_api_key = getattr(settings, 'TFL_API_KEY', None)
         self.cache_duration_hours = 6  # Cache transport data for 6 hours
+        # Per-endpoint TTLs (seconds) for cached TfL responses
+        self.stop_search_cache_ttl = self.cache_duration_hours * 3600
+        self.stop_details_cache_ttl = 24 * 3600
+        self.journey_cache_ttl = 10 * 60
+        self.line_status_cache_ttl = 60
+        self.stale_cache_ttl = 24 * 3600  # How long a stale copy is kept as a fallback when TfL fails
+        self.redis = get_redis_client()
+        self.result_cache = transport_result_cache
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP/2 client shared with the listing adapters on the running event loop"""
+        return get_shared_client()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # The shared client outlives any single service; it is closed on shutdown
+        pass
+    
+    def _cache_key(self, url: str, params: Dict[str, Any]) -> str:
+        """Build a cache key from the URL and query params, excluding the API key"""
+        key_params = sorted((k, str(v)) for k, v in params.items() if k != 'app_key')
+        digest = hashlib.blake2b(f"{url}?{key_params}".encode(), digest_size=16).hexdigest()
+        return f"tfl:{digest}"
+    
+    async def _cache_read(self, key: str) -> Optional[bytes]:
+        """Read a cached TfL response, treating cache errors as misses"""
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"TfL cache lookup failed: {e}")
+            return None
+    
+    async def _cache_write(self, key: str, content: bytes, ttl: int, 
+                           etag: Optional[str] = None) -> None:
+        """Store a TfL response along with a longer-lived stale copy and its ETag"""
+        if self.redis is None:
+            return
+        try:
+            stale_ttl = ttl + self.stale_cache_ttl
+            await self.redis.set(key, content, ex=ttl)
+            await self.redis.set(f"{key}:stale", content, ex=stale_ttl)
+            if etag:
+                await self.redis.set(f"{key}:etag", etag, ex=stale_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to cache TfL response: {e}")
+    
+    async def _cached_get(self, url: str, params: Dict[str, Any], ttl: int, timeout: float,
+                          project: Optional[Callable[[Any], Any]] = None) -> Optional[Any]:
+        """
+        GET a TfL endpoint through the Redis cache, coalescing identical in-flight requests
+        Concurrent callers asking for the same URL and params share one underlying fetch;
+        project, if given, trims a fresh response to the fields callers use before it is cached
+        """
+        key = self._cache_key(url, params)
+        inflight = _inflight_requests.setdefault(asyncio.get_running_loop(), {})
+        
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_cached(key, url, params, ttl, timeout, project))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        
+        # Shield so one caller being cancelled doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch_cached(self, key: str, url: str, params: Dict[str, Any], ttl: int, timeout: float,
+                            project: Optional[Callable[[Any], Any]] = None) -> Optional[Any]:
+        """
+        Fetch a TfL endpoint through the Redis cache
+        Expired entries are revalidated with their ETag; falls back to the last cached copy
+        if TfL is unavailable, returns None if nothing is available
+        """
+        cached = await self._cache_read(key)
+        if cached is not None:
+            return orjson.loads(cached)
+        
+        # A conditional GET lets TfL answer 304 without resending an unchanged body
+        etag = await self._cache_read(f"{key}:etag")
+        headers = {'If-None-Match': etag.decode()} if etag else None
+        
+        try:
+            response = await self.client.get(url, params=params, headers=headers, timeout=timeout)
+        except httpx.RequestError as e:
+            logger.warning(f"TfL request failed for {url}: {e}")
+            response = None
+        
+        if response is not None:
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                content = response.content
+                if project is not None:
+                    data = project(data)
+                    content = orjson.dumps(data)
+                await self._cache_write(key, content, ttl, response.headers.get('ETag'))
+                return data
+            
+            if response.status_code == 304:
+                stale = await self._cache_read(f"{key}:stale")
+                if stale is not None:
+                    await self._cache_write(key, stale, ttl, etag.decode())
+                    return orjson.loads(stale)
+                return None
+            
+            logger.warning(f"TfL API error {response.status_code} for {url}")
+            if response.status_code < 500:
+                return None
+        
+        stale = await self._cache_read(f"{key}:stale")
+        if stale is not None:
+            logger.info(f"Serving stale TfL response for {url}")
+            return orjson.loads(stale)
+        
+        return None
     
     async def get_nearby_transport_links(
         self, 
@@ -29,12 +236,24 @@ class TransportDataService:
         """
         Get nearby transport links (stations, bus stops) using TfL API
         """
+        links = await self._fetch_nearby_transport_links(location, radius_meters, transport_types)
+        return links if links is not None else []
+    
+    async def _fetch_nearby_transport_links(
+        self,
+        location: Location,
+        radius_meters: int = 500,
+        transport_types: Optional[List[str]] = None
+    ) -> Optional[List[TransportLink]]:
+        """Nearby transport links, or None if TfL could not be reached (as opposed to no stops)"""
         if not self.tfl_api_key:
             logger.warning("TfL API key not configured")
             return []
         
         if transport_types is None:
-            transport_types = ['tube', 'bus', 'rail', 'dlr', 'overground']
+            stop_types = self.DEFAULT_STOP_TYPES
+        else:
+            stop_types = _join_stop_types(tuple(transport_types))
         
         try:
             # TfL StopPoint API to find nearby stops
@@ -43,84 +262,87 @@ class TransportDataService:
                 'lat': location.latitude,
                 'lon': location.longitude,
                 'radius': radius_meters,
-                'stopTypes': ','.join(transport_types),
+                'stopTypes': stop_types,
                 'app_key': self.tfl_api_key
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=15.0)
+            data = await self._cached_get(
+                url, params, ttl=self.stop_search_cache_ttl, timeout=15.0,
+                project=self._project_stop_points
+            )
+            
+            if data is not None:
+                transport_links = []
+                
+                for stop in data.get('stopPoints', []):
+                    transport_link = TransportLink(
+                        id=stop.get('id', ''),
+                        name=stop.get('commonName', ''),
+                        transport_type=self._map_tfl_mode_to_type(stop.get('modes', [])),
+                        location=Location(
+                            latitude=stop.get('lat', 0),
+                            longitude=stop.get('lon', 0),
+                            address=stop.get('commonName', '')
+                        ),
+                        lines=self._extract_lines_from_stop(stop),
+                        zones=self._extract_zones_from_stop(stop)
+                    )
+                    transport_links.append(transport_link)
+                
+                return transport_links
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    transport_links = []
-                    
-                    for stop in data.get('stopPoints', []):
-                        transport_link = TransportLink(
-                            id=stop.get('id', ''),
-                            name=stop.get('commonName', ''),
-                            transport_type=self._map_tfl_mode_to_type(stop.get('modes', [])),
-                            location=Location(
-                                latitude=stop.get('lat', 0),
-                                longitude=stop.get('lon', 0),
-                                address=stop.get('commonName', '')
-                            ),
-                            lines=self._extract_lines_from_stop(stop),
-                            zones=self._extract_zones_from_stop(stop)
-                        )
-                        transport_links.append(transport_link)
-                    
-                    return transport_links
-                else:
-                    logger.warning(f"TfL API error: {response.status_code}")
-                    
         except Exception as e:
             logger.error(f"Error fetching nearby transport links: {e}")
         
-        return []
+        return None
+    
+    def _project_stop_points(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the StopPoint fields used to build transport links"""
+        return {
+            'stopPoints': [
+                {
+                    'id': stop.get('id', ''),
+                    'commonName': stop.get('commonName', ''),
+                    'lat': stop.get('lat', 0),
+                    'lon': stop.get('lon', 0),
+                    'modes': [
+                        {'modeName': mode['modeName']} if 'modeName' in mode else {}
+                        for mode in stop.get('modes') or ()
+                    ],
+                    'lines': [{'name': line.get('name', '')} for line in stop.get('lines') or ()],
+                    'additionalProperties': [
+                        {'key': 'Zone', 'value': prop.get('value', '')}
+                        for prop in stop.get('additionalProperties') or ()
+                        if prop.get('key') == 'Zone'
+                    ]
+                }
+                for stop in data.get('stopPoints') or ()
+            ]
+        }
     
     def _map_tfl_mode_to_type(self, modes: List[Dict]) -> str:
         """Map TfL mode to our transport type"""
         if not modes:
             return "unknown"
         
-        mode_mapping = {
-            'tube': 'tube',
-            'bus': 'bus',
-            'national-rail': 'train',
-            'dlr': 'dlr',
-            'overground': 'overground',
-            'tram': 'tram'
-        }
-        
         # Return the first recognized mode
         for mode in modes:
-            mode_name = mode.get('modeName', '').lower()
-            if mode_name in mode_mapping:
-                return mode_mapping[mode_name]
+            mapped = self.MODE_MAPPING.get(mode.get('modeName', '').lower())
+            if mapped:
+                return mapped
         
         return modes[0].get('modeName', 'unknown')
     
     def _extract_lines_from_stop(self, stop: Dict) -> List[str]:
         """Extract line names from TfL stop data"""
-        lines = []
-        for line in stop.get('lines', []):
-            line_name = line.get('name', '')
-            if line_name:
-                lines.append(line_name)
-        return lines
+        return [name for name in (line.get('name') for line in stop.get('lines') or ()) if name]
     
     def _extract_zones_from_stop(self, stop: Dict) -> List[str]:
         """Extract zone information from TfL stop data"""
-        zones = []
-        additional_properties = stop.get('additionalProperties', [])
-        
-        for prop in additional_properties:
-            if prop.get('key') == 'Zone':
-                zone_value = prop.get('value', '')
-                if zone_value:
-                    zones.append(zone_value)
-        
-        return zones
+        return [
+            prop.get('value') for prop in stop.get('additionalProperties') or ()
+            if prop.get('key') == 'Zone' and prop.get('value')
+        ]
     
     async def get_journey_planner_data(
         self, 
@@ -146,33 +368,29 @@ class TransportDataService:
                 'app_key': self.tfl_api_key
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=20.0)
+            data = await self._cached_get(url, params, ttl=self.journey_cache_ttl, timeout=20.0)
+            
+            if data is not None:
+                journeys = data.get('journeys', [])
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    journeys = data.get('journeys', [])
-                    
-                    if journeys:
-                        # Take the first (best) journey
-                        best_journey = journeys[0]
-                        
-                        return CommuteInfo(
-                            origin=origin,
-                            destination=destination,
-                            duration_minutes=best_journey.get('duration', 0),
-                            distance_km=0,  # TfL doesn't always provide distance
-                            transport_mode="public_transport",
-                            route_details={
-                                'legs': self._extract_journey_legs(best_journey),
-                                'fare': self._extract_fare_info(best_journey),
-                                'accessibility': best_journey.get('accessibility', {}),
-                                'journey_preference': journey_preference
-                            }
-                        )
-                else:
-                    logger.warning(f"TfL Journey Planner API error: {response.status_code}")
+                if journeys:
+                    # Take the first (best) journey
+                    best_journey = journeys[0]
                     
+                    return CommuteInfo(
+                        origin=origin,
+                        destination=destination,
+                        duration_minutes=best_journey.get('duration', 0),
+                        distance_km=0,  # TfL doesn't always provide distance
+                        transport_mode="public_transport",
+                        route_details={
+                            'legs': self._extract_journey_legs(best_journey),
+                            'fare': self._extract_fare_info(best_journey),
+                            'accessibility': best_journey.get('accessibility', {}),
+                            'journey_preference': journey_preference
+                        }
+                    )
+                
         except Exception as e:
             logger.error(f"Error fetching journey planner data: {e}")
         
@@ -181,29 +399,28 @@ class TransportDataService:
     def _extract_journey_legs(self, journey: Dict) -> List[Dict]:
         """Extract journey legs from TfL journey data"""
         legs = []
-        for leg in journey.get('legs', []):
-            leg_info = {
-                'mode': leg.get('mode', {}).get('name', ''),
+        for leg in journey.get('legs') or ():
+            route_options = leg.get('routeOptions')
+            legs.append({
+                'mode': (leg.get('mode') or _EMPTY).get('name', ''),
                 'duration': leg.get('duration', 0),
-                'instruction': leg.get('instruction', {}).get('summary', ''),
-                'departure_point': leg.get('departurePoint', {}).get('commonName', ''),
-                'arrival_point': leg.get('arrivalPoint', {}).get('commonName', ''),
-                'line_name': leg.get('routeOptions', [{}])[0].get('name', '') if leg.get('routeOptions') else ''
-            }
-            legs.append(leg_info)
+                'instruction': (leg.get('instruction') or _EMPTY).get('summary', ''),
+                'departure_point': (leg.get('departurePoint') or _EMPTY).get('commonName', ''),
+                'arrival_point': (leg.get('arrivalPoint') or _EMPTY).get('commonName', ''),
+                'line_name': route_options[0].get('name', '') if route_options else ''
+            })
         return legs
     
     def _extract_fare_info(self, journey: Dict) -> Dict[str, Any]:
         """Extract fare information from TfL journey data"""
-        fare_info = {}
-        if 'fare' in journey:
-            fare_data = journey['fare']
-            fare_info = {
-                'total_cost': fare_data.get('totalCost', 0),
-                'peak_cost': fare_data.get('peakCost', 0),
-                'off_peak_cost': fare_data.get('offPeakCost', 0)
-            }
-        return fare_info
+        fare_data = journey.get('fare')
+        if fare_data is None:
+            return {}
+        return {
+            'total_cost': fare_data.get('totalCost', 0),
+            'peak_cost': fare_data.get('peakCost', 0),
+            'off_peak_cost': fare_data.get('offPeakCost', 0)
+        }
     
     async def get_line_status_updates(self, line_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
@@ -220,36 +437,33 @@ class TransportDataService:
                 url = f"https://api.tfl.gov.uk/Line/{line_ids_str}/Status"
             else:
                 # Get status for all lines
-                url = "https://api.tfl.gov.uk/Line/Mode/tube,bus,dlr,overground,tram/Status"
+                url = self.ALL_LINES_STATUS_URL
             
             params = {'app_key': self.tfl_api_key}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
+            data = await self._cached_get(url, params, ttl=self.line_status_cache_ttl, timeout=10.0)
+            
+            if data is not None:
+                status_updates = {}
+                last_updated = datetime.now().isoformat()  # One timestamp for the whole response
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    status_updates = {}
-                    
-                    for line in data:
-                        line_id = line.get('id', '')
-                        line_name = line.get('name', '')
-                        line_statuses = line.get('lineStatuses', [])
-                        
-                        if line_statuses:
-                            status = line_statuses[0]
-                            status_updates[line_id] = {
-                                'name': line_name,
-                                'status': status.get('statusSeverityDescription', ''),
-                                'reason': status.get('reason', ''),
-                                'disruption': status.get('disruption', {}),
-                                'last_updated': datetime.now().isoformat()
-                            }
-                    
-                    return status_updates
-                else:
-                    logger.warning(f"TfL Line Status API error: {response.status_code}")
+                for line in data:
+                    line_id = line.get('id', '')
+                    line_name = line.get('name', '')
+                    line_statuses = line.get('lineStatuses', [])
                     
+                    if line_statuses:
+                        status = line_statuses[0]
+                        status_updates[line_id] = {
+                            'name': line_name,
+                            'status': status.get('statusSeverityDescription', ''),
+                            'reason': status.get('reason', ''),
+                            'disruption': status.get('disruption', {}),
+                            'last_updated': last_updated
+                        }
+                
+                return status_updates
+                
         except Exception as e:
             logger.error(f"Error fetching line status updates: {e}")
         
@@ -263,70 +477,104 @@ class TransportDataService:
         """
         Get transport accessibility information for a location
         """
-        transport_links = await self.get_nearby_transport_links(
+        cache_key = ('accessibility', round(location.latitude, 4), round(location.longitude, 4), radius_meters)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            # Copy the containers so callers cannot mutate the cached result
+            return {
+                **cached,
+                'location': location,
+                'transport_types': list(cached['transport_types']),
+                'zones': list(cached['zones']),
+                'lines': list(cached['lines']),
+                'step_free_access': [dict(info) for info in cached['step_free_access']],
+            }
+        
+        transport_links = await self._fetch_nearby_transport_links(
             location, 
             radius_meters, 
             ['tube', 'rail', 'dlr', 'overground']
         )
+        fetch_failed = transport_links is None
+        if fetch_failed:
+            transport_links = []
         
-        accessibility_info = {
-            'location': location,
-            'transport_links_count': len(transport_links),
-            'transport_types': list(set(link.transport_type for link in transport_links)),
-            'zones': [],
-            'lines': [],
-            'step_free_access': []
-        }
+        # Step-free lookups only need the links, so start them before aggregating
+        step_free_task = (
+            asyncio.create_task(self._get_step_free_access_info(transport_links))
+            if self.tfl_api_key else None
+        )
         
-        # Aggregate information
+        # Aggregate information in a single pass
+        transport_types = set()
         all_zones = set()
         all_lines = set()
         
         for link in transport_links:
+            transport_types.add(link.transport_type)
             all_zones.update(link.zones)
             all_lines.update(link.lines)
         
-        accessibility_info['zones'] = sorted(list(all_zones))
-        accessibility_info['lines'] = sorted(list(all_lines))
+        step_free_access = await step_free_task if step_free_task else []
+        fetch_failed = fetch_failed or step_free_access is None
         
-        # Get step-free access information if available
-        if self.tfl_api_key:
-            step_free_info = await self._get_step_free_access_info(transport_links)
-            accessibility_info['step_free_access'] = step_free_info
+        accessibility_info = {
+            'location': location,
+            'transport_links_count': len(transport_links),
+            'transport_types': list(transport_types),
+            'zones': sorted(all_zones),
+            'lines': sorted(all_lines),
+            'step_free_access': step_free_access or []
+        }
         
+        # A TfL outage is not cached, so the next request retries instead of serving empty data
+        if not fetch_failed:
+            self.result_cache.set(cache_key, accessibility_info, ttl=self.stop_search_cache_ttl)
         return accessibility_info
     
-    async def _get_step_free_access_info(self, transport_links: List[TransportLink]) -> List[Dict]:
-        """Get step-free access information for transport links"""
+    async def _get_step_free_access_info(self, transport_links: List[TransportLink]) -> Optional[List[Dict]]:
+        """Get step-free access information for transport links, or None if TfL could not be reached"""
         step_free_info = []
         
         try:
-            for link in transport_links[:5]:  # Limit to first 5 to avoid too many API calls
-                url = f"https://api.tfl.gov.uk/StopPoint/{link.id}"
-                params = {'app_key': self.tfl_api_key}
+            links = transport_links[:5]  # Limit to first 5 to keep the batch small
+            if not links:
+                return step_free_info
+            
+            # TfL returns every stop in one response when IDs are comma-separated
+            stop_ids = ','.join(link.id for link in links)
+            data = await self._cached_get(
+                f"https://api.tfl.gov.uk/StopPoint/{stop_ids}",
+                {'app_key': self.tfl_api_key},
+                ttl=self.stop_details_cache_ttl,
+                timeout=10.0
+            )
+            if data is None:
+                return None
+            
+            # A single ID returns one stop object rather than a list
+            stops = data if isinstance(data, list) else [data]
+            stops_by_id = {stop.get('id'): stop for stop in stops}
+            
+            for link in links:
+                stop = stops_by_id.get(link.id)
+                if stop is None:
+                    continue
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url, params=params, timeout=5.0)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        # Check for accessibility information
-                        additional_properties = data.get('additionalProperties', [])
-                        for prop in additional_properties:
-                            if 'accessibility' in prop.get('key', '').lower():
-                                step_free_info.append({
-                                    'stop_name': link.name,
-                                    'stop_id': link.id,
-                                    'accessibility_info': prop.get('value', '')
-                                })
-                                break
-                        
-                        # Small delay to be respectful to the API
-                        await asyncio.sleep(0.1)
-                        
+                # Check for accessibility information
+                additional_properties = stop.get('additionalProperties', [])
+                for prop in additional_properties:
+                    if 'accessibility' in prop.get('key', '').lower():
+                        step_free_info.append({
+                            'stop_name': link.name,
+                            'stop_id': link.id,
+                            'accessibility_info': prop.get('value', '')
+                        })
+                        break
+            
         except Exception as e:
             logger.error(f"Error fetching step-free access info: {e}")
+            return None
         
         return step_free_info
     
@@ -334,15 +582,39 @@ class TransportDataService:
         """
         Calculate a transport connectivity score for a location
         """
+        # Nearby locations share a score, so reuse results keyed by rounded coordinates
+        cache_key = ('score', round(location.latitude, 4), round(location.longitude, 4))
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            # Copy the containers so callers cannot mutate the cached result
+            return {
+                **cached,
+                'location': location,
+                'breakdown': dict(cached['breakdown']),
+                'zones': list(cached['zones']),
+            }
+        
         try:
-            # Get transport links within different radii
-            nearby_500m = await self.get_nearby_transport_links(location, 500)
-            nearby_1km = await self.get_nearby_transport_links(location, 1000)
+            # Fetch the 1km set once and derive the 500m counts locally
+            nearby_1km = await self._fetch_nearby_transport_links(location, 1000)
+            fetch_failed = nearby_1km is None
+            if fetch_failed:
+                nearby_1km = []
+            
+            # Count link types per radius in a single pass
+            types_1km = Counter(link.transport_type for link in nearby_1km)
+            types_500m = Counter(
+                link.transport_type for link in nearby_1km
+                if link.transport_type in ('tube', 'bus') and haversine_km(
+                    location.latitude, location.longitude,
+                    link.location.latitude, link.location.longitude
+                ) <= 0.5
+            )
             
             # Calculate scores
-            tube_stations_500m = len([link for link in nearby_500m if link.transport_type == 'tube'])
-            bus_stops_500m = len([link for link in nearby_500m if link.transport_type == 'bus'])
-            rail_stations_1km = len([link for link in nearby_1km if link.transport_type in ['train', 'dlr', 'overground']])
+            tube_stations_500m = types_500m['tube']
+            bus_stops_500m = types_500m['bus']
+            rail_stations_1km = types_1km['train'] + types_1km['dlr'] + types_1km['overground']
             
             # Simple scoring algorithm
             transport_score = min(100, (
@@ -352,11 +624,9 @@ class TransportDataService:
             ))
             
             # Get unique zones
-            all_zones = set()
-            for link in nearby_1km:
-                all_zones.update(link.zones)
+            all_zones = set().union(*(link.zones for link in nearby_1km))
             
-            return {
+            result = {
                 'location': location,
                 'transport_score': transport_score,
                 'breakdown': {
@@ -369,6 +639,13 @@ class TransportDataService:
                 'score_explanation': self._get_score_explanation(transport_score)
             }
             
+            # A TfL outage is flagged and not cached, so the next request retries instead of pinning a 0 score
+            if fetch_failed:
+                result['degraded'] = True
+            else:
+                self.result_cache.set(cache_key, result, ttl=self.stop_search_cache_ttl)
+            return result
+            
         except Exception as e:
             logger.error(f"Error calculating transport score: {e}")
             return {
@@ -379,13 +656,7 @@ class TransportDataService:
     
     def _get_score_explanation(self, score: int) -> str:
         """Get human-readable explanation of transport score"""
-        if score >= 80:
-            return "Excellent transport connectivity"
-        elif score >= 60:
-            return "Very good transport connectivity"
-        elif score >= 40:
-            return "Good transport connectivity"
-        elif score >= 20:
-            return "Fair transport connectivity"
-        else:
-            return "Limited transport connectivity"
\ No newline at end of file
+        return next(
+            (explanation for threshold, explanation in self.SCORE_EXPLANATIONS if score >= threshold),
+            "Limited transport connectivity"
+        )
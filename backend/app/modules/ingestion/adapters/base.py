@@ -3,22 +3,139 @@ Base adapter class for property listing APIs with rate limiting and retry logic
 """
 import asyncio
 import logging
+import re
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Any
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from pydantic import BaseModel
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
+
+from app.core.http import get_shared_client
 
 
 logger = logging.getLogger(__name__)
 
+# Statuses worth retrying; other 4xx responses will not succeed on a retry
+RETRIABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Longest Retry-After we honor inline before handing over to the retry policy
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+def is_retriable_error(exc: BaseException) -> bool:
+    """Retry network errors and transient HTTP statuses only"""
+    if isinstance(exc, httpx.RequestError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRIABLE_STATUS_CODES
+    return False
+
+
+def first_digit_run(text: str) -> Optional[int]:
+    """Return the first run of ASCII digits in text as an int, or None if there is none"""
+    digits = []
+    for char in text:
+        if '0' <= char <= '9':
+            digits.append(char)
+        elif digits:
+            break
+    return int(''.join(digits)) if digits else None
+
+
+# Currency symbols and thousands separators stripped from price text
+PRICE_STRIP_TABLE = str.maketrans('', '', '£,')
+
+
+def parse_price_text(text: str) -> Optional[float]:
+    """Parse the first number in price text such as "£450,000" or "Offers over £325,000" """
+    price_clean = text.translate(PRICE_STRIP_TABLE)
+    if price_clean.isdecimal():
+        return float(price_clean)
+    price = first_digit_run(price_clean)
+    return float(price) if price is not None else None
+
+
+# Furnishing labels sources commonly send, already lowercased
+FURNISHED_STATES = {
+    'furnished': 'furnished',
+    'unfurnished': 'unfurnished',
+    'part furnished': 'part-furnished',
+    'part-furnished': 'part-furnished',
+    'partially furnished': 'part-furnished'
+}
+
+
+def classify_furnished(text: str) -> Optional[str]:
+    """Classify lowercased text as furnished, unfurnished or part-furnished, if it mentions furnishing"""
+    state = FURNISHED_STATES.get(text)
+    if state is not None:
+        return state
+    
+    # Fall back to substring checks for free text such as "Offered part furnished"
+    if 'furnished' not in text:
+        return None
+    if 'unfurnished' in text:
+        return 'unfurnished'
+    if 'part' in text:
+        return 'part-furnished'
+    return 'furnished'
+
+
+# Canonical property types; earlier types win when a label contains keywords for several
+PROPERTY_TYPE_PRIORITY = ('flat', 'house', 'studio')
+
+
+def property_type_normalizer(keyword_map: Dict[str, str]) -> Callable[[str], str]:
+    """
+    Build a function mapping a property type label to its canonical type via a source's keyword map
+    Listings repeat a handful of labels, so the returned function caches its results
+    """
+    keyword_re = re.compile('|'.join(map(re.escape, keyword_map)))
+    
+    @lru_cache(maxsize=256)
+    def canonical_property_type(prop_type: str) -> str:
+        if not prop_type:
+            return "unknown"
+        
+        prop_type_lower = prop_type.lower()
+        
+        canonical = keyword_map.get(prop_type_lower)
+        if canonical:
+            return canonical
+        
+        # One scan collects every keyword, then the highest priority type is chosen
+        matched = {keyword_map[word] for word in keyword_re.findall(prop_type_lower)}
+        for canonical in PROPERTY_TYPE_PRIORITY:
+            if canonical in matched:
+                return canonical
+        return prop_type_lower
+    
+    return canonical_property_type
+
+
+# Mock listings each source returns for development, when no API is configured
+MOCK_LISTING_COUNT = 10
+
 
-class RawPropertyData(BaseModel):
+def build_mock_templates(make_listing: Callable[[int], Dict[str, Any]]) -> Tuple[Dict[str, Any], ...]:
+    """
+    Build a source's mock listings once, at import, from their location-independent fields
+    Searches shallow-copy these templates, so nested lists are shared and must be treated as read-only
+    """
+    return tuple(make_listing(i) for i in range(MOCK_LISTING_COUNT))
+
+
+@dataclass(slots=True, frozen=True)
+class RawPropertyData:
     """Raw property data from external APIs before normalization"""
     source: str
     source_id: str
-    raw_data: Dict[str, Any]
+    # Excluded from equality and hashing so instances can be placed in sets
+    raw_data: Dict[str, Any] = field(compare=False)
     fetched_at: datetime
     url: Optional[str] = None
 
@@ -29,49 +146,59 @@ class RateLimiter:
     def __init__(self, max_calls: int, time_window: int):
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = []
+        self.calls = deque()  # Monotonic timestamps of calls within the window, oldest first
+        self._lock = asyncio.Lock()
     
     async def acquire(self):
         """Wait if necessary to respect rate limits"""
-        now = datetime.now()
-        # Remove calls outside the time window
-        self.calls = [call_time for call_time in self.calls 
-                     if now - call_time < timedelta(seconds=self.time_window)]
-        
-        if len(self.calls) >= self.max_calls:
-            # Calculate how long to wait
-            oldest_call = min(self.calls)
-            wait_time = self.time_window - (now - oldest_call).total_seconds()
-            if wait_time > 0:
-                logger.info(f"Rate limit reached, waiting {wait_time:.2f} seconds")
-                await asyncio.sleep(wait_time)
-        
-        self.calls.append(now)
+        # Serialize acquirers so concurrent callers can't over-admit
+        async with self._lock:
+            now = time.monotonic()
+            # Remove calls outside the time window
+            cutoff = now - self.time_window
+            while self.calls and self.calls[0] <= cutoff:
+                self.calls.popleft()
+            
+            if len(self.calls) >= self.max_calls:
+                # Calculate how long to wait for the oldest call to expire
+                wait_time = self.time_window - (now - self.calls[0])
+                if wait_time > 0:
+                    logger.info(f"Rate limit reached, waiting {wait_time:.2f} seconds")
+                    await asyncio.sleep(wait_time)
+                self.calls.popleft()
+            
+            self.calls.append(time.monotonic())
 
 
 class BasePropertyAdapter(ABC):
     """Base class for property listing API adapters"""
     
+    # Fields that lower reliability when missing (0.2 each for critical, 0.1 for optional)
+    CRITICAL_FIELDS = frozenset({'price', 'address', 'bedrooms'})
+    OPTIONAL_FIELDS = frozenset({'description', 'bathrooms', 'property_type', 'images'})
+    
     def __init__(self, api_key: Optional[str] = None, rate_limit_calls: int = 100, 
                  rate_limit_window: int = 3600):
         self.api_key = api_key
         self.rate_limiter = RateLimiter(rate_limit_calls, rate_limit_window)
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        )
         self.source_name = self.__class__.__name__.lower().replace('adapter', '')
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client shared with other adapters on the running event loop"""
+        return get_shared_client()
+    
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # The shared client outlives any single adapter; it is closed on shutdown
+        pass
     
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPStatusError))
+        wait=wait_exponential_jitter(initial=1, max=10),
+        retry=retry_if_exception(is_retriable_error)
     )
     async def _make_request(self, url: str, params: Optional[Dict] = None, 
                            headers: Optional[Dict] = None) -> httpx.Response:
@@ -80,6 +207,16 @@ class BasePropertyAdapter(ABC):
         
         try:
             response = await self.client.get(url, params=params, headers=headers)
+            
+            # Honor a short Retry-After once before escalating to the retry policy
+            if response.status_code == 429:
+                retry_after = self._get_retry_after_seconds(response)
+                if retry_after is not None:
+                    logger.info(f"Rate limited by {url}, retrying after {retry_after:.1f} seconds")
+                    await asyncio.sleep(retry_after)
+                    await self.rate_limiter.acquire()
+                    response = await self.client.get(url, params=params, headers=headers)
+            
             response.raise_for_status()
             return response
         except httpx.HTTPStatusError as e:
@@ -89,12 +226,46 @@ class BasePropertyAdapter(ABC):
             logger.error(f"Request error for {url}: {str(e)}")
             raise
     
+    def _get_retry_after_seconds(self, response: httpx.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds, if present and short enough"""
+        try:
+            retry_after = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            return None
+        
+        if 0 <= retry_after <= MAX_RETRY_AFTER_SECONDS:
+            return retry_after
+        return None
+    
     @abstractmethod
     async def search_properties(self, location: str, radius_km: float = 5, 
                               max_results: int = 100) -> List[RawPropertyData]:
         """Search for properties in a given location"""
         pass
     
+    async def iter_properties(self, location: str, radius_km: float = 5,
+                              max_results: int = 100) -> AsyncIterator[RawPropertyData]:
+        """Yield listings as they arrive; adapters that page through results should override this"""
+        for raw_data in await self.search_properties(location, radius_km, max_results):
+            yield raw_data
+    
+    @staticmethod
+    async def search_many(adapters: List["BasePropertyAdapter"], location: str, radius_km: float = 5,
+                          max_results: int = 100) -> List[List[RawPropertyData]]:
+        """Search several sources concurrently; a failing source yields an empty list"""
+        results = await asyncio.gather(
+            *(adapter.search_properties(location, radius_km, max_results) for adapter in adapters),
+            return_exceptions=True
+        )
+        
+        listings = []
+        for adapter, result in zip(adapters, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error searching {adapter.source_name} properties: {str(result)}")
+                result = []
+            listings.append(result)
+        return listings
+    
     @abstractmethod
     async def get_property_details(self, property_id: str) -> Optional[RawPropertyData]:
         """Get detailed information for a specific property"""
@@ -105,31 +276,43 @@ class BasePropertyAdapter(ABC):
         """Convert raw API data to normalized property format"""
         pass
     
+    def normalize_batch(self, raw_items: List[RawPropertyData]) -> List[Dict[str, Any]]:
+        """Normalize a batch of raw listings, preserving input order"""
+        normalize = self.normalize_property_data
+        return [normalize(raw_data) for raw_data in raw_items]
+    
     def calculate_reliability_score(self, raw_data: RawPropertyData) -> float:
         """Calculate reliability score based on data completeness and source"""
-        score = 1.0
-        data = raw_data.raw_data
-        
-        # Reduce score for missing critical fields
-        critical_fields = ['price', 'address', 'bedrooms']
-        missing_critical = sum(1 for field in critical_fields if not data.get(field))
-        score -= missing_critical * 0.2
+        present = {field for field, value in raw_data.raw_data.items() if value}
         
-        # Reduce score for missing optional fields
-        optional_fields = ['description', 'bathrooms', 'property_type', 'images']
-        missing_optional = sum(1 for field in optional_fields if not data.get(field))
-        score -= missing_optional * 0.1
+        # Reduce score for missing critical and optional fields
+        score = (
+            1.0
+            - len(self.CRITICAL_FIELDS - present) * 0.2
+            - len(self.OPTIONAL_FIELDS - present) * 0.1
+        )
         
         # Ensure score is between 0 and 1
         return max(0.0, min(1.0, score))
     
+    def calculate_reliability_scores(self, raw_items: List[RawPropertyData]) -> List[float]:
+        """Calculate reliability scores for a batch of raw listings"""
+        return [self.calculate_reliability_score(raw_data) for raw_data in raw_items]
+    
+    def _extract_coordinates(self, data: Dict) -> Tuple[Optional[float], Optional[float]]:
+        """Extract latitude and longitude from the source's block holding them, or (None, None)"""
+        # A latitude or longitude of 0 is valid, so test for presence rather than truthiness
+        try:
+            return float(data['latitude']), float(data['longitude'])
+        except (KeyError, TypeError, ValueError):
+            return None, None
+    
     def add_lineage_data(self, normalized_data: Dict[str, Any], 
                         raw_data: RawPropertyData) -> Dict[str, Any]:
         """Add lineage tracking information to normalized data"""
-        normalized_data.update({
-            'source': self.source_name,
-            'source_id': raw_data.source_id,
-            'last_updated': raw_data.fetched_at,
-            'reliability_score': self.calculate_reliability_score(raw_data)
-        })
+        # Assign in place rather than building a temporary dict for update()
+        normalized_data['source'] = self.source_name
+        normalized_data['source_id'] = raw_data.source_id
+        normalized_data['last_updated'] = raw_data.fetched_at
+        normalized_data['reliability_score'] = self.calculate_reliability_score(raw_data)
         return normalized_data
\ No newline at end of file
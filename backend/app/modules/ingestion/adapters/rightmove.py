@@ -2,15 +2,117 @@
 Rightmove API adapter for property listings
 """
 import logging
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from urllib.parse import urlencode
-import re
 
-from .base import BasePropertyAdapter, RawPropertyData
+from .base import (
+    BasePropertyAdapter, RawPropertyData, classify_furnished, first_digit_run, parse_price_text,
+    build_mock_templates, property_type_normalizer
+)
 
 logger = logging.getLogger(__name__)
 
+# UK postcodes are "<outward> <inward>": outward is [A-Z]{1,2}[0-9R][0-9A-Z]?,
+# inward is a digit followed by two letters from a restricted alphabet
+_POSTCODE_LETTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_POSTCODE_ALNUM = frozenset("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_POSTCODE_DISTRICT_LEAD = frozenset("0123456789R")
+_INWARD_SET = frozenset("ABDEFGHJLNPQRSTUWXYZ")
+_ADDRESS_PUNCTUATION = ",.;:()"
+
+# Rightmove's property type keywords and their canonical type
+_PROPERTY_TYPE_MAP = {
+    'flat': 'flat',
+    'apartment': 'flat',
+    'maisonette': 'flat',
+    'house': 'house',
+    'bungalow': 'house',
+    'cottage': 'house',
+    'studio': 'studio'
+}
+_canonical_property_type = property_type_normalizer(_PROPERTY_TYPE_MAP)
+
+
+def _is_inward_code(token: str) -> bool:
+    """Check a token against [0-9][ABD-HJLNP-UW-Z]{2}"""
+    return (
+        len(token) == 3 and '0' <= token[0] <= '9'
+        and token[1] in _INWARD_SET and token[2] in _INWARD_SET
+    )
+
+
+def _is_outward_code(token: str) -> bool:
+    """Check a token against [A-Z]{1,2}[0-9R][0-9A-Z]?"""
+    # Try one and two leading area letters; "AR1" is valid either way round
+    for area_length in (1, 2):
+        rest = len(token) - area_length
+        if rest not in (1, 2):
+            continue
+        if (
+            all(char in _POSTCODE_LETTERS for char in token[:area_length])
+            and token[area_length] in _POSTCODE_DISTRICT_LEAD
+            and (rest == 1 or token[-1] in _POSTCODE_ALNUM)
+        ):
+            return True
+    return False
+
+
+def _find_postcode(address: str) -> Optional[str]:
+    """Return the last "<outward> <inward>" postcode in an address, uppercased"""
+    # Postcodes usually close the address, so check adjacent token pairs from the right
+    # and only uppercase the candidates rather than the whole string
+    tokens = address.split()
+    for index in range(len(tokens) - 1, 0, -1):
+        inward = tokens[index].strip(_ADDRESS_PUNCTUATION).upper()
+        if not _is_inward_code(inward):
+            continue
+        outward = tokens[index - 1].strip(_ADDRESS_PUNCTUATION).upper()
+        if _is_outward_code(outward):
+            return f"{outward} {inward}"
+    return None
+
+
+# Address tails (where postcodes live) repeat across a location's listings
+_POSTCODE_TAIL_LENGTH = 40
+_find_postcode_cached = lru_cache(maxsize=512)(_find_postcode)
+
+
+def _mock_listing_template(i: int) -> Dict[str, Any]:
+    """Location-independent fields of the i-th mock Rightmove listing"""
+    return {
+        "id": f"rightmove_{i+1}",
+        "displayAddress": f"{i+1} Mock Street",
+        "price": 300000 + i * 50000,
+        "bedrooms": 2 + (i % 3),
+        "bathrooms": 1 + (i % 2),
+        "propertyType": ["Flat", "House", "Studio"][i % 3],
+        "summary": f"Beautiful {['flat', 'house', 'studio'][i % 3]}",
+        "location": {
+            "latitude": 51.5074 + (i * 0.001),
+            "longitude": -0.1278 + (i * 0.001)
+        },
+        "propertyUrl": f"https://rightmove.co.uk/property/{i+1}",
+        "propertyImages": [f"https://rightmove.co.uk/images/{i+1}_1.jpg"],
+        "keyFeatures": ["Garden", "Parking"] if i % 2 == 0 else ["Furnished"]
+    }
+
+
+_MOCK_LISTING_TEMPLATES = build_mock_templates(_mock_listing_template)
+
+
+def _room_count(value) -> Optional[int]:
+    """Read a bedroom or bathroom count from an int or free text"""
+    if isinstance(value, int):
+        return value
+    elif isinstance(value, str):
+        # Most listings send a bare count like "3", which needs no scan
+        if value.isdecimal():
+            return int(value)
+        return first_digit_run(value)
+    return None
+
 
 class RightmoveAdapter(BasePropertyAdapter):
     """Adapter for Rightmove property listings"""
@@ -26,37 +128,40 @@ class RightmoveAdapter(BasePropertyAdapter):
                               max_results: int = 100) -> List[RawPropertyData]:
         """Search for properties in Rightmove"""
         try:
-            # Mock implementation - in reality this would call Rightmove's API
-            # For now, return sample data structure
-            logger.info(f"Searching Rightmove for properties near {location}")
-            
-            # This would be the actual API call:
-            # params = {
-            #     'location': location,
-            #     'radius': radius_km,
-            #     'limit': max_results,
-            #     'apikey': self.api_key
-            # }
-            # response = await self._make_request(f"{self.base_url}/properties/search", params)
-            
-            # Mock response for development
-            mock_properties = self._generate_mock_rightmove_data(location, max_results)
-            
-            return [
-                RawPropertyData(
-                    source="rightmove",
-                    source_id=prop["id"],
-                    raw_data=prop,
-                    fetched_at=datetime.now(),
-                    url=prop.get("url")
-                )
-                for prop in mock_properties
-            ]
-            
+            return [raw async for raw in self.iter_properties(location, radius_km, max_results)]
         except Exception as e:
             logger.error(f"Error searching Rightmove properties: {str(e)}")
             return []
     
+    async def iter_properties(self, location: str, radius_km: float = 5,
+                              max_results: int = 100) -> AsyncIterator[RawPropertyData]:
+        """Yield Rightmove listings as they are fetched"""
+        # Mock implementation - in reality this would call Rightmove's API
+        # For now, return sample data structure
+        logger.info(f"Searching Rightmove for properties near {location}")
+        
+        # This would be the actual API call:
+        # params = {
+        #     'location': location,
+        #     'radius': radius_km,
+        #     'limit': max_results,
+        #     'apikey': self.api_key
+        # }
+        # response = await self._make_request(f"{self.base_url}/properties/search", params)
+        
+        # Mock response for development
+        mock_properties = self._generate_mock_rightmove_data(location, max_results)
+        
+        fetched_at = datetime.now()
+        for prop in mock_properties:
+            yield RawPropertyData(
+                source="rightmove",
+                source_id=str(prop["id"]),
+                raw_data=prop,
+                fetched_at=fetched_at,
+                url=prop.get("url")
+            )
+    
     async def get_property_details(self, property_id: str) -> Optional[RawPropertyData]:
         """Get detailed property information from Rightmove"""
         try:
@@ -80,34 +185,34 @@ class RightmoveAdapter(BasePropertyAdapter):
     def normalize_property_data(self, raw_data: RawPropertyData) -> Dict[str, Any]:
         """Convert Rightmove data to normalized format"""
         data = raw_data.raw_data
+        get = data.get
         
-        # Extract price (handle different formats)
-        price = self._extract_price(data.get("price", ""))
+        # Look up nested and repeated fields once
+        location = get('location') or {}
+        address = get('displayAddress', '')
         
-        # Extract coordinates
-        lat, lon = self._extract_coordinates(data)
+        lat, lon = self._extract_coordinates(location)
         
-        # Normalize property type
-        property_type = self._normalize_property_type(data.get("propertyType", ""))
+        garden, parking, furnished = self._scan_key_features(data)
         
         normalized = {
-            'title': data.get('displayAddress', ''),
-            'description': data.get('summary', ''),
-            'price': price,
-            'bedrooms': self._extract_bedrooms(data.get('bedrooms')),
-            'bathrooms': self._extract_bathrooms(data.get('bathrooms')),
-            'property_type': property_type,
-            'address': data.get('displayAddress', ''),
-            'postcode': self._extract_postcode(data.get('displayAddress', '')),
-            'city': data.get('location', {}).get('displayName', ''),
+            'title': address,
+            'description': get('summary', ''),
+            'price': self._extract_price(get('price', "")),
+            'bedrooms': _room_count(get('bedrooms')),
+            'bathrooms': _room_count(get('bathrooms')),
+            'property_type': _canonical_property_type(get('propertyType', "")),
+            'address': address,
+            'postcode': self._extract_postcode(address),
+            'city': location.get('displayName', ''),
             'latitude': lat,
             'longitude': lon,
-            'floor_area': data.get('size', {}).get('squareFeet'),
-            'garden': self._has_feature(data, 'garden'),
-            'parking': self._has_feature(data, 'parking'),
-            'furnished': self._extract_furnished_status(data),
-            'listing_url': data.get('propertyUrl', ''),
-            'image_urls': data.get('propertyImages', [])
+            'floor_area': (get('size') or {}).get('squareFeet'),
+            'garden': garden,
+            'parking': parking,
+            'furnished': furnished,
+            'listing_url': get('propertyUrl', ''),
+            'image_urls': get('propertyImages', [])
         }
         
         # Add lineage information
@@ -115,129 +220,85 @@ class RightmoveAdapter(BasePropertyAdapter):
     
     def _extract_price(self, price_str: str) -> Optional[float]:
         """Extract numeric price from Rightmove price string"""
+        if isinstance(price_str, (int, float)):
+            return float(price_str)
         if not price_str:
             return None
         
-        # Remove currency symbols and commas
-        price_clean = re.sub(r'[£,]', '', str(price_str))
-        
+        price_str = str(price_str)
+
         # Handle "POA" (Price on Application)
-        if 'poa' in price_clean.lower():
+        if 'poa' in price_str.lower():
             return None
-        
-        # Extract numbers
-        numbers = re.findall(r'\d+', price_clean)
-        if numbers:
-            return float(numbers[0])
-        
-        return None
-    
-    def _extract_coordinates(self, data: Dict) -> tuple[Optional[float], Optional[float]]:
-        """Extract latitude and longitude from Rightmove data"""
-        location = data.get('location', {})
-        lat = location.get('latitude')
-        lon = location.get('longitude')
-        
-        if lat and lon:
-            return float(lat), float(lon)
-        
-        return None, None
+
+        return parse_price_text(price_str)
     
     def _normalize_property_type(self, prop_type: str) -> str:
         """Normalize Rightmove property type to standard format"""
-        if not prop_type:
-            return "unknown"
-        
-        prop_type_lower = prop_type.lower()
-        
-        if any(word in prop_type_lower for word in ['flat', 'apartment', 'maisonette']):
-            return "flat"
-        elif any(word in prop_type_lower for word in ['house', 'bungalow', 'cottage']):
-            return "house"
-        elif 'studio' in prop_type_lower:
-            return "studio"
-        else:
-            return prop_type_lower
+        return _canonical_property_type(prop_type)
     
     def _extract_bedrooms(self, bedrooms) -> Optional[int]:
         """Extract number of bedrooms"""
-        if isinstance(bedrooms, int):
-            return bedrooms
-        elif isinstance(bedrooms, str):
-            numbers = re.findall(r'\d+', bedrooms)
-            return int(numbers[0]) if numbers else None
-        return None
+        return _room_count(bedrooms)
     
     def _extract_bathrooms(self, bathrooms) -> Optional[int]:
         """Extract number of bathrooms"""
-        if isinstance(bathrooms, int):
-            return bathrooms
-        elif isinstance(bathrooms, str):
-            numbers = re.findall(r'\d+', bathrooms)
-            return int(numbers[0]) if numbers else None
-        return None
+        return _room_count(bathrooms)
     
     def _extract_postcode(self, address: str) -> Optional[str]:
         """Extract UK postcode from address"""
         if not address:
             return None
         
-        # UK postcode pattern
-        postcode_pattern = r'[A-Z]{1,2}[0-9R][0-9A-Z]? [0-9][ABD-HJLNP-UW-Z]{2}'
-        match = re.search(postcode_pattern, address.upper())
-        return match.group() if match else None
-    
-    def _has_feature(self, data: Dict, feature: str) -> bool:
-        """Check if property has a specific feature"""
-        features = data.get('keyFeatures', [])
-        if isinstance(features, list):
-            return any(feature.lower() in str(f).lower() for f in features)
-        return False
+        if len(address) <= _POSTCODE_TAIL_LENGTH:
+            return _find_postcode_cached(address)
+        
+        # Listings in one area share address tails, so cache on the tail and drop any
+        # token the slice cut in half; fall back to a full scan if the tail has no postcode
+        tail = address[-_POSTCODE_TAIL_LENGTH:]
+        if not address[-_POSTCODE_TAIL_LENGTH - 1].isspace():
+            parts = tail.split(None, 1)
+            tail = parts[1] if len(parts) > 1 else ''
+        return _find_postcode_cached(tail) or _find_postcode(address)
     
-    def _extract_furnished_status(self, data: Dict) -> Optional[str]:
-        """Extract furnished status from property data"""
+    def _scan_key_features(self, data: Dict) -> Tuple[bool, bool, Optional[str]]:
+        """Read garden, parking and furnished status from key features in one pass"""
+        garden = False
+        parking = False
+        furnished = None
         features = data.get('keyFeatures', [])
-        if isinstance(features, list):
-            for feature in features:
-                feature_str = str(feature).lower()
-                if 'furnished' in feature_str:
-                    if 'unfurnished' in feature_str:
-                        return 'unfurnished'
-                    elif 'part' in feature_str or 'partial' in feature_str:
-                        return 'part-furnished'
-                    else:
-                        return 'furnished'
-        return None
+        if not isinstance(features, list):
+            return garden, parking, furnished
+        
+        for feature in features:
+            # Lowercase each feature once and test every flag against it
+            feature_str = str(feature).lower()
+            if 'garden' in feature_str:
+                garden = True
+            if 'parking' in feature_str:
+                parking = True
+            if furnished is None:
+                furnished = classify_furnished(feature_str)
+        return garden, parking, furnished
     
     def _generate_mock_rightmove_data(self, location: str, max_results: int) -> List[Dict]:
         """Generate mock Rightmove data for development"""
-        mock_data = []
-        for i in range(min(max_results, 10)):  # Limit to 10 for mock
-            mock_data.append({
-                "id": f"rightmove_{i+1}",
-                "displayAddress": f"{i+1} Mock Street, {location}",
-                "price": f"£{300000 + i * 50000}",
-                "bedrooms": 2 + (i % 3),
-                "bathrooms": 1 + (i % 2),
-                "propertyType": ["Flat", "House", "Studio"][i % 3],
-                "summary": f"Beautiful {['flat', 'house', 'studio'][i % 3]} in {location}",
-                "location": {
-                    "latitude": 51.5074 + (i * 0.001),
-                    "longitude": -0.1278 + (i * 0.001),
-                    "displayName": location
-                },
-                "propertyUrl": f"https://rightmove.co.uk/property/{i+1}",
-                "propertyImages": [f"https://rightmove.co.uk/images/{i+1}_1.jpg"],
-                "keyFeatures": ["Garden", "Parking"] if i % 2 == 0 else ["Furnished"]
-            })
-        return mock_data
+        return [
+            dict(
+                template,
+                displayAddress=f"{template['displayAddress']}, {location}",
+                summary=f"{template['summary']} in {location}",
+                location=dict(template['location'], displayName=location)
+            )
+            for template in _MOCK_LISTING_TEMPLATES[:max_results]
+        ]
     
     def _generate_mock_property_detail(self, property_id: str) -> Dict:
         """Generate mock detailed property data"""
         return {
             "id": property_id,
             "displayAddress": "123 Mock Street, London",
-            "price": "£450000",
+            "price": 450000,
             "bedrooms": 3,
             "bathrooms": 2,
             "propertyType": "House",
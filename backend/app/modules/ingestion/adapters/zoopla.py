@@ -3,13 +3,52 @@ Zoopla API adapter for property listings
 """
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import re
+from typing import AsyncIterator, Dict, List, Optional, Any
 
-from .base import BasePropertyAdapter, RawPropertyData
+from .base import (
+    BasePropertyAdapter, RawPropertyData, classify_furnished, parse_price_text,
+    build_mock_templates, property_type_normalizer
+)
 
 logger = logging.getLogger(__name__)
 
+# Zoopla's property type keywords and their canonical type
+_PROPERTY_TYPE_MAP = {
+    'flat': 'flat',
+    'apartment': 'flat',
+    'maisonette': 'flat',
+    'house': 'house',
+    'terraced': 'house',
+    'semi-detached': 'house',
+    'detached': 'house',
+    'bungalow': 'house',
+    'studio': 'studio'
+}
+_canonical_property_type = property_type_normalizer(_PROPERTY_TYPE_MAP)
+
+
+def _mock_listing_template(i: int) -> Dict[str, Any]:
+    """Location-independent fields of the i-th mock Zoopla listing"""
+    return {
+        "listing_id": f"zoopla_{i+1}",
+        "displayable_address": f"{i+10} Sample Road",
+        "price": 280000 + i * 40000,
+        "num_bedrooms": 1 + (i % 4),
+        "num_bathrooms": 1 + (i % 3),
+        "property_type": ["Flat", "Terraced house", "Semi-detached house"][i % 3],
+        "description": f"Lovely {['flat', 'house', 'property'][i % 3]}",
+        "latitude": 51.5074 + (i * 0.002),
+        "longitude": -0.1278 + (i * 0.002),
+        "outcode": f"SW{i+1}",
+        "details_url": f"https://zoopla.co.uk/property/{i+1}",
+        "image_urls": [f"https://zoopla.co.uk/images/{i+1}_1.jpg"],
+        "features": ["Garden", "Parking"] if i % 2 == 0 else ["Furnished"],
+        "furnished_state": "Furnished" if i % 3 == 0 else "Unfurnished"
+    }
+
+
+_MOCK_LISTING_TEMPLATES = build_mock_templates(_mock_listing_template)
+
 
 class ZooplaAdapter(BasePropertyAdapter):
     """Adapter for Zoopla property listings"""
@@ -23,37 +62,40 @@ class ZooplaAdapter(BasePropertyAdapter):
                               max_results: int = 100) -> List[RawPropertyData]:
         """Search for properties in Zoopla"""
         try:
-            logger.info(f"Searching Zoopla for properties near {location}")
-            
-            # This would be the actual API call with real Zoopla API:
-            # params = {
-            #     'area': location,
-            #     'radius': radius_km,
-            #     'page_size': min(max_results, 100),  # Zoopla max is 100
-            #     'api_key': self.api_key,
-            #     'listing_status': 'sale'
-            # }
-            # response = await self._make_request(f"{self.base_url}/property_listings", params)
-            # data = response.json()
-            
-            # Mock response for development
-            mock_properties = self._generate_mock_zoopla_data(location, max_results)
-            
-            return [
-                RawPropertyData(
-                    source="zoopla",
-                    source_id=str(prop["listing_id"]),
-                    raw_data=prop,
-                    fetched_at=datetime.now(),
-                    url=prop.get("details_url")
-                )
-                for prop in mock_properties
-            ]
-            
+            return [raw async for raw in self.iter_properties(location, radius_km, max_results)]
         except Exception as e:
             logger.error(f"Error searching Zoopla properties: {str(e)}")
             return []
     
+    async def iter_properties(self, location: str, radius_km: float = 5,
+                              max_results: int = 100) -> AsyncIterator[RawPropertyData]:
+        """Yield Zoopla listings as they are fetched"""
+        logger.info(f"Searching Zoopla for properties near {location}")
+        
+        # This would be the actual API call with real Zoopla API:
+        # params = {
+        #     'area': location,
+        #     'radius': radius_km,
+        #     'page_size': min(max_results, 100),  # Zoopla max is 100
+        #     'api_key': self.api_key,
+        #     'listing_status': 'sale'
+        # }
+        # response = await self._make_request(f"{self.base_url}/property_listings", params)
+        # data = response.json()
+        
+        # Mock response for development
+        mock_properties = self._generate_mock_zoopla_data(location, max_results)
+        
+        fetched_at = datetime.now()
+        for prop in mock_properties:
+            yield RawPropertyData(
+                source="zoopla",
+                source_id=str(prop["listing_id"]),
+                raw_data=prop,
+                fetched_at=fetched_at,
+                url=prop.get("details_url")
+            )
+    
     async def get_property_details(self, property_id: str) -> Optional[RawPropertyData]:
         """Get detailed property information from Zoopla"""
         try:
@@ -84,33 +126,32 @@ class ZooplaAdapter(BasePropertyAdapter):
     def normalize_property_data(self, raw_data: RawPropertyData) -> Dict[str, Any]:
         """Convert Zoopla data to normalized format"""
         data = raw_data.raw_data
-        
-        # Extract price
-        price = self._extract_price(data.get("price"))
+        get = data.get
+        address = get('displayable_address', '')
         
         # Extract coordinates
         lat, lon = self._extract_coordinates(data)
         
-        # Normalize property type
-        property_type = self._normalize_property_type(data.get("property_type", ""))
+        # Lowercase the feature text once and reuse it for every feature check
+        feature_text = self._feature_text(data)
         
         normalized = {
-            'title': data.get('displayable_address', ''),
-            'description': data.get('description', ''),
-            'price': price,
-            'bedrooms': data.get('num_bedrooms'),
-            'bathrooms': data.get('num_bathrooms'),
-            'property_type': property_type,
-            'address': data.get('displayable_address', ''),
-            'postcode': data.get('outcode', ''),  # Zoopla provides outcode
-            'city': data.get('county', ''),
+            'title': address,
+            'description': get('description', ''),
+            'price': self._extract_price(get("price")),
+            'bedrooms': get('num_bedrooms'),
+            'bathrooms': get('num_bathrooms'),
+            'property_type': _canonical_property_type(get("property_type", "")),
+            'address': address,
+            'postcode': get('outcode', ''),  # Zoopla provides outcode
+            'city': get('county', ''),
             'latitude': lat,
             'longitude': lon,
             'floor_area': self._extract_floor_area(data),
-            'garden': self._has_feature(data, 'garden'),
-            'parking': self._has_feature(data, 'parking'),
-            'furnished': self._extract_furnished_status(data),
-            'listing_url': data.get('details_url', ''),
+            'garden': 'garden' in feature_text,
+            'parking': 'parking' in feature_text,
+            'furnished': self._extract_furnished_status(data, feature_text),
+            'listing_url': get('details_url', ''),
             'image_urls': self._extract_image_urls(data)
         }
         
@@ -122,48 +163,12 @@ class ZooplaAdapter(BasePropertyAdapter):
         if isinstance(price_data, (int, float)):
             return float(price_data)
         elif isinstance(price_data, str):
-            # Remove currency symbols and commas
-            price_clean = re.sub(r'[£,]', '', price_data)
-            numbers = re.findall(r'\d+', price_clean)
-            if numbers:
-                return float(numbers[0])
+            return parse_price_text(price_data)
         return None
     
-    def _extract_coordinates(self, data: Dict) -> tuple[Optional[float], Optional[float]]:
-        """Extract latitude and longitude from Zoopla data"""
-        lat = data.get('latitude')
-        lon = data.get('longitude')
-        
-        if lat and lon:
-            return float(lat), float(lon)
-        
-        return None, None
-    
     def _normalize_property_type(self, prop_type: str) -> str:
         """Normalize Zoopla property type to standard format"""
-        if not prop_type:
-            return "unknown"
-        
-        prop_type_lower = prop_type.lower()
-        
-        # Zoopla uses different terminology
-        type_mapping = {
-            'flat': 'flat',
-            'apartment': 'flat',
-            'maisonette': 'flat',
-            'house': 'house',
-            'terraced': 'house',
-            'semi-detached': 'house',
-            'detached': 'house',
-            'bungalow': 'house',
-            'studio': 'studio'
-        }
-        
-        for key, value in type_mapping.items():
-            if key in prop_type_lower:
-                return value
-        
-        return prop_type_lower
+        return _canonical_property_type(prop_type)
     
     def _extract_floor_area(self, data: Dict) -> Optional[float]:
         """Extract floor area from Zoopla data"""
@@ -176,43 +181,39 @@ class ZooplaAdapter(BasePropertyAdapter):
             return floor_area.get('value')
         return None
     
-    def _has_feature(self, data: Dict, feature: str) -> bool:
-        """Check if property has a specific feature"""
+    def _feature_text(self, data: Dict) -> str:
+        """Collect lowercased feature text from the fields Zoopla may use into one string"""
+        texts = []
         # Check in various possible fields
-        features_to_check = [
+        for features in (
             data.get('features', []),
             data.get('property_features', []),
             data.get('description', '')
-        ]
-        
-        for features in features_to_check:
+        ):
             if isinstance(features, list):
-                if any(feature.lower() in str(f).lower() for f in features):
-                    return True
+                texts.extend(str(f).lower() for f in features)
             elif isinstance(features, str):
-                if feature.lower() in features.lower():
-                    return True
-        
-        return False
+                texts.append(features.lower())
+        # Keywords never contain a newline, so a match cannot span two entries
+        return '\n'.join(texts)
     
-    def _extract_furnished_status(self, data: Dict) -> Optional[str]:
+    def _has_feature(self, feature_text: str, feature: str) -> bool:
+        """Check if property has a specific feature"""
+        return feature in feature_text
+    
+    def _extract_furnished_status(self, data: Dict, feature_text: str) -> Optional[str]:
         """Extract furnished status from Zoopla data"""
         # Check furnished_state field first
         furnished_state = data.get('furnished_state')
         if furnished_state:
-            state_lower = furnished_state.lower()
-            if 'furnished' in state_lower:
-                if 'unfurnished' in state_lower:
-                    return 'unfurnished'
-                elif 'part' in state_lower or 'partial' in state_lower:
-                    return 'part-furnished'
-                else:
-                    return 'furnished'
+            state = classify_furnished(furnished_state.strip().lower())
+            if state is not None:
+                return state
         
         # Fallback to checking features
-        if self._has_feature(data, 'furnished'):
+        if self._has_feature(feature_text, 'furnished'):
             return 'furnished'
-        elif self._has_feature(data, 'unfurnished'):
+        elif self._has_feature(feature_text, 'unfurnished'):
             return 'unfurnished'
         
         return None
@@ -228,26 +229,15 @@ class ZooplaAdapter(BasePropertyAdapter):
     
     def _generate_mock_zoopla_data(self, location: str, max_results: int) -> List[Dict]:
         """Generate mock Zoopla data for development"""
-        mock_data = []
-        for i in range(min(max_results, 10)):  # Limit to 10 for mock
-            mock_data.append({
-                "listing_id": f"zoopla_{i+1}",
-                "displayable_address": f"{i+10} Sample Road, {location}",
-                "price": 280000 + i * 40000,
-                "num_bedrooms": 1 + (i % 4),
-                "num_bathrooms": 1 + (i % 3),
-                "property_type": ["Flat", "Terraced house", "Semi-detached house"][i % 3],
-                "description": f"Lovely {['flat', 'house', 'property'][i % 3]} in {location}",
-                "latitude": 51.5074 + (i * 0.002),
-                "longitude": -0.1278 + (i * 0.002),
-                "outcode": f"SW{i+1}",
-                "county": location,
-                "details_url": f"https://zoopla.co.uk/property/{i+1}",
-                "image_urls": [f"https://zoopla.co.uk/images/{i+1}_1.jpg"],
-                "features": ["Garden", "Parking"] if i % 2 == 0 else ["Furnished"],
-                "furnished_state": "Furnished" if i % 3 == 0 else "Unfurnished"
-            })
-        return mock_data
+        return [
+            dict(
+                template,
+                displayable_address=f"{template['displayable_address']}, {location}",
+                description=f"{template['description']} in {location}",
+                county=location
+            )
+            for template in _MOCK_LISTING_TEMPLATES[:max_results]
+        ]
     
     def _generate_mock_property_detail(self, property_id: str) -> Dict:
         """Generate mock detailed property data"""
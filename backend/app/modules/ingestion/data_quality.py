@@ -2,14 +2,39 @@
 Data quality validation pipeline for property ingestion
 """
 import logging
+import operator
+import os
 import re
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, BinaryIO
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
 from enum import Enum
+from functools import lru_cache
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# UK postcode pattern, compiled once; case-insensitive so addresses need not be uppercased
+_UK_POSTCODE_RE = re.compile(r'[A-Z]{1,2}[0-9R][0-9A-Z]? [0-9][ABD-HJLNP-UW-Z]{2}', re.IGNORECASE)
+
+
+def _contains_postcode(address: str) -> bool:
+    """
+    Check for a UK postcode by confirming the pattern only around each space followed by a digit
+    Spaces are visited right to left since the postcode normally ends the address
+    """
+    search = _UK_POSTCODE_RE.search
+    space = address.rfind(' ')
+    while space != -1:
+        # The outward code is at most four characters and the inward code three
+        if '0' <= address[space + 1:space + 2] <= '9' and search(address, max(0, space - 4), space + 4):
+            return True
+        space = address.rfind(' ', 0, space)
+    return False
+
 
 class IssueType(Enum):
     """Types of data quality issues"""
@@ -30,20 +55,24 @@ class IssueSeverity(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+@dataclass(slots=True)
 class DataQualityIssue:
     """Represents a data quality issue"""
+    # Validators construct issues positionally on the hot path, so keep this field order stable
     property_id: str
     issue_type: IssueType
     severity: IssueSeverity
     field_name: str
     description: str
     suggested_fix: Optional[str] = None
-    detected_at: datetime = None
+    # Validators pass one timestamp per batch; issues built without one are stamped now. Both
+    # default to UTC-aware times (the freshness check compares against an aware clock), so
+    # callers comparing detected_at with naive datetimes must attach a timezone first
+    detected_at: Optional[datetime] = None
     
     def __post_init__(self):
         if self.detected_at is None:
-            self.detected_at = datetime.now()
+            self.detected_at = datetime.now(timezone.utc)
 
 
 @dataclass
@@ -54,22 +83,100 @@ class ValidationReport:
     issues: List[DataQualityIssue]
     overall_score: float
     validation_time: datetime
+    # Counted once from issues at construction, keyed by enum value with zeros for absent members
+    issue_count_by_severity: Dict[str, int] = field(init=False)
+    issue_count_by_type: Dict[str, int] = field(init=False)
     
-    @property
-    def issue_count_by_severity(self) -> Dict[str, int]:
-        """Count issues by severity"""
-        counts = {severity.value: 0 for severity in IssueSeverity}
+    def __post_init__(self):
+        severity_counts = Counter()
+        type_counts = Counter()
         for issue in self.issues:
-            counts[issue.severity.value] += 1
-        return counts
+            severity_counts[issue.severity] += 1
+            type_counts[issue.issue_type] += 1
+        
+        self.issue_count_by_severity = {severity.value: severity_counts[severity] for severity in IssueSeverity}
+        self.issue_count_by_type = {issue_type.value: type_counts[issue_type] for issue_type in IssueType}
+
+
+# Plain numeric types eligible for the fast range check (bool is excluded on purpose)
+_NUMBER_TYPES = (int, float)
+
+# Properties per worker process below which parallel validation is not worth the overhead
+PARALLEL_CHUNK_SIZE = 5000
+
+# Fields the validators read; together with the listing's age in days they key the validation cache
+VALIDATION_CACHE_FIELDS = (
+    'source', 'source_id', 'address', 'price', 'latitude', 'longitude',
+    'bedrooms', 'bathrooms', 'last_updated'
+)
+VALIDATION_CACHE_SIZE = 100_000
+
+# Conflict-resolution scores kept per batch
+RESOLVE_CACHE_SIZE = 10_000
+
+# Quality score penalty per issue, and the most one property can contribute
+SEVERITY_WEIGHTS = {
+    IssueSeverity.LOW: 0.1,
+    IssueSeverity.MEDIUM: 0.3,
+    IssueSeverity.HIGH: 0.7,
+    IssueSeverity.CRITICAL: 1.0
+}
+MAX_PROPERTY_PENALTY = sum(SEVERITY_WEIGHTS.values())
+
+# Issues at these severities make a property invalid
+BLOCKING_SEVERITIES = frozenset({IssueSeverity.CRITICAL, IssueSeverity.HIGH})
+
+
+# Literal field names and fixes are already shared code constants; these cache the formatted
+# descriptions that recur across a batch so repeated issues reference one string
+@lru_cache(maxsize=1024)
+def _stale_description(days_old: int) -> str:
+    return f"Data is {days_old} days old"
+
+
+@lru_cache(maxsize=1024)
+def _room_count_description(field_name: str, count: int) -> str:
+    return f"Unusual number of {field_name}: {count}"
+
+
+def _to_float(value: Any) -> Tuple[bool, float]:
+    """Coerce a value to float, returning (ok, value); plain numbers skip the conversion attempt"""
+    if type(value) in _NUMBER_TYPES:
+        return True, float(value)
+    try:
+        return True, float(value)
+    except (ValueError, TypeError):
+        return False, 0.0
+
+
+def _to_int(value: Any) -> Tuple[bool, int]:
+    """Coerce a value to int, returning (ok, value); plain ints skip the conversion attempt"""
+    if type(value) is int:
+        return True, value
+    try:
+        return True, int(value)
+    except (ValueError, TypeError):
+        return False, 0
+
+
+def _days_since(last_updated: Any, reference: datetime) -> int:
+    """Whole days from last_updated to reference; naive timestamps on either side are taken as UTC"""
+    if isinstance(last_updated, str):
+        # The C parser in Python 3.11+ accepts a trailing 'Z' directly
+        update_time = datetime.fromisoformat(last_updated)
+    else:
+        update_time = last_updated
+    if not isinstance(update_time, datetime):
+        # Plain dates and other values are reported as invalid formats, not compared
+        raise TypeError(f"Expected a datetime, got {type(update_time).__name__}")
     
-    @property
-    def issue_count_by_type(self) -> Dict[str, int]:
-        """Count issues by type"""
-        counts = {issue_type.value: 0 for issue_type in IssueType}
-        for issue in self.issues:
-            counts[issue.issue_type.value] += 1
-        return counts
+    # Compare like with like
+    if update_time.tzinfo is None:
+        if reference.tzinfo is not None:
+            update_time = update_time.replace(tzinfo=timezone.utc)
+    elif reference.tzinfo is None:
+        update_time = update_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return (reference - update_time).days
 
 
 class DataQualityValidator:
@@ -79,6 +186,10 @@ class DataQualityValidator:
         self.required_fields = ['source', 'source_id', 'address', 'price']
         self.optional_fields = ['bedrooms', 'bathrooms', 'property_type', 'description']
         
+        # Frozen copies for the per-row required-field pass
+        self._required_fields_tuple = tuple(self.required_fields)
+        self._required_getter = operator.itemgetter(*self._required_fields_tuple)
+        
         # Price validation ranges (in GBP)
         self.min_reasonable_price = 10000
         self.max_reasonable_price = 50000000
@@ -86,302 +197,533 @@ class DataQualityValidator:
         # Coordinate validation ranges for UK
         self.uk_lat_range = (49.0, 61.0)
         self.uk_lon_range = (-8.0, 2.0)
+        
+        # Issues per validated property, LRU-bounded; clear it after changing thresholds
+        self._validation_cache: "OrderedDict[tuple, Tuple[DataQualityIssue, ...]]" = OrderedDict()
+        
+        # Conflict-resolution scores by (source, source_id), kept only between begin_batch and end_batch
+        self._resolve_cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._resolve_batch_active = False
     
-    def validate_property(self, property_data: Dict[str, Any]) -> List[DataQualityIssue]:
-        """Validate a single property and return list of issues"""
-        issues = []
-        property_id = property_data.get('source_id', 'unknown')
+    def __getstate__(self):
+        # Worker processes start with empty caches rather than pickled copies
+        state = self.__dict__.copy()
+        state['_validation_cache'] = OrderedDict()
+        state['_resolve_cache'] = OrderedDict()
+        return state
+    
+    def clear_cache(self) -> None:
+        """Forget cached validation results"""
+        self._validation_cache.clear()
+        self._resolve_cache.clear()
+    
+    def begin_batch(self) -> None:
+        """Start reusing resolve_conflicts scores for properties seen again within this batch"""
+        self._resolve_cache.clear()
+        self._resolve_batch_active = True
+    
+    def end_batch(self) -> None:
+        """Stop reusing resolve_conflicts scores and drop the ones collected"""
+        self._resolve_cache.clear()
+        self._resolve_batch_active = False
+    
+    def validate_property(self, property_data: Dict[str, Any],
+                          now: Optional[datetime] = None,
+                          fail_fast: bool = False) -> List[DataQualityIssue]:
+        """
+        Validate a single property and return list of issues
+        With fail_fast, stops after missing required fields since the property is invalid anyway
+        """
+        now = now or datetime.now(timezone.utc)
+        get = property_data.get
+        cache = self._validation_cache
+        
+        try:
+            # Freshness depends on the listing's age in whole days, so results are reused only
+            # while that age is unchanged; unparseable dates are keyed by their raw value alone
+            age = _days_since(get('last_updated'), now) if get('last_updated') else None
+        except (ValueError, TypeError):
+            age = None
+        key = (age,) + tuple(get(name) for name in VALIDATION_CACHE_FIELDS)
+        
+        try:
+            cached = cache.get(key)
+        except TypeError:
+            # Unhashable field values (e.g. a list price) are validated without caching
+            return self._run_validators(property_data, now, fail_fast)
+        
+        if cached is not None:
+            cache.move_to_end(key)
+            return [replace(issue, detected_at=now) for issue in cached]
+        
+        issues = self._run_validators(property_data, now, fail_fast)
+        if fail_fast:
+            # A short-circuited result may be partial, so keep it out of the cache
+            return issues
+        cache[key] = tuple(issues)
+        if len(cache) > VALIDATION_CACHE_SIZE:
+            cache.popitem(last=False)
+        return issues
+    
+    def _run_validators(self, property_data: Dict[str, Any], now: datetime,
+                        fail_fast: bool = False) -> List[DataQualityIssue]:
+        """Run the field validators over one property"""
+        get = property_data.get
+        property_id = get('source_id', 'unknown')
         
         # Check required fields
-        issues.extend(self._validate_required_fields(property_data, property_id))
+        issues = self._validate_required_fields(property_data, property_id, now)
+        if fail_fast and issues:
+            # Missing required fields are CRITICAL, which already decides the verdict
+            return issues
         
-        # Validate specific fields
-        issues.extend(self._validate_price(property_data, property_id))
-        issues.extend(self._validate_coordinates(property_data, property_id))
-        issues.extend(self._validate_address(property_data, property_id))
-        issues.extend(self._validate_property_characteristics(property_data, property_id))
-        issues.extend(self._validate_data_freshness(property_data, property_id))
+        # Validate specific fields, dispatching only to validators with something to check;
+        # the numeric validators only run when the fast range check fails
+        numeric_clean = self._numeric_fields_clean(property_data)
+        # Validators append straight into this property's issue list rather than returning their own
+        if not numeric_clean:
+            self._validate_price(property_data, property_id, now, issues)
+            self._validate_coordinates(property_data, property_id, now, issues)
+        if get('address'):
+            self._validate_address(property_data, property_id, now, issues)
+        if not numeric_clean:
+            self._validate_property_characteristics(property_data, property_id, now, issues)
+        if get('last_updated'):
+            self._validate_data_freshness(property_data, property_id, now, issues)
         
         return issues
     
     def validate_batch(self, properties: List[Dict[str, Any]]) -> ValidationReport:
         """Validate a batch of properties and return comprehensive report"""
+        # Measure freshness against one clock reading for the whole batch
+        all_issues, valid_count = self._validate_properties(properties, datetime.now(timezone.utc))
+        return self._build_report(properties, all_issues, valid_count)
+    
+    def iter_validate(self, properties: Iterable[Dict[str, Any]],
+                      now: Optional[datetime] = None) -> Iterator[Tuple[str, List[DataQualityIssue]]]:
+        """Yield (property_id, issues) per property without holding the batch's issues"""
+        now = now or datetime.now(timezone.utc)
+        validate_property = self.validate_property
+        for prop in properties:
+            yield prop.get('source_id', 'unknown'), validate_property(prop, now)
+    
+    def validate_batch_streaming(self, properties: Iterable[Dict[str, Any]],
+                                 sink: BinaryIO) -> Dict[str, Any]:
+        """
+        Validate properties, writing each property's issues to sink as a JSON line
+        Only running counts are kept, so memory does not grow with the number of issues
+        """
+        severity_counts = Counter()
+        type_counts = Counter()
+        total_penalty = 0.0
+        total_count = 0
+        valid_count = 0
+        weights = SEVERITY_WEIGHTS
+        write = sink.write
+        
+        for property_id, prop_issues in self.iter_validate(properties):
+            total_count += 1
+            blocked = False
+            for issue in prop_issues:
+                severity_counts[issue.severity] += 1
+                type_counts[issue.issue_type] += 1
+                total_penalty += weights[issue.severity]
+                if issue.severity in BLOCKING_SEVERITIES:
+                    blocked = True
+            if not blocked:
+                valid_count += 1
+            if prop_issues:
+                write(orjson.dumps({'property_id': property_id, 'issues': prop_issues}))
+                write(b'\n')
+        
+        if total_count:
+            overall_score = max(0.0, min(1.0, 1.0 - total_penalty / (total_count * MAX_PROPERTY_PENALTY)))
+        else:
+            overall_score = 1.0
+        
+        return {
+            'total_properties': total_count,
+            'valid_properties': valid_count,
+            'issue_count_by_severity': {severity.value: severity_counts[severity] for severity in IssueSeverity},
+            'issue_count_by_type': {issue_type.value: type_counts[issue_type] for issue_type in IssueType},
+            'overall_score': overall_score,
+            'validation_time': datetime.now(timezone.utc)
+        }
+    
+    def count_valid(self, properties: List[Dict[str, Any]]) -> int:
+        """Count valid properties without collecting issues or building a report"""
+        now = datetime.now(timezone.utc)
+        validate_property = self.validate_property
+        valid_count = 0
+        
+        for prop in properties:
+            prop_issues = validate_property(prop, now, fail_fast=True)
+            if not any(issue.severity in BLOCKING_SEVERITIES for issue in prop_issues):
+                valid_count += 1
+        
+        return valid_count
+    
+    def validate_batch_parallel(self, properties: List[Dict[str, Any]],
+                                workers: Optional[int] = None) -> ValidationReport:
+        """
+        Validate a large batch across worker processes and return a combined report
+        Small batches are validated in-process since pickling would outweigh the gain
+        """
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(properties) // PARALLEL_CHUNK_SIZE)
+        if workers <= 1:
+            return self.validate_batch(properties)
+        
+        # Contiguous chunks keep issues in input order once merged
+        now = datetime.now(timezone.utc)
+        chunk_size = -(-len(properties) // workers)
+        chunks = [properties[i:i + chunk_size] for i in range(0, len(properties), chunk_size)]
+        
         all_issues = []
         valid_count = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_issues, chunk_valid in executor.map(
+                _validate_chunk, [self] * len(chunks), chunks, [now] * len(chunks)
+            ):
+                all_issues.extend(chunk_issues)
+                valid_count += chunk_valid
+        
+        return self._build_report(properties, all_issues, valid_count)
+    
+    def _validate_properties(self, properties: List[Dict[str, Any]],
+                             now: datetime) -> Tuple[List[DataQualityIssue], int]:
+        """Validate properties, returning all issues and the number of valid properties"""
+        all_issues = []
+        valid_count = 0
+        validate_property = self.validate_property
         
         for prop in properties:
-            prop_issues = self.validate_property(prop)
+            prop_issues = validate_property(prop, now)
+            if not prop_issues:
+                valid_count += 1
+                continue
             all_issues.extend(prop_issues)
             
             # Consider property valid if it has no critical or high severity issues
-            has_critical_issues = any(
-                issue.severity in [IssueSeverity.CRITICAL, IssueSeverity.HIGH] 
-                for issue in prop_issues
-            )
-            if not has_critical_issues:
+            if not any(issue.severity in BLOCKING_SEVERITIES for issue in prop_issues):
                 valid_count += 1
         
+        return all_issues, valid_count
+    
+    def _build_report(self, properties: List[Dict[str, Any]], issues: List[DataQualityIssue],
+                      valid_count: int) -> ValidationReport:
+        """Assemble a validation report for a validated batch"""
         # Calculate overall quality score
-        overall_score = self._calculate_quality_score(properties, all_issues)
+        overall_score = self._calculate_quality_score(properties, issues)
         
         return ValidationReport(
             total_properties=len(properties),
             valid_properties=valid_count,
-            issues=all_issues,
+            issues=issues,
             overall_score=overall_score,
-            validation_time=datetime.now()
+            validation_time=datetime.now(timezone.utc)
         )
     
+    def _numeric_fields_clean(self, property_data: Dict[str, Any]) -> bool:
+        """
+        Cheap check that price, coordinates and room counts are already in range
+        Only plain numbers qualify; anything else goes through the full validators
+        """
+        price = property_data.get('price')
+        if price is not None and not (
+            type(price) in _NUMBER_TYPES
+            and self.min_reasonable_price <= price <= self.max_reasonable_price
+        ):
+            return False
+        
+        lat = property_data.get('latitude')
+        lon = property_data.get('longitude')
+        if lat is not None and lon is not None and not (
+            type(lat) in _NUMBER_TYPES and type(lon) in _NUMBER_TYPES
+            and self.uk_lat_range[0] <= lat <= self.uk_lat_range[1]
+            and self.uk_lon_range[0] <= lon <= self.uk_lon_range[1]
+        ):
+            return False
+        
+        bedrooms = property_data.get('bedrooms')
+        if bedrooms is not None and not (type(bedrooms) is int and 0 <= bedrooms <= 20):
+            return False
+        
+        bathrooms = property_data.get('bathrooms')
+        if bathrooms is not None and not (type(bathrooms) is int and 0 <= bathrooms <= 10):
+            return False
+        
+        return True
+    
     def _validate_required_fields(self, property_data: Dict[str, Any], 
-                                property_id: str) -> List[DataQualityIssue]:
+                                property_id: str, now: Optional[datetime] = None) -> List[DataQualityIssue]:
         """Validate that all required fields are present and non-empty"""
-        issues = []
+        fields = self._required_fields_tuple
+        try:
+            values = self._required_getter(property_data)
+            if len(fields) == 1:
+                values = (values,)
+        except KeyError:
+            get = property_data.get
+            values = [get(name) for name in fields]
         
-        for field in self.required_fields:
-            value = property_data.get(field)
+        issues = []
+        for name, value in zip(fields, values):
             if value is None or (isinstance(value, str) and not value.strip()):
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.MISSING_REQUIRED_FIELD,
-                    severity=IssueSeverity.CRITICAL,
-                    field_name=field,
-                    description=f"Required field '{field}' is missing or empty",
-                    suggested_fix=f"Provide a valid value for {field}"
+                    property_id,
+                    IssueType.MISSING_REQUIRED_FIELD,
+                    IssueSeverity.CRITICAL,
+                    name,
+                    f"Required field '{name}' is missing or empty",
+                    f"Provide a valid value for {name}",
+                    now
                 ))
         
         return issues
     
     def _validate_price(self, property_data: Dict[str, Any], 
-                       property_id: str) -> List[DataQualityIssue]:
+                       property_id: str, now: Optional[datetime] = None,
+                       issues: Optional[List[DataQualityIssue]] = None) -> List[DataQualityIssue]:
         """Validate property price"""
-        issues = []
+        issues = [] if issues is None else issues
         price = property_data.get('price')
         
         if price is not None:
-            try:
-                price_float = float(price)
-                
-                # Check if price is within reasonable range
-                if price_float < self.min_reasonable_price:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.SUSPICIOUS_VALUE,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='price',
-                        description=f"Price {price_float} seems unusually low",
-                        suggested_fix="Verify price accuracy with source"
-                    ))
-                elif price_float > self.max_reasonable_price:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.SUSPICIOUS_VALUE,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='price',
-                        description=f"Price {price_float} seems unusually high",
-                        suggested_fix="Verify price accuracy with source"
-                    ))
-                
-                # Check for obviously wrong prices (like 0 or negative)
-                if price_float <= 0:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.INVALID_FORMAT,
-                        severity=IssueSeverity.HIGH,
-                        field_name='price',
-                        description=f"Invalid price value: {price_float}",
-                        suggested_fix="Provide a positive price value"
-                    ))
-                    
-            except (ValueError, TypeError):
+            ok, price_float = _to_float(price)
+            if not ok:
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.INVALID_FORMAT,
-                    severity=IssueSeverity.HIGH,
-                    field_name='price',
-                    description=f"Price '{price}' is not a valid number",
-                    suggested_fix="Provide price as a numeric value"
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.HIGH,
+                    'price',
+                    f"Price '{price}' is not a valid number",
+                    "Provide price as a numeric value",
+                    now
+                ))
+                return issues
+            
+            # Check if price is within reasonable range
+            if price_float < self.min_reasonable_price:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.MEDIUM,
+                    'price',
+                    f"Price {price_float} seems unusually low",
+                    "Verify price accuracy with source",
+                    now
+                ))
+            elif price_float > self.max_reasonable_price:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.MEDIUM,
+                    'price',
+                    f"Price {price_float} seems unusually high",
+                    "Verify price accuracy with source",
+                    now
+                ))
+            
+            # Check for obviously wrong prices (like 0 or negative)
+            if price_float <= 0:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.HIGH,
+                    'price',
+                    f"Invalid price value: {price_float}",
+                    "Provide a positive price value",
+                    now
                 ))
         
         return issues
     
     def _validate_coordinates(self, property_data: Dict[str, Any], 
-                            property_id: str) -> List[DataQualityIssue]:
+                            property_id: str, now: Optional[datetime] = None,
+                            issues: Optional[List[DataQualityIssue]] = None) -> List[DataQualityIssue]:
         """Validate latitude and longitude coordinates"""
-        issues = []
+        issues = [] if issues is None else issues
         lat = property_data.get('latitude')
         lon = property_data.get('longitude')
         
         if lat is not None and lon is not None:
-            try:
-                lat_float = float(lat)
-                lon_float = float(lon)
-                
-                # Check if coordinates are within UK bounds
-                if not (self.uk_lat_range[0] <= lat_float <= self.uk_lat_range[1]):
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.GEOCODING_FAILED,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='latitude',
-                        description=f"Latitude {lat_float} is outside UK bounds",
-                        suggested_fix="Verify property location and geocoding"
-                    ))
-                
-                if not (self.uk_lon_range[0] <= lon_float <= self.uk_lon_range[1]):
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.GEOCODING_FAILED,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='longitude',
-                        description=f"Longitude {lon_float} is outside UK bounds",
-                        suggested_fix="Verify property location and geocoding"
-                    ))
-                
-                # Check for obviously invalid coordinates (0,0)
-                if lat_float == 0.0 and lon_float == 0.0:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.GEOCODING_FAILED,
-                        severity=IssueSeverity.HIGH,
-                        field_name='coordinates',
-                        description="Coordinates are (0,0) which indicates geocoding failure",
-                        suggested_fix="Re-geocode the property address"
-                    ))
-                    
-            except (ValueError, TypeError):
+            lat_ok, lat_float = _to_float(lat)
+            lon_ok, lon_float = _to_float(lon)
+            if not (lat_ok and lon_ok):
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.INVALID_FORMAT,
-                    severity=IssueSeverity.HIGH,
-                    field_name='coordinates',
-                    description=f"Invalid coordinate format: lat={lat}, lon={lon}",
-                    suggested_fix="Provide coordinates as numeric values"
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.HIGH,
+                    'coordinates',
+                    f"Invalid coordinate format: lat={lat}, lon={lon}",
+                    "Provide coordinates as numeric values",
+                    now
+                ))
+                return issues
+            
+            # Check if coordinates are within UK bounds
+            if not (self.uk_lat_range[0] <= lat_float <= self.uk_lat_range[1]):
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.GEOCODING_FAILED,
+                    IssueSeverity.MEDIUM,
+                    'latitude',
+                    f"Latitude {lat_float} is outside UK bounds",
+                    "Verify property location and geocoding",
+                    now
+                ))
+            
+            if not (self.uk_lon_range[0] <= lon_float <= self.uk_lon_range[1]):
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.GEOCODING_FAILED,
+                    IssueSeverity.MEDIUM,
+                    'longitude',
+                    f"Longitude {lon_float} is outside UK bounds",
+                    "Verify property location and geocoding",
+                    now
+                ))
+            
+            # Check for obviously invalid coordinates (0,0)
+            if lat_float == 0.0 and lon_float == 0.0:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.GEOCODING_FAILED,
+                    IssueSeverity.HIGH,
+                    'coordinates',
+                    "Coordinates are (0,0) which indicates geocoding failure",
+                    "Re-geocode the property address",
+                    now
                 ))
         
         return issues
     
     def _validate_address(self, property_data: Dict[str, Any], 
-                         property_id: str) -> List[DataQualityIssue]:
+                         property_id: str, now: Optional[datetime] = None,
+                         issues: Optional[List[DataQualityIssue]] = None) -> List[DataQualityIssue]:
         """Validate property address"""
-        issues = []
+        issues = [] if issues is None else issues
         address = property_data.get('address', '')
         
         if address:
             # Check address length
             if len(address.strip()) < 10:
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.SUSPICIOUS_VALUE,
-                    severity=IssueSeverity.LOW,
-                    field_name='address',
-                    description="Address seems too short",
-                    suggested_fix="Verify address completeness"
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.LOW,
+                    'address',
+                    "Address seems too short",
+                    "Verify address completeness",
+                    now
                 ))
             
             # Check for UK postcode pattern
-            uk_postcode_pattern = r'[A-Z]{1,2}[0-9R][0-9A-Z]? [0-9][ABD-HJLNP-UW-Z]{2}'
-            if not re.search(uk_postcode_pattern, address.upper()):
+            if not _contains_postcode(address):
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.SUSPICIOUS_VALUE,
-                    severity=IssueSeverity.LOW,
-                    field_name='address',
-                    description="Address doesn't contain a valid UK postcode",
-                    suggested_fix="Verify postcode format"
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.LOW,
+                    'address',
+                    "Address doesn't contain a valid UK postcode",
+                    "Verify postcode format",
+                    now
                 ))
         
         return issues
     
     def _validate_property_characteristics(self, property_data: Dict[str, Any], 
-                                         property_id: str) -> List[DataQualityIssue]:
+                                         property_id: str, now: Optional[datetime] = None,
+                                         issues: Optional[List[DataQualityIssue]] = None) -> List[DataQualityIssue]:
         """Validate property characteristics like bedrooms, bathrooms"""
-        issues = []
+        issues = [] if issues is None else issues
         
         # Validate bedrooms
         bedrooms = property_data.get('bedrooms')
         if bedrooms is not None:
-            try:
-                bedrooms_int = int(bedrooms)
-                if bedrooms_int < 0 or bedrooms_int > 20:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.SUSPICIOUS_VALUE,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='bedrooms',
-                        description=f"Unusual number of bedrooms: {bedrooms_int}",
-                        suggested_fix="Verify bedroom count"
-                    ))
-            except (ValueError, TypeError):
+            ok, bedrooms_int = _to_int(bedrooms)
+            if not ok:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.MEDIUM,
+                    'bedrooms',
+                    f"Invalid bedrooms value: {bedrooms}",
+                    "Provide bedrooms as an integer",
+                    now
+                ))
+            elif bedrooms_int < 0 or bedrooms_int > 20:
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.INVALID_FORMAT,
-                    severity=IssueSeverity.MEDIUM,
-                    field_name='bedrooms',
-                    description=f"Invalid bedrooms value: {bedrooms}",
-                    suggested_fix="Provide bedrooms as an integer"
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.MEDIUM,
+                    'bedrooms',
+                    _room_count_description('bedrooms', bedrooms_int),
+                    "Verify bedroom count",
+                    now
                 ))
         
         # Validate bathrooms
         bathrooms = property_data.get('bathrooms')
         if bathrooms is not None:
-            try:
-                bathrooms_int = int(bathrooms)
-                if bathrooms_int < 0 or bathrooms_int > 10:
-                    issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.SUSPICIOUS_VALUE,
-                        severity=IssueSeverity.MEDIUM,
-                        field_name='bathrooms',
-                        description=f"Unusual number of bathrooms: {bathrooms_int}",
-                        suggested_fix="Verify bathroom count"
-                    ))
-            except (ValueError, TypeError):
+            ok, bathrooms_int = _to_int(bathrooms)
+            if not ok:
+                issues.append(DataQualityIssue(
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.MEDIUM,
+                    'bathrooms',
+                    f"Invalid bathrooms value: {bathrooms}",
+                    "Provide bathrooms as an integer",
+                    now
+                ))
+            elif bathrooms_int < 0 or bathrooms_int > 10:
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.INVALID_FORMAT,
-                    severity=IssueSeverity.MEDIUM,
-                    field_name='bathrooms',
-                    description=f"Invalid bathrooms value: {bathrooms}",
-                    suggested_fix="Provide bathrooms as an integer"
+                    property_id,
+                    IssueType.SUSPICIOUS_VALUE,
+                    IssueSeverity.MEDIUM,
+                    'bathrooms',
+                    _room_count_description('bathrooms', bathrooms_int),
+                    "Verify bathroom count",
+                    now
                 ))
         
         return issues
     
     def _validate_data_freshness(self, property_data: Dict[str, Any], 
-                               property_id: str) -> List[DataQualityIssue]:
+                               property_id: str, now: Optional[datetime] = None,
+                               issues: Optional[List[DataQualityIssue]] = None) -> List[DataQualityIssue]:
         """Validate data freshness"""
-        issues = []
+        issues = [] if issues is None else issues
         last_updated = property_data.get('last_updated')
         
         if last_updated:
             try:
-                if isinstance(last_updated, str):
-                    update_time = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                else:
-                    update_time = last_updated
-                
                 # Check if data is older than 7 days
-                days_old = (datetime.now() - update_time.replace(tzinfo=None)).days
+                days_old = _days_since(last_updated, now or datetime.now(timezone.utc))
                 
                 if days_old > 7:
                     severity = IssueSeverity.LOW if days_old <= 30 else IssueSeverity.MEDIUM
                     issues.append(DataQualityIssue(
-                        property_id=property_id,
-                        issue_type=IssueType.STALE_DATA,
-                        severity=severity,
-                        field_name='last_updated',
-                        description=f"Data is {days_old} days old",
-                        suggested_fix="Refresh property data from source"
+                        property_id,
+                        IssueType.STALE_DATA,
+                        severity,
+                        'last_updated',
+                        _stale_description(days_old),
+                        "Refresh property data from source",
+                        now
                     ))
                     
             except (ValueError, TypeError) as e:
                 issues.append(DataQualityIssue(
-                    property_id=property_id,
-                    issue_type=IssueType.INVALID_FORMAT,
-                    severity=IssueSeverity.LOW,
-                    field_name='last_updated',
-                    description=f"Invalid date format: {last_updated}",
-                    suggested_fix="Use ISO format for dates"
+                    property_id,
+                    IssueType.INVALID_FORMAT,
+                    IssueSeverity.LOW,
+                    'last_updated',
+                    f"Invalid date format: {last_updated}",
+                    "Use ISO format for dates",
+                    now
                 ))
         
         return issues
@@ -393,18 +735,9 @@ class DataQualityValidator:
             return 1.0
         
         # Weight issues by severity
-        severity_weights = {
-            IssueSeverity.LOW: 0.1,
-            IssueSeverity.MEDIUM: 0.3,
-            IssueSeverity.HIGH: 0.7,
-            IssueSeverity.CRITICAL: 1.0
-        }
-        
-        total_penalty = sum(severity_weights[issue.severity] for issue in issues)
-        max_possible_penalty = len(properties) * sum(severity_weights.values())
-        
-        if max_possible_penalty == 0:
-            return 1.0
+        weights = SEVERITY_WEIGHTS
+        total_penalty = sum(weights[issue.severity] for issue in issues) if issues else 0.0
+        max_possible_penalty = len(properties) * MAX_PROPERTY_PENALTY
         
         score = 1.0 - (total_penalty / max_possible_penalty)
         return max(0.0, min(1.0, score))
@@ -420,8 +753,7 @@ class DataQualityValidator:
         # Score each property based on data quality
         scored_properties = []
         for prop in conflicting_properties:
-            issues = self.validate_property(prop)
-            quality_score = self._calculate_quality_score([prop], issues)
+            quality_score = self._conflict_score(prop)
             scored_properties.append((prop, quality_score))
         
         # Sort by quality score (highest first)
@@ -433,4 +765,31 @@ class DataQualityValidator:
         logger.info(f"Resolved conflict: selected property from {best_property.get('source')} "
                    f"with quality score {scored_properties[0][1]:.2f}")
         
-        return best_property
\ No newline at end of file
+        return best_property
+    
+    def _conflict_score(self, prop: Dict[str, Any]) -> float:
+        """Quality score for one property, reused within a batch when it recurs across conflicts"""
+        key = (prop.get('source'), prop.get('source_id'))
+        cacheable = self._resolve_batch_active and key[1] is not None
+        cache = self._resolve_cache
+        
+        if cacheable:
+            score = cache.get(key)
+            if score is not None:
+                cache.move_to_end(key)
+                return score
+        
+        issues = self.validate_property(prop)
+        score = self._calculate_quality_score([prop], issues)
+        
+        if cacheable:
+            cache[key] = score
+            if len(cache) > RESOLVE_CACHE_SIZE:
+                cache.popitem(last=False)
+        return score
+
+
+def _validate_chunk(validator: DataQualityValidator, properties: List[Dict[str, Any]],
+                    now: datetime) -> Tuple[List[DataQualityIssue], int]:
+    """Worker entry point for validate_batch_parallel"""
+    return validator._validate_properties(properties, now)
@@ -2,22 +2,111 @@
 Property deduplication service using fuzzy address matching and geocoding
 """
 import logging
-from typing import List, Dict, Set, Tuple, Optional
+import math
+from collections import defaultdict
+from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
-from fuzzywuzzy import fuzz
-from geopy.distance import geodesic
+from functools import lru_cache
+from rapidfuzz import fuzz
 import re
+import sys
+
+from app.modules.geospatial.distance import haversine_km
 
 logger = logging.getLogger(__name__)
 
+# Common abbreviations expanded before comparing addresses
+ADDRESS_ABBREVIATIONS = {
+    'st': 'street',
+    'rd': 'road',
+    'ave': 'avenue',
+    'dr': 'drive',
+    'ln': 'lane',
+    'pl': 'place',
+    'ct': 'court',
+    'apt': 'apartment',
+    'flat': 'apartment',
+}
+_ABBREVIATION_RE = re.compile(r'\b(' + '|'.join(ADDRESS_ABBREVIATIONS) + r')\b')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Weights of the similarity components and the combined score a duplicate must exceed
+ADDRESS_WEIGHT = 0.4
+COORDINATE_WEIGHT = 0.3
+PRICE_WEIGHT = 0.2
+CHARACTERISTICS_WEIGHT = 0.1
+MATCH_THRESHOLD = 0.7
+
+# Beyond this distance coordinates contribute nothing to the similarity score
+COORDINATE_MATCH_RADIUS_KM = 1.0
+
+# Shortest length of a degree of latitude, rounded down so grid cells err on the wide side
+MIN_KM_PER_DEGREE = 110.0
+
+# Fields and source preferences used to pick the best listing from a duplicate group
+QUALITY_REQUIRED_FIELDS = ('price', 'address', 'bedrooms', 'property_type')
+QUALITY_OPTIONAL_FIELDS = ('description', 'bathrooms', 'image_urls', 'floor_area')
+SOURCE_QUALITY_SCORES = {'rightmove': 0.6, 'zoopla': 0.5}
+
+
+@lru_cache(maxsize=4096)
+def normalize_address(address: str) -> str:
+    """Lowercase an address, expand abbreviations and collapse punctuation and whitespace"""
+    normalized = _ABBREVIATION_RE.sub(lambda match: ADDRESS_ABBREVIATIONS[match.group(1)], address.lower())
+    normalized = _PUNCTUATION_RE.sub(' ', normalized)
+    return _WHITESPACE_RE.sub(' ', normalized).strip()
+
+
+def _extract_coordinates(prop: Dict) -> Optional[Tuple[float, float]]:
+    """Latitude and longitude as floats, or None when missing or unusable for distances"""
+    lat, lon = prop.get('latitude'), prop.get('longitude')
+    if not lat or not lon:
+        return None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Invalid coordinates for {prop.get('source_id')}: {e}")
+        return None
+    if not (-90.0 <= lat <= 90.0 and math.isfinite(lon)):
+        logger.warning(f"Coordinates out of range for {prop.get('source_id')}: {lat}, {lon}")
+        return None
+    return lat, lon
+
+
+def _extract_price(prop: Dict) -> Optional[float]:
+    """Price as a float, or None when missing or not numeric"""
+    price = prop.get('price')
+    if not price:
+        return None
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None
+
+
+def _extract_characteristics(prop: Dict) -> Tuple:
+    """(bedrooms, bathrooms, lowercased interned property_type), with None for missing values"""
+    property_type = prop.get('property_type')
+    return (
+        prop.get('bedrooms') or None,
+        prop.get('bathrooms') or None,
+        sys.intern(property_type.lower()) if property_type else None,
+    )
+
 
-@dataclass
+def _weighted_positive(scored: Tuple[Tuple[float, float], ...]) -> float:
+    """Sum score * weight over the components that contribute (score above zero)"""
+    return sum(score * weight for score, weight in scored if score > 0)
+
+
+@dataclass(slots=True, frozen=True)
 class PropertyMatch:
     """Represents a potential duplicate property match"""
     property1_id: str
     property2_id: str
     similarity_score: float
-    match_reasons: List[str]
+    match_reasons: Tuple[str, ...]
     confidence: str  # 'high', 'medium', 'low'
 
 
@@ -35,20 +124,88 @@ class PropertyDeduplicator:
     def find_duplicates(self, properties: List[Dict]) -> List[PropertyMatch]:
         """Find potential duplicate properties in a list"""
         matches = []
-        
-        for i, prop1 in enumerate(properties):
-            for j, prop2 in enumerate(properties[i+1:], i+1):
-                match = self._compare_properties(prop1, prop2)
-                if match:
-                    matches.append(match)
+        # Normalize addresses and convert coordinates and prices once per property rather than
+        # once per comparison it takes part in; each pair then only does the arithmetic
+        normalized = [self._normalize_address(prop.get('address', '')) for prop in properties]
+        coordinates = [_extract_coordinates(prop) for prop in properties]
+        prices = [_extract_price(prop) for prop in properties]
+        characteristics = [_extract_characteristics(prop) for prop in properties]
+        
+        for i, j in self._candidate_pairs(properties, coordinates, prices):
+            match = self._compare_properties(
+                properties[i], properties[j], (normalized[i], normalized[j]),
+                ((coordinates[i], prices[i], characteristics[i]),
+                 (coordinates[j], prices[j], characteristics[j]))
+            )
+            if match:
+                matches.append(match)
         
         return matches
     
+    def _candidate_pairs(self, properties: List[Dict],
+                         coordinates: Optional[List[Optional[Tuple[float, float]]]] = None,
+                         prices: Optional[List[Optional[float]]] = None) -> List[Tuple[int, int]]:
+        """
+        Index pairs (i < j, in scan order) that could possibly score as a match
+        Without a coordinate score the other components top out at the 0.7 match threshold,
+        which only identical prices reach, so a pair must either lie within
+        COORDINATE_MATCH_RADIUS_KM of each other or share a price
+        coordinates and prices let batch callers pass values they have already extracted
+        """
+        if coordinates is None:
+            coordinates = [_extract_coordinates(prop) for prop in properties]
+        if prices is None:
+            prices = [_extract_price(prop) for prop in properties]
+        
+        # Grid cells at least the match radius wide, so neighbours sit in adjacent cells
+        located = [(index, *coords) for index, coords in enumerate(coordinates) if coords is not None]
+        
+        cell_lat = COORDINATE_MATCH_RADIUS_KM / MIN_KM_PER_DEGREE
+        max_abs_lat = max((abs(lat) for _, lat, _ in located), default=0.0)
+        cell_lon = cell_lat / max(math.cos(math.radians(min(max_abs_lat, 89.0))), 0.01)
+        
+        cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        cell_of = {}
+        for index, lat, lon in located:
+            cell = (math.floor(lat / cell_lat), math.floor(lon / cell_lon))
+            cells[cell].append(index)
+            cell_of[index] = cell
+        
+        # Identical prices can still match on address and characteristics alone. This is the
+        # blocking key for properties without coordinates: it loses no matches, whereas an
+        # address-token key would miss pairs where one address is a substring of the other
+        price_buckets: Dict[float, List[int]] = defaultdict(list)
+        price_of = {}
+        for index, price in enumerate(prices):
+            if price is not None:
+                price_of[index] = price
+                price_buckets[price].append(index)
+        
+        pairs = []
+        for i in range(len(properties)):
+            candidates = set()
+            cell = cell_of.get(i)
+            if cell is not None:
+                row, col = cell
+                for d_row in (-1, 0, 1):
+                    for d_col in (-1, 0, 1):
+                        candidates.update(cells.get((row + d_row, col + d_col), ()))
+            if i in price_of:
+                candidates.update(price_buckets[price_of[i]])
+            pairs.extend((i, j) for j in sorted(candidates) if j > i)
+        
+        return pairs
+    
     def deduplicate_properties(self, properties: List[Dict]) -> List[Dict]:
         """Remove duplicates from property list, keeping the best version"""
         if len(properties) <= 1:
             return properties
         
+        # The same listing seen twice (e.g. on overlapping result pages) is collapsed up front,
+        # so the fuzzy matching only runs over distinct listings
+        original_count = len(properties)
+        properties = self._drop_exact_repeats(properties)
+        
         # Find all potential matches
         matches = self.find_duplicates(properties)
         
@@ -70,143 +227,165 @@ class PropertyDeduplicator:
             if prop['source_id'] not in processed_ids:
                 deduplicated.append(prop)
         
-        logger.info(f"Deduplicated {len(properties)} properties to {len(deduplicated)}")
+        logger.info(f"Deduplicated {original_count} properties to {len(deduplicated)}")
         return deduplicated
     
-    def _compare_properties(self, prop1: Dict, prop2: Dict) -> Optional[PropertyMatch]:
-        """Compare two properties and return match if they're likely duplicates"""
-        similarity_score = 0.0
-        match_reasons = []
-        
+    def _drop_exact_repeats(self, properties: List[Dict]) -> List[Dict]:
+        """Keep the first of each (source, source_id); listings without a source_id are all kept"""
+        seen = set()
+        unique = []
+        for prop in properties:
+            source_id = prop.get('source_id')
+            if source_id:
+                key = (prop.get('source'), source_id)
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique.append(prop)
+        return unique
+    
+    def _compare_properties(self, prop1: Dict, prop2: Dict,
+                            normalized_addresses: Optional[Tuple[str, str]] = None,
+                            features: Optional[Tuple[Tuple, Tuple]] = None) -> Optional[PropertyMatch]:
+        """
+        Compare two properties and return match if they're likely duplicates
+        normalized_addresses and features ((coordinates, price, characteristics) for each
+        property) let batch callers pass values they have already extracted
+        """
         # Don't compare properties from the same source with same ID
         if (prop1.get('source') == prop2.get('source') and 
             prop1.get('source_id') == prop2.get('source_id')):
             return None
         
+        # Cheap components first, cheapest to dearest, so later ones are skipped for pairs that
+        # could not reach the match threshold even if every remaining component scored 1.0
+        if features is None:
+            features = tuple(
+                (_extract_coordinates(prop), _extract_price(prop), _extract_characteristics(prop))
+                for prop in (prop1, prop2)
+            )
+        (coords1, price1, chars1), (coords2, price2, chars2) = features
+        coord_score = self._coordinate_score(coords1, coords2)
+        price_score = self._price_score(price1, price2)
+        known = _weighted_positive(((coord_score, COORDINATE_WEIGHT), (price_score, PRICE_WEIGHT)))
+        if known + ADDRESS_WEIGHT + CHARACTERISTICS_WEIGHT < MATCH_THRESHOLD - 1e-9:
+            return None
+        
+        char_score = self._characteristics_score(chars1, chars2)
+        known += _weighted_positive(((char_score, CHARACTERISTICS_WEIGHT),))
+        if known + ADDRESS_WEIGHT < MATCH_THRESHOLD - 1e-9:
+            return None
+        
         # Address similarity
         address_score = self._calculate_address_similarity(
             prop1.get('address', ''), 
-            prop2.get('address', '')
+            prop2.get('address', ''),
+            normalized_addresses,
+            score_cutoff=self.address_similarity_threshold
         )
-        if address_score > self.address_similarity_threshold:
-            similarity_score += address_score * 0.4
-            match_reasons.append(f"Similar address ({address_score:.2f})")
-        
-        # Coordinate proximity
-        coord_score = self._calculate_coordinate_similarity(prop1, prop2)
-        if coord_score > 0:
-            similarity_score += coord_score * 0.3
-            match_reasons.append(f"Close coordinates ({coord_score:.2f})")
-        
-        # Price similarity
-        price_score = self._calculate_price_similarity(prop1, prop2)
-        if price_score > 0:
-            similarity_score += price_score * 0.2
-            match_reasons.append(f"Similar price ({price_score:.2f})")
-        
-        # Property characteristics similarity
-        char_score = self._calculate_characteristics_similarity(prop1, prop2)
-        if char_score > 0:
-            similarity_score += char_score * 0.1
-            match_reasons.append(f"Similar characteristics ({char_score:.2f})")
-        
-        # Determine if this is a match
-        if similarity_score > 0.7:
+        if address_score <= self.address_similarity_threshold:
+            address_score = 0.0
+        
+        # Address, coordinate proximity, price and characteristics, in a fixed summation order
+        components = (
+            ('Similar address', address_score, ADDRESS_WEIGHT),
+            ('Close coordinates', coord_score, COORDINATE_WEIGHT),
+            ('Similar price', price_score, PRICE_WEIGHT),
+            ('Similar characteristics', char_score, CHARACTERISTICS_WEIGHT),
+        )
+        similarity_score = 0.0
+        for _, score, weight in components:
+            if score > 0:
+                similarity_score += score * weight
+        
+        # Determine if this is a match; reasons are only formatted for pairs that are
+        if similarity_score > MATCH_THRESHOLD:
             confidence = 'high' if similarity_score > 0.9 else 'medium'
             return PropertyMatch(
                 property1_id=prop1.get('source_id', ''),
                 property2_id=prop2.get('source_id', ''),
                 similarity_score=similarity_score,
-                match_reasons=match_reasons,
+                match_reasons=tuple(f"{label} ({score:.2f})" for label, score, _ in components if score > 0),
                 confidence=confidence
             )
         
         return None
     
-    def _calculate_address_similarity(self, address1: str, address2: str) -> float:
-        """Calculate similarity between two addresses"""
+    def _calculate_address_similarity(self, address1: str, address2: str,
+                                      normalized: Optional[Tuple[str, str]] = None,
+                                      score_cutoff: float = 0.0) -> float:
+        """
+        Calculate similarity between two addresses
+        Scores below score_cutoff (0.0-1.0) may be reported as 0.0, letting the scorers stop early
+        """
         if not address1 or not address2:
             return 0.0
         
         # Normalize addresses
-        addr1_norm = self._normalize_address(address1)
-        addr2_norm = self._normalize_address(address2)
-        
-        # Use multiple fuzzy matching algorithms
-        ratio = fuzz.ratio(addr1_norm, addr2_norm) / 100.0
-        partial_ratio = fuzz.partial_ratio(addr1_norm, addr2_norm) / 100.0
-        token_sort_ratio = fuzz.token_sort_ratio(addr1_norm, addr2_norm) / 100.0
+        if normalized is None:
+            normalized = (self._normalize_address(address1), self._normalize_address(address2))
+        addr1_norm, addr2_norm = normalized
+        
+        # Use multiple fuzzy matching algorithms, cheapest first; each only needs to beat the
+        # best score so far, which lets rapidfuzz abandon hopeless alignments early
+        best = 0.0
+        for scorer in (fuzz.ratio, fuzz.token_sort_ratio, fuzz.partial_ratio):
+            best = max(best, scorer(addr1_norm, addr2_norm, score_cutoff=max(score_cutoff * 100.0, best)))
+            if best >= 100.0:
+                break
         
         # Return the best score
-        return max(ratio, partial_ratio, token_sort_ratio)
+        return best / 100.0
     
     def _normalize_address(self, address: str) -> str:
         """Normalize address for comparison"""
         if not address:
             return ""
-        
-        # Convert to lowercase
-        normalized = address.lower()
-        
-        # Remove common abbreviations and standardize
-        replacements = {
-            r'\bst\b': 'street',
-            r'\brd\b': 'road',
-            r'\bave\b': 'avenue',
-            r'\bdr\b': 'drive',
-            r'\bln\b': 'lane',
-            r'\bpl\b': 'place',
-            r'\bct\b': 'court',
-            r'\bapt\b': 'apartment',
-            r'\bflat\b': 'apartment',
-        }
-        
-        for pattern, replacement in replacements.items():
-            normalized = re.sub(pattern, replacement, normalized)
-        
-        # Remove extra whitespace and punctuation
-        normalized = re.sub(r'[^\w\s]', ' ', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        return normalized
+        return normalize_address(address)
     
     def _calculate_coordinate_similarity(self, prop1: Dict, prop2: Dict) -> float:
         """Calculate similarity based on coordinates"""
-        lat1, lon1 = prop1.get('latitude'), prop1.get('longitude')
-        lat2, lon2 = prop2.get('latitude'), prop2.get('longitude')
+        return self._coordinate_score(_extract_coordinates(prop1), _extract_coordinates(prop2))
+    
+    def _coordinate_score(self, coords1: Optional[Tuple[float, float]],
+                          coords2: Optional[Tuple[float, float]]) -> float:
+        """Similarity of two extracted (latitude, longitude) pairs"""
+        if coords1 is None or coords2 is None:
+            return 0.0
         
-        if not all([lat1, lon1, lat2, lon2]):
+        # A degree of latitude is never shorter than MIN_KM_PER_DEGREE along the great circle,
+        # so pairs this far apart north-south are out of range without any trigonometry
+        if abs(coords1[0] - coords2[0]) * MIN_KM_PER_DEGREE > COORDINATE_MATCH_RADIUS_KM:
             return 0.0
         
         try:
-            distance = geodesic((lat1, lon1), (lat2, lon2)).kilometers
-            
-            # Convert distance to similarity score (closer = higher score)
-            if distance <= self.coordinate_distance_threshold:
-                # Perfect match if within threshold
-                return 1.0 - (distance / self.coordinate_distance_threshold) * 0.2
-            elif distance <= 0.5:  # Within 500m
-                return 0.8 - (distance / 0.5) * 0.3
-            elif distance <= 1.0:  # Within 1km
-                return 0.5 - (distance / 1.0) * 0.3
-            else:
-                return 0.0
-                
-        except Exception as e:
+            # Haversine is well within 0.5% of the ellipsoidal distance at these ranges
+            distance = haversine_km(coords1[0], coords1[1], coords2[0], coords2[1])
+        except ValueError as e:
             logger.warning(f"Error calculating distance: {e}")
             return 0.0
+        
+        # Convert distance to similarity score (closer = higher score)
+        if distance <= self.coordinate_distance_threshold:
+            # Perfect match if within threshold
+            return 1.0 - (distance / self.coordinate_distance_threshold) * 0.2
+        elif distance <= 0.5:  # Within 500m
+            return 0.8 - (distance / 0.5) * 0.3
+        elif distance <= COORDINATE_MATCH_RADIUS_KM:  # Within 1km
+            return 0.5 - (distance / COORDINATE_MATCH_RADIUS_KM) * 0.3
+        else:
+            return 0.0
     
     def _calculate_price_similarity(self, prop1: Dict, prop2: Dict) -> float:
         """Calculate similarity based on price"""
-        price1 = prop1.get('price')
-        price2 = prop2.get('price')
-        
-        if not price1 or not price2:
+        return self._price_score(_extract_price(prop1), _extract_price(prop2))
+    
+    def _price_score(self, price1: Optional[float], price2: Optional[float]) -> float:
+        """Similarity of two extracted prices"""
+        if price1 is None or price2 is None:
             return 0.0
         
         try:
-            price1, price2 = float(price1), float(price2)
-            
             # Calculate percentage difference
             avg_price = (price1 + price2) / 2
             price_diff = abs(price1 - price2) / avg_price
@@ -218,93 +397,77 @@ class PropertyDeduplicator:
             else:
                 return 0.0
                 
-        except (ValueError, ZeroDivisionError):
+        except ZeroDivisionError:
             return 0.0
     
     def _calculate_characteristics_similarity(self, prop1: Dict, prop2: Dict) -> float:
         """Calculate similarity based on property characteristics"""
+        return self._characteristics_score(_extract_characteristics(prop1), _extract_characteristics(prop2))
+    
+    def _characteristics_score(self, chars1: Tuple, chars2: Tuple) -> float:
+        """Share of extracted bedrooms, bathrooms and property type present on both that agree"""
         score = 0.0
         comparisons = 0
         
-        # Compare bedrooms
-        if prop1.get('bedrooms') and prop2.get('bedrooms'):
-            if prop1['bedrooms'] == prop2['bedrooms']:
-                score += 1.0
-            comparisons += 1
-        
-        # Compare bathrooms
-        if prop1.get('bathrooms') and prop2.get('bathrooms'):
-            if prop1['bathrooms'] == prop2['bathrooms']:
-                score += 1.0
-            comparisons += 1
-        
-        # Compare property type
-        if prop1.get('property_type') and prop2.get('property_type'):
-            if prop1['property_type'].lower() == prop2['property_type'].lower():
-                score += 1.0
-            comparisons += 1
+        # Compare bedrooms, bathrooms and (already lowercased) property type
+        for value1, value2 in zip(chars1, chars2):
+            if value1 is not None and value2 is not None:
+                if value1 == value2:
+                    score += 1.0
+                comparisons += 1
         
         return score / comparisons if comparisons > 0 else 0.0
     
     def _group_duplicates(self, properties: List[Dict], 
                          matches: List[PropertyMatch]) -> List[List[Dict]]:
         """Group properties that are duplicates of each other"""
-        # Create a mapping from source_id to property
-        prop_map = {prop['source_id']: prop for prop in properties}
+        # Union-find over source_ids; iterative, so large groups cannot hit the recursion limit
+        parent: Dict[str, str] = {}
+        size: Dict[str, int] = {}
+        
+        def find(prop_id: str) -> str:
+            root = prop_id
+            while parent[root] != root:
+                root = parent[root]
+            while parent[prop_id] != root:
+                parent[prop_id], prop_id = root, parent[prop_id]
+            return root
         
-        # Build adjacency list of matches
-        adjacency = {}
         for match in matches:
-            if match.confidence in ['high', 'medium']:
-                if match.property1_id not in adjacency:
-                    adjacency[match.property1_id] = []
-                if match.property2_id not in adjacency:
-                    adjacency[match.property2_id] = []
+            if match.confidence in ('high', 'medium'):
+                for prop_id in (match.property1_id, match.property2_id):
+                    if prop_id not in parent:
+                        parent[prop_id] = prop_id
+                        size[prop_id] = 1
                 
-                adjacency[match.property1_id].append(match.property2_id)
-                adjacency[match.property2_id].append(match.property1_id)
+                root1, root2 = find(match.property1_id), find(match.property2_id)
+                if root1 != root2:
+                    if size[root1] < size[root2]:
+                        root1, root2 = root2, root1
+                    parent[root2] = root1
+                    size[root1] += size[root2]
+        
+        # Groups are ordered by first appearance in matches, members by their order in properties
+        prop_map = {prop['source_id']: prop for prop in properties}
+        members: Dict[str, List[str]] = {find(prop_id): [] for prop_id in parent}
+        for prop_id in prop_map:
+            if prop_id in parent:
+                members[find(prop_id)].append(prop_id)
         
-        # Find connected components (groups of duplicates)
-        visited = set()
         groups = []
-        
-        for prop_id in adjacency:
-            if prop_id not in visited:
-                group = []
-                self._dfs_group(prop_id, adjacency, visited, group)
-                if len(group) > 1:
-                    # Convert IDs back to property objects
-                    prop_group = [prop_map[pid] for pid in group if pid in prop_map]
-                    if len(prop_group) > 1:
-                        groups.append(prop_group)
+        for group in members.values():
+            if len(group) > 1:
+                groups.append([prop_map[pid] for pid in group])
         
         return groups
     
-    def _dfs_group(self, prop_id: str, adjacency: Dict, visited: Set, group: List):
-        """Depth-first search to find connected duplicate properties"""
-        visited.add(prop_id)
-        group.append(prop_id)
-        
-        for neighbor in adjacency.get(prop_id, []):
-            if neighbor not in visited:
-                self._dfs_group(neighbor, adjacency, visited, group)
-    
     def _select_best_property(self, duplicate_group: List[Dict]) -> Dict:
         """Select the best property from a group of duplicates"""
         if len(duplicate_group) == 1:
             return duplicate_group[0]
         
-        # Score each property based on data quality
-        best_property = None
-        best_score = -1
-        
-        for prop in duplicate_group:
-            score = self._calculate_quality_score(prop)
-            if score > best_score:
-                best_score = score
-                best_property = prop
-        
-        return best_property or duplicate_group[0]
+        # Score each property based on data quality; max keeps the first of any tied best
+        return max(duplicate_group, key=self._calculate_quality_score)
     
     def _calculate_quality_score(self, prop: Dict) -> float:
         """Calculate data quality score for a property"""
@@ -314,14 +477,11 @@ class PropertyDeduplicator:
         score += prop.get('reliability_score', 0.5) * 0.3
         
         # Completeness score
-        required_fields = ['price', 'address', 'bedrooms', 'property_type']
-        optional_fields = ['description', 'bathrooms', 'image_urls', 'floor_area']
-        
-        required_complete = sum(1 for field in required_fields if prop.get(field))
-        optional_complete = sum(1 for field in optional_fields if prop.get(field))
+        required_complete = sum(map(bool, map(prop.get, QUALITY_REQUIRED_FIELDS)))
+        optional_complete = sum(map(bool, map(prop.get, QUALITY_OPTIONAL_FIELDS)))
         
-        completeness = (required_complete / len(required_fields)) * 0.7 + \
-                      (optional_complete / len(optional_fields)) * 0.3
+        completeness = (required_complete / len(QUALITY_REQUIRED_FIELDS)) * 0.7 + \
+                      (optional_complete / len(QUALITY_OPTIONAL_FIELDS)) * 0.3
         score += completeness * 0.4
         
         # Recency score (prefer more recent data)
@@ -331,7 +491,6 @@ class PropertyDeduplicator:
             score += 0.2
         
         # Source preference (could be configured)
-        source_scores = {'rightmove': 0.6, 'zoopla': 0.5}
-        score += source_scores.get(prop.get('source', ''), 0.3) * 0.1
+        score += SOURCE_QUALITY_SCORES.get(prop.get('source', ''), 0.3) * 0.1
         
         return score
\ No newline at end of file
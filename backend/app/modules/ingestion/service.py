@@ -1,17 +1,168 @@
+import io
+import json
 import logging
+import uuid
 from typing import List, Dict, Optional, Any
 from datetime import datetime
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from geoalchemy2 import WKTElement
 
 from app.models.property import Property
 from app.db.models import Property as PropertyModel
+from .adapters.base import BasePropertyAdapter
 from .adapters.rightmove import RightmoveAdapter
 from .adapters.zoopla import ZooplaAdapter
 from .deduplication import PropertyDeduplicator
 
 logger = logging.getLogger(__name__)
 
+# Listing keys per existence query when saving a batch
+SAVE_LOOKUP_CHUNK_SIZE = 1000
+
+# Batches at least this large are streamed with COPY through a staging table instead of the ORM
+COPY_MIN_BATCH_SIZE = 100
+
+# Staging table columns in COPY order. Coordinates are staged as numbers and turned into the
+# location point server-side; room counts are staged as numeric so the final insert casts them
+# to integers the same way it does for ORM inserts. provided lists the value columns whose keys
+# the listing actually had, so updates can leave the others alone as the ORM path does
+STAGE_COLUMNS = (
+    ('id', 'uuid'),
+    ('title', 'varchar'),
+    ('description', 'text'),
+    ('price', 'double precision'),
+    ('bedrooms', 'numeric'),
+    ('bathrooms', 'numeric'),
+    ('property_type', 'varchar'),
+    ('address', 'varchar'),
+    ('postcode', 'varchar'),
+    ('city', 'varchar'),
+    ('longitude', 'double precision'),
+    ('latitude', 'double precision'),
+    ('floor_area', 'double precision'),
+    ('garden', 'boolean'),
+    ('parking', 'boolean'),
+    ('furnished', 'varchar'),
+    ('listing_url', 'varchar'),
+    ('image_urls', 'json'),
+    ('source', 'varchar'),
+    ('source_id', 'varchar'),
+    ('reliability_score', 'double precision'),
+    ('provided', 'text[]'),
+)
+
+_STAGE_POINT_SQL = "ST_SetSRID(ST_MakePoint(s.longitude, s.latitude), 4326)::geography"
+
+# Columns copied unchanged from the staging table into properties on insert and update
+_STAGE_VALUE_COLUMNS = tuple(
+    name for name, _ in STAGE_COLUMNS
+    if name not in ('id', 'longitude', 'latitude', 'source', 'source_id', 'provided')
+)
+
+CREATE_STAGE_SQL = (
+    "CREATE TEMP TABLE properties_stage ("
+    + ", ".join(f"{name} {sql_type}" for name, sql_type in STAGE_COLUMNS)
+    + ") ON COMMIT DROP"
+)
+
+COPY_STAGE_SQL = (
+    "COPY properties_stage (" + ", ".join(name for name, _ in STAGE_COLUMNS) + ") FROM STDIN"
+)
+
+# Listings already stored are updated in place, keeping the stored value of every column the
+# listing had no key for and their location when no coordinates were sent
+UPDATE_FROM_STAGE_SQL = (
+    "UPDATE properties AS p SET "
+    + ", ".join(
+        f"{name} = CASE WHEN '{name}' = ANY(s.provided) THEN s.{name} ELSE p.{name} END"
+        for name in _STAGE_VALUE_COLUMNS
+    )
+    + f", location = COALESCE({_STAGE_POINT_SQL}, p.location), last_updated = now()"
+    " FROM properties_stage AS s"
+    " WHERE p.source = s.source AND p.source_id = s.source_id"
+)
+
+# New listings are inserted only when they have coordinates, since location is required
+INSERT_FROM_STAGE_SQL = (
+    "INSERT INTO properties (id, source, source_id, location, " + ", ".join(_STAGE_VALUE_COLUMNS) + ")"
+    f" SELECT s.id, s.source, s.source_id, {_STAGE_POINT_SQL}, "
+    + ", ".join(f"s.{name}" for name in _STAGE_VALUE_COLUMNS)
+    + " FROM properties_stage AS s"
+    " WHERE s.latitude IS NOT NULL AND NOT EXISTS ("
+    "SELECT 1 FROM properties AS p WHERE p.source = s.source AND p.source_id = s.source_id)"
+)
+
+# Columns a sync writes to a stored listing, compared to tell listings that actually changed
+DELTA_FIELDS = (
+    'title', 'description', 'price', 'bedrooms', 'bathrooms', 'property_type', 'address',
+    'postcode', 'city', 'floor_area', 'garden', 'parking', 'furnished', 'listing_url',
+    'image_urls', 'reliability_score',
+)
+
+_COPY_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _location_element(prop_data: Dict[str, Any]) -> Optional[WKTElement]:
+    """
+    PostGIS point for the listing's coordinates, or None without them
+    Built as EWKT so the bind processor passes it through unchanged; Geography columns bind
+    via ST_GeogFromText, which only parses WKT
+    """
+    if not (prop_data.get('latitude') and prop_data.get('longitude')):
+        return None
+    return WKTElement(
+        f"SRID=4326;POINT({prop_data['longitude']} {prop_data['latitude']})",
+        srid=4326,
+        extended=True
+    )
+
+
+def _copy_text_value(value: Any) -> str:
+    """Encode one value for COPY's text format (\\N for NULL, with separators escaped)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    return str(value).translate(_COPY_TEXT_ESCAPES)
+
+
+def _stage_row(prop_data: Dict[str, Any]) -> str:
+    """
+    One COPY text line for a normalized property, with the defaults new rows are created with
+    and the value columns it had keys for
+    """
+    latitude, longitude = prop_data.get('latitude'), prop_data.get('longitude')
+    if not (latitude and longitude):
+        latitude = longitude = None
+    values = (
+        uuid.uuid4(),
+        prop_data.get('title', ''),
+        prop_data.get('description', ''),
+        prop_data.get('price'),
+        prop_data.get('bedrooms'),
+        prop_data.get('bathrooms'),
+        prop_data.get('property_type'),
+        prop_data.get('address', ''),
+        prop_data.get('postcode'),
+        prop_data.get('city'),
+        longitude,
+        latitude,
+        prop_data.get('floor_area'),
+        prop_data.get('garden', False),
+        prop_data.get('parking', False),
+        prop_data.get('furnished'),
+        prop_data.get('listing_url'),
+        prop_data.get('image_urls', []),
+        prop_data.get('source'),
+        prop_data.get('source_id'),
+        prop_data.get('reliability_score', 1.0),
+    )
+    provided = '{' + ','.join(name for name in _STAGE_VALUE_COLUMNS if name in prop_data) + '}'
+    return '\t'.join(map(_copy_text_value, values)) + '\t' + provided + '\n'
+
 
 class IngestionService:
     """Service for ingesting property data from external sources"""
@@ -27,31 +178,17 @@ class IngestionService:
         """Sync properties from all sources for a given location"""
         all_properties = []
         
-        # Fetch from Rightmove
-        try:
-            async with self.rightmove_adapter as adapter:
-                rightmove_raw = await adapter.search_properties(location, radius_km, max_results)
-                rightmove_normalized = [
-                    adapter.normalize_property_data(raw_prop) 
-                    for raw_prop in rightmove_raw
-                ]
-                all_properties.extend(rightmove_normalized)
-                logger.info(f"Fetched {len(rightmove_normalized)} properties from Rightmove")
-        except Exception as e:
-            logger.error(f"Error fetching from Rightmove: {str(e)}")
+        # Query every source concurrently; each search is I/O bound
+        adapters = [self.rightmove_adapter, self.zoopla_adapter]
+        results = await BasePropertyAdapter.search_many(adapters, location, radius_km, max_results)
         
-        # Fetch from Zoopla
-        try:
-            async with self.zoopla_adapter as adapter:
-                zoopla_raw = await adapter.search_properties(location, radius_km, max_results)
-                zoopla_normalized = [
-                    adapter.normalize_property_data(raw_prop) 
-                    for raw_prop in zoopla_raw
-                ]
-                all_properties.extend(zoopla_normalized)
-                logger.info(f"Fetched {len(zoopla_normalized)} properties from Zoopla")
-        except Exception as e:
-            logger.error(f"Error fetching from Zoopla: {str(e)}")
+        for adapter, raw_properties, source_label in zip(adapters, results, ("Rightmove", "Zoopla")):
+            try:
+                normalized_properties = adapter.normalize_batch(raw_properties)
+                all_properties.extend(normalized_properties)
+                logger.info(f"Fetched {len(normalized_properties)} properties from {source_label}")
+            except Exception as e:
+                logger.error(f"Error normalizing {source_label} properties: {str(e)}")
         
         # Deduplicate properties
         deduplicated_properties = self.deduplicator.deduplicate_properties(all_properties)
@@ -64,10 +201,10 @@ class IngestionService:
         """Sync properties from Rightmove API"""
         try:
             async with self.rightmove_adapter as adapter:
-                raw_properties = await adapter.search_properties(location, radius_km, max_results)
+                # Normalize each listing as it arrives rather than buffering the whole search
                 normalized_properties = [
-                    adapter.normalize_property_data(raw_prop) 
-                    for raw_prop in raw_properties
+                    adapter.normalize_property_data(raw_prop)
+                    async for raw_prop in adapter.iter_properties(location, radius_km, max_results)
                 ]
                 logger.info(f"Synced {len(normalized_properties)} properties from Rightmove")
                 return normalized_properties
@@ -80,10 +217,10 @@ class IngestionService:
         """Sync properties from Zoopla API"""
         try:
             async with self.zoopla_adapter as adapter:
-                raw_properties = await adapter.search_properties(location, radius_km, max_results)
+                # Normalize each listing as it arrives rather than buffering the whole search
                 normalized_properties = [
-                    adapter.normalize_property_data(raw_prop) 
-                    for raw_prop in raw_properties
+                    adapter.normalize_property_data(raw_prop)
+                    async for raw_prop in adapter.iter_properties(location, radius_km, max_results)
                 ]
                 logger.info(f"Synced {len(normalized_properties)} properties from Zoopla")
                 return normalized_properties
@@ -117,6 +254,139 @@ class IngestionService:
     
     def save_properties_to_db(self, properties: List[Dict[str, Any]], db: Session) -> List[PropertyModel]:
         """Save normalized properties to database"""
+        if not properties:
+            return []
+        
+        try:
+            saved_properties = self._save_properties_batch(properties, db)
+        except Exception as e:
+            # One bad row fails the whole transaction, so retry row by row to keep the rest
+            logger.error(f"Error saving property batch, retrying individually: {str(e)}")
+            db.rollback()
+            saved_properties = self._save_properties_individually(properties, db)
+        
+        logger.info(f"Saved {len(saved_properties)} properties to database")
+        return saved_properties
+    
+    def select_new_or_changed(self, properties: List[Dict[str, Any]], db: Session,
+                              stale_before: datetime) -> List[Dict[str, Any]]:
+        """
+        Properties that are new, differ from their stored row, or whose row was last updated
+        before stale_before, looked up with one query per SAVE_LOOKUP_CHUNK_SIZE listings
+        Stale rows are kept even when unchanged so saving refreshes their last_updated, which
+        is what keeps listings that are still live out of cleanup_old_properties
+        """
+        keys = list({(prop.get('source'), prop.get('source_id')) for prop in properties})
+        location = func.geometry(PropertyModel.location)
+        columns = [getattr(PropertyModel, name) for name in DELTA_FIELDS]
+        stored = {}
+        for start in range(0, len(keys), SAVE_LOOKUP_CHUNK_SIZE):
+            rows = db.query(
+                PropertyModel.source,
+                PropertyModel.source_id,
+                # Compared in SQL, where naive and timezone-aware timestamps can be compared
+                PropertyModel.last_updated < stale_before,
+                func.ST_Y(location),
+                func.ST_X(location),
+                *columns
+            ).filter(
+                tuple_(PropertyModel.source, PropertyModel.source_id).in_(keys[start:start + SAVE_LOOKUP_CHUNK_SIZE])
+            ).all()
+            stored.update(((row[0], row[1]), row[2:]) for row in rows)
+        
+        return [
+            prop for prop in properties
+            if self._needs_save(prop, stored.get((prop.get('source'), prop.get('source_id'))))
+        ]
+    
+    def _needs_save(self, prop_data: Dict[str, Any], stored: Optional[tuple]) -> bool:
+        """Whether a listing is new, stale, or would change its stored (stale, lat, lon, *fields) row"""
+        if stored is None:
+            return True
+        stale, latitude, longitude, *values = stored
+        if stale:
+            return True
+        
+        # Both save paths keep the stored value for keys the listing lacks, so those never differ
+        if any(prop_data.get(name, value) != value for name, value in zip(DELTA_FIELDS, values)):
+            return True
+        
+        # As on save, coordinates only replace the stored location when both are given
+        if prop_data.get('latitude') and prop_data.get('longitude'):
+            return (prop_data['latitude'], prop_data['longitude']) != (latitude, longitude)
+        return False
+    
+    def bulk_upsert_properties(self, properties: List[Dict[str, Any]], db: Session) -> int:
+        """
+        Insert or update normalized properties, returning how many rows were written
+        Batches of COPY_MIN_BATCH_SIZE or more are streamed with COPY into a temporary staging
+        table and merged with one UPDATE and one INSERT; smaller batches, and any batch the COPY
+        path fails on, go through save_properties_to_db. Both paths leave stored values alone for
+        keys a property doesn't have, and new rows take the same defaults
+        """
+        if len(properties) < COPY_MIN_BATCH_SIZE:
+            return len(self.save_properties_to_db(properties, db))
+        
+        try:
+            saved_count = self._copy_upsert_properties(properties, db)
+        except Exception as e:
+            logger.error(f"Error copying property batch, saving through the ORM instead: {str(e)}")
+            db.rollback()
+            return len(self.save_properties_to_db(properties, db))
+        
+        logger.info(f"Saved {saved_count} properties to database")
+        return saved_count
+    
+    def _copy_upsert_properties(self, properties: List[Dict[str, Any]], db: Session) -> int:
+        """COPY properties into a staging table, then merge it into properties in one commit"""
+        # Later repeats of the same listing in this batch win, as on the ORM path
+        latest = {(prop.get('source'), prop.get('source_id')): prop for prop in properties}
+        buffer = io.StringIO(''.join(map(_stage_row, latest.values())))
+        
+        with db.connection().connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGE_SQL)
+            cursor.copy_expert(COPY_STAGE_SQL, buffer)
+            cursor.execute(UPDATE_FROM_STAGE_SQL)
+            updated_count = cursor.rowcount
+            cursor.execute(INSERT_FROM_STAGE_SQL)
+            saved_count = updated_count + cursor.rowcount
+        
+        db.commit()
+        
+        # Every staged listing is either updated or inserted, except new ones without coordinates
+        skipped_count = len(latest) - saved_count
+        if skipped_count:
+            logger.warning(f"Skipped {skipped_count} new properties without coordinates")
+        return saved_count
+    
+    def _save_properties_batch(self, properties: List[Dict[str, Any]], db: Session) -> List[PropertyModel]:
+        """Look up existing rows in bulk, then insert or update everything in one commit"""
+        keys = list({(prop.get('source'), prop.get('source_id')) for prop in properties})
+        existing = {}
+        for start in range(0, len(keys), SAVE_LOOKUP_CHUNK_SIZE):
+            rows = db.query(PropertyModel).filter(
+                tuple_(PropertyModel.source, PropertyModel.source_id).in_(keys[start:start + SAVE_LOOKUP_CHUNK_SIZE])
+            ).all()
+            existing.update(((row.source, row.source_id), row) for row in rows)
+        
+        saved_properties = []
+        for prop_data in properties:
+            key = (prop_data.get('source'), prop_data.get('source_id'))
+            model = existing.get(key)
+            if model is not None:
+                self._update_property_from_dict(model, prop_data)
+            else:
+                model = self._create_property_from_dict(prop_data)
+                db.add(model)
+                # Later repeats of the same listing in this batch update the new row
+                existing[key] = model
+            saved_properties.append(model)
+        
+        db.commit()
+        return saved_properties
+    
+    def _save_properties_individually(self, properties: List[Dict[str, Any]], db: Session) -> List[PropertyModel]:
+        """Save properties one commit at a time, skipping rows that fail"""
         saved_properties = []
         
         for prop_data in properties:
@@ -146,18 +416,12 @@ class IngestionService:
                 db.rollback()
                 continue
         
-        logger.info(f"Saved {len(saved_properties)} properties to database")
         return saved_properties
     
     def _create_property_from_dict(self, prop_data: Dict[str, Any]) -> PropertyModel:
         """Create PropertyModel from normalized property data"""
         # Create PostGIS point from coordinates
-        location = None
-        if prop_data.get('latitude') and prop_data.get('longitude'):
-            location = WKTElement(
-                f"POINT({prop_data['longitude']} {prop_data['latitude']})",
-                srid=4326
-            )
+        location = _location_element(prop_data)
         
         return PropertyModel(
             title=prop_data.get('title', ''),
@@ -196,11 +460,9 @@ class IngestionService:
         property_model.city = prop_data.get('city', property_model.city)
         
         # Update location if coordinates are provided
-        if prop_data.get('latitude') and prop_data.get('longitude'):
-            property_model.location = WKTElement(
-                f"POINT({prop_data['longitude']} {prop_data['latitude']})",
-                srid=4326
-            )
+        location = _location_element(prop_data)
+        if location is not None:
+            property_model.location = location
         
         property_model.floor_area = prop_data.get('floor_area', property_model.floor_area)
         property_model.garden = prop_data.get('garden', property_model.garden)
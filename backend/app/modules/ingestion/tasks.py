@@ -55,7 +55,7 @@ def sync_properties_for_location(self, db: Session, location: str,
         ))
         
         # Save to database
-        saved_properties = ingestion_service.save_properties_to_db(properties, db)
+        saved_count = ingestion_service.bulk_upsert_properties(properties, db)
         
         # Run data quality validation
         validator = DataQualityValidator()
@@ -64,7 +64,7 @@ def sync_properties_for_location(self, db: Session, location: str,
         result = {
             'location': location,
             'properties_fetched': len(properties),
-            'properties_saved': len(saved_properties),
+            'properties_saved': saved_count,
             'quality_score': quality_report.get('overall_score', 0.0),
             'sync_time': datetime.now().isoformat(),
             'issues': quality_report.get('issues', [])
@@ -93,13 +93,13 @@ def sync_rightmove_properties(self, db: Session, location: str,
             location, radius_km, max_results
         ))
         
-        saved_properties = ingestion_service.save_properties_to_db(properties, db)
+        saved_count = ingestion_service.bulk_upsert_properties(properties, db)
         
         return {
             'source': 'rightmove',
             'location': location,
             'properties_fetched': len(properties),
-            'properties_saved': len(saved_properties),
+            'properties_saved': saved_count,
             'sync_time': datetime.now().isoformat()
         }
         
@@ -122,13 +122,13 @@ def sync_zoopla_properties(self, db: Session, location: str,
             location, radius_km, max_results
         ))
         
-        saved_properties = ingestion_service.save_properties_to_db(properties, db)
+        saved_count = ingestion_service.bulk_upsert_properties(properties, db)
         
         return {
             'source': 'zoopla',
             'location': location,
             'properties_fetched': len(properties),
-            'properties_saved': len(saved_properties),
+            'properties_saved': saved_count,
             'sync_time': datetime.now().isoformat()
         }
         
@@ -161,31 +161,18 @@ def incremental_sync_properties(self, db: Session, location: str,
         # Get all properties for location
         all_properties = asyncio.run(ingestion_service.sync_properties_for_location(location))
         
-        # Filter for new/updated properties
-        new_or_updated = []
-        for prop in all_properties:
-            # Check if property exists in database
-            existing = db.query(PropertyModel).filter(
-                PropertyModel.source == prop.get('source'),
-                PropertyModel.source_id == prop.get('source_id')
-            ).first()
-            
-            if not existing:
-                # New property
-                new_or_updated.append(prop)
-            elif existing.last_updated < since_time:
-                # Property might have been updated
-                new_or_updated.append(prop)
+        # Filter for new, changed or stale properties with one lookup for the whole batch
+        new_or_updated = ingestion_service.select_new_or_changed(all_properties, db, since_time)
         
         # Save only new/updated properties
-        saved_properties = ingestion_service.save_properties_to_db(new_or_updated, db)
+        saved_count = ingestion_service.bulk_upsert_properties(new_or_updated, db)
         
         return {
             'location': location,
             'since_time': since_time.isoformat(),
             'total_properties_checked': len(all_properties),
             'new_or_updated': len(new_or_updated),
-            'properties_saved': len(saved_properties),
+            'properties_saved': saved_count,
             'sync_time': datetime.now().isoformat()
         }
         
@@ -200,16 +187,10 @@ def cleanup_old_properties(self, db: Session, days_old: int = 30) -> Dict[str, A
     try:
         cutoff_date = datetime.now() - timedelta(days=days_old)
         
-        # Find old properties
-        old_properties = db.query(PropertyModel).filter(
+        # Delete old properties in one statement, without loading them into the session
+        deleted_count = db.query(PropertyModel).filter(
             PropertyModel.last_updated < cutoff_date
-        ).all()
-        
-        # Delete old properties
-        deleted_count = 0
-        for prop in old_properties:
-            db.delete(prop)
-            deleted_count += 1
+        ).delete(synchronize_session=False)
         
         db.commit()
         
@@ -282,6 +263,26 @@ def validate_property_data_quality(self, db: Session, batch_size: int = 1000) ->
         raise
 
 
+@celery_app.task(bind=True, base=DatabaseTask)
+def refresh_amenity_density_tiles(self, db: Session) -> Dict[str, Any]:
+    """Recompute the precomputed amenity density tiles around ingested properties"""
+    from app.modules.geospatial.service import GeospatialService
+    
+    try:
+        logger.info("Starting amenity density tile refresh")
+        
+        rows_written = GeospatialService(db).refresh_amenity_density_tiles()
+        
+        return {
+            'tile_rows_written': rows_written,
+            'refresh_time': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in refresh_amenity_density_tiles: {str(e)}")
+        raise
+
+
 @celery_app.task(bind=True)
 def sync_property_details(self, source: str, property_id: str) -> Dict[str, Any]:
     """Fetch detailed information for a specific property"""
@@ -1,15 +1,25 @@
 import pytest
 import asyncio
+import json
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.modules.geospatial.environmental_service import EnvironmentalDataService
-from app.modules.geospatial.transport_service import TransportDataService
+from app.modules.geospatial.transport_service import TransportDataService, TransportResultCache
 from app.models.geospatial import Location, EnvironmentalData, TransportLink, CommuteInfo
 from app.db.models import EnvironmentalData as EnvironmentalDataDB
+from app.core.http import close_shared_client, get_shared_client
 import httpx
 
 
+@pytest.fixture(autouse=True)
+def shared_client():
+    """Stand-in for the process-wide HTTP client, so tests can stub its responses"""
+    client = Mock()
+    with patch('app.modules.geospatial.transport_service.get_shared_client', return_value=client):
+        yield client
+
+
 class TestEnvironmentalDataService:
     """Test suite for EnvironmentalDataService"""
     
@@ -223,8 +233,24 @@ class TestTransportDataService:
         """Create TransportDataService instance"""
         service = TransportDataService(db=mock_db)
         service.tfl_api_key = "test_api_key"  # Set API key for testing
+        service.redis = None  # Disable response caching
+        service.result_cache = TransportResultCache()
         return service
     
+    @pytest.mark.asyncio
+    async def test_services_share_one_http_client(self, mock_db):
+        """Test every service instance uses the adapters' shared client rather than opening its own"""
+        with patch('app.modules.geospatial.transport_service.get_shared_client', side_effect=get_shared_client):
+            first = TransportDataService(db=mock_db).client
+            second = TransportDataService(db=mock_db).client
+            async with TransportDataService(db=mock_db) as service:
+                third = service.client
+        
+        assert first is second is third
+        assert not first.is_closed
+        await close_shared_client()
+        assert first.is_closed
+    
     @pytest.fixture
     def test_location(self):
         """Test location in London"""
@@ -249,22 +275,63 @@ class TestTransportDataService:
             }]
         }
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
-            
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await transport_service.get_nearby_transport_links(test_location)
-            
-            assert len(result) == 1
-            transport_link = result[0]
-            assert isinstance(transport_link, TransportLink)
-            assert transport_link.name == "Tottenham Court Road Underground Station"
-            assert transport_link.transport_type == "tube"
-            assert "Central line" in transport_link.lines
-            assert "1" in transport_link.zones
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(mock_response_data).encode()
+        
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        result = await transport_service.get_nearby_transport_links(test_location)
+        
+        assert len(result) == 1
+        transport_link = result[0]
+        assert isinstance(transport_link, TransportLink)
+        assert transport_link.name == "Tottenham Court Road Underground Station"
+        assert transport_link.transport_type == "tube"
+        assert "Central line" in transport_link.lines
+        assert "1" in transport_link.zones
+        assert transport_service.client.get.call_args.kwargs['params']['stopTypes'] == "tube,bus,rail,dlr,overground"
+    
+    @pytest.mark.asyncio
+    async def test_get_nearby_transport_links_caches_projected_stops(self, transport_service, test_location):
+        """Test only the StopPoint fields used for transport links are cached"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.content = json.dumps({
+            "stopPoints": [{
+                "id": "490000077E",
+                "commonName": "Trafalgar Square",
+                "lat": 51.5076,
+                "lon": -0.1279,
+                "modes": [{"modeName": "bus", "isTflService": True}],
+                "lines": [{"name": "24", "uri": "/Line/24"}],
+                "additionalProperties": [
+                    {"key": "Zone", "value": "1"},
+                    {"key": "Towards", "value": "Pimlico"}
+                ],
+                "children": [{"id": "child"}]
+            }]
+        }).encode()
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        transport_service.redis = Mock()
+        transport_service.redis.get = AsyncMock(return_value=None)
+        transport_service.redis.set = AsyncMock()
+        
+        result = await transport_service.get_nearby_transport_links(test_location)
+        
+        assert result[0].transport_type == "bus"
+        assert result[0].zones == ["1"]
+        cached = json.loads(transport_service.redis.set.call_args_list[0][0][1])
+        assert cached == {"stopPoints": [{
+            "id": "490000077E",
+            "commonName": "Trafalgar Square",
+            "lat": 51.5076,
+            "lon": -0.1279,
+            "modes": [{"modeName": "bus"}],
+            "lines": [{"name": "24"}],
+            "additionalProperties": [{"key": "Zone", "value": "1"}]
+        }]}
     
     @pytest.mark.asyncio
     async def test_get_nearby_transport_links_no_api_key(self, mock_db, test_location):
@@ -295,20 +362,19 @@ class TestTransportDataService:
             }]
         }
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
-            
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await transport_service.get_journey_planner_data(test_location, destination)
-            
-            assert isinstance(result, CommuteInfo)
-            assert result.duration_minutes == 15
-            assert result.transport_mode == "public_transport"
-            assert result.origin == test_location
-            assert result.destination == destination
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(mock_response_data).encode()
+        
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        result = await transport_service.get_journey_planner_data(test_location, destination)
+        
+        assert isinstance(result, CommuteInfo)
+        assert result.duration_minutes == 15
+        assert result.transport_mode == "public_transport"
+        assert result.origin == test_location
+        assert result.destination == destination
     
     @pytest.mark.asyncio
     async def test_get_line_status_updates(self, transport_service):
@@ -323,18 +389,139 @@ class TestTransportDataService:
             }]
         }]
         
-        with patch('httpx.AsyncClient') as mock_client:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(mock_response_data).encode()
+        
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        result = await transport_service.get_line_status_updates()
+        
+        assert "central" in result
+        assert result["central"]["name"] == "Central"
+        assert result["central"]["status"] == "Good Service"
+    
+    @pytest.mark.asyncio
+    async def test_get_line_status_updates_cache_hit(self, transport_service):
+        """Test cached TfL responses are served without calling the API"""
+        transport_service.redis = Mock()
+        transport_service.redis.get = AsyncMock(return_value=json.dumps([{
+            "id": "central",
+            "name": "Central",
+            "lineStatuses": [{"statusSeverityDescription": "Minor Delays"}]
+        }]).encode())
+        transport_service.client.get = AsyncMock()
+        
+        result = await transport_service.get_line_status_updates()
+        
+        assert result["central"]["status"] == "Minor Delays"
+        transport_service.client.get.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_cached_get_serves_stale_copy_on_server_error(self, transport_service):
+        """Test the stale cached copy is used when TfL returns a server error"""
+        stale_payload = json.dumps({"stopPoints": []}).encode()
+        transport_service.redis = Mock()
+        transport_service.redis.get = AsyncMock(side_effect=[None, None, stale_payload])
+        
+        mock_response = Mock()
+        mock_response.status_code = 503
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        params = {'lat': 51.5, 'app_key': 'secret'}
+        result = await transport_service._cached_get("https://api.tfl.gov.uk/StopPoint", params, ttl=60, timeout=5.0)
+        
+        assert result == {"stopPoints": []}
+        key = transport_service._cache_key("https://api.tfl.gov.uk/StopPoint", params)
+        assert key == transport_service._cache_key("https://api.tfl.gov.uk/StopPoint", {'lat': 51.5, 'app_key': 'other'})
+        transport_service.redis.get.assert_awaited_with(f"{key}:stale")
+    
+    @pytest.mark.asyncio
+    async def test_cached_get_revalidates_with_etag(self, transport_service):
+        """Test expired entries are revalidated with If-None-Match and refreshed on 304"""
+        stale_payload = json.dumps({"stopPoints": [{"id": "940GZZLUTCR"}]}).encode()
+        transport_service.redis = Mock()
+        transport_service.redis.get = AsyncMock(side_effect=[None, b'"abc123"', stale_payload])
+        transport_service.redis.set = AsyncMock()
+        
+        mock_response = Mock()
+        mock_response.status_code = 304
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        result = await transport_service._cached_get("https://api.tfl.gov.uk/StopPoint", {'lat': 51.5}, ttl=60, timeout=5.0)
+        
+        assert result == {"stopPoints": [{"id": "940GZZLUTCR"}]}
+        assert transport_service.client.get.call_args.kwargs['headers'] == {'If-None-Match': '"abc123"'}
+        key = transport_service._cache_key("https://api.tfl.gov.uk/StopPoint", {'lat': 51.5})
+        transport_service.redis.set.assert_any_await(key, stale_payload, ex=60)
+    
+    @pytest.mark.asyncio
+    async def test_cached_get_coalesces_concurrent_requests(self, transport_service):
+        """Test identical concurrent requests share a single TfL call"""
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(0.01)
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
-            
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
-            result = await transport_service.get_line_status_updates()
-            
-            assert "central" in result
-            assert result["central"]["name"] == "Central"
-            assert result["central"]["status"] == "Good Service"
+            mock_response.content = json.dumps({"stopPoints": []}).encode()
+            return mock_response
+        
+        transport_service.client.get = AsyncMock(side_effect=slow_get)
+        params = {'lat': 51.5, 'app_key': 'test_api_key'}
+        
+        results = await asyncio.gather(*(
+            transport_service._cached_get("https://api.tfl.gov.uk/StopPoint", params, ttl=60, timeout=5.0)
+            for _ in range(3)
+        ))
+        
+        assert results == [{"stopPoints": []}] * 3
+        assert transport_service.client.get.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_step_free_access_info(self, transport_service, test_location):
+        """Test step-free access lookups for the nearest stops"""
+        links = [
+            TransportLink(id=f"stop{i}", name=f"Stop {i}", transport_type="tube",
+                         location=test_location, lines=[], zones=[])
+            for i in range(7)
+        ]
+        
+        accessibility = [{"key": "AccessibilitySummary", "value": "Step-free to platform"}]
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps([
+            {"id": f"stop{i}", "additionalProperties": accessibility if i != 2 else []}
+            for i in range(5)
+        ]).encode()
+        
+        transport_service.client.get = AsyncMock(return_value=mock_response)
+        
+        result = await transport_service._get_step_free_access_info(links)
+        
+        transport_service.client.get.assert_awaited_once()
+        assert transport_service.client.get.call_args[0][0].endswith("/StopPoint/stop0,stop1,stop2,stop3,stop4")
+        assert [info['stop_id'] for info in result] == ["stop0", "stop1", "stop3", "stop4"]
+        assert result[0]['accessibility_info'] == "Step-free to platform"
+    
+    @pytest.mark.asyncio
+    async def test_get_transport_accessibility_info(self, transport_service, test_location):
+        """Test accessibility info aggregates links and includes step-free access"""
+        links = [
+            TransportLink(id="tube1", name="Tube", transport_type="tube",
+                         location=test_location, lines=["Northern", "Central"], zones=["1"]),
+            TransportLink(id="dlr1", name="DLR", transport_type="dlr",
+                         location=test_location, lines=["DLR"], zones=["1", "2"])
+        ]
+        transport_service._fetch_nearby_transport_links = AsyncMock(return_value=links)
+        transport_service._get_step_free_access_info = AsyncMock(return_value=[{'stop_id': 'tube1'}])
+        
+        result = await transport_service.get_transport_accessibility_info(test_location)
+        
+        assert result['transport_links_count'] == 2
+        assert sorted(result['transport_types']) == ["dlr", "tube"]
+        assert result['zones'] == ["1", "2"]
+        assert result['lines'] == ["Central", "DLR", "Northern"]
+        assert result['step_free_access'] == [{'stop_id': 'tube1'}]
+        transport_service._get_step_free_access_info.assert_awaited_once_with(links)
     
     @pytest.mark.asyncio
     async def test_calculate_transport_score(self, transport_service, test_location):
@@ -351,14 +538,15 @@ class TestTransportDataService:
                          location=test_location, lines=["29"], zones=[])
         ]
         
-        # Mock different calls for different radii
-        async def mock_get_transport_links(location, radius_meters):
-            if radius_meters == 500:
-                return [mock_tube_link] + mock_bus_links
-            else:  # 1000m
-                return [mock_tube_link] + mock_bus_links
+        # Rail station ~800m away counts towards the 1km radius only
+        mock_rail_link = TransportLink(
+            id="rail1", name="Test Rail", transport_type="train",
+            location=Location(latitude=51.5146, longitude=-0.1278), lines=[], zones=["1"]
+        )
         
-        transport_service.get_nearby_transport_links = mock_get_transport_links
+        transport_service._fetch_nearby_transport_links = AsyncMock(
+            return_value=[mock_tube_link] + mock_bus_links + [mock_rail_link]
+        )
         
         result = await transport_service.calculate_transport_score(test_location)
         
@@ -367,6 +555,43 @@ class TestTransportDataService:
         assert 'breakdown' in result
         assert result['breakdown']['tube_stations_500m'] == 1
         assert result['breakdown']['bus_stops_500m'] == 2
+        assert result['breakdown']['rail_stations_1km'] == 1
+        transport_service._fetch_nearby_transport_links.assert_awaited_once_with(test_location, 1000)
+        
+        # A location within ~11m reuses the computed score
+        nearby = Location(latitude=51.50741, longitude=-0.12781, address="Nearby")
+        cached_result = await transport_service.calculate_transport_score(nearby)
+        
+        assert cached_result['transport_score'] == result['transport_score']
+        assert cached_result['location'] == nearby
+        transport_service._fetch_nearby_transport_links.assert_awaited_once()
+        
+        # Hits get their own breakdown, so callers cannot change the cached one
+        cached_result['breakdown']['tube_stations_500m'] = 99
+        again = await transport_service.calculate_transport_score(nearby)
+        assert again['breakdown']['tube_stations_500m'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_transport_results_are_not_cached_when_tfl_fails(self, transport_service, test_location):
+        """Test a TfL outage yields an empty result that the next request recomputes"""
+        transport_service.client.get = AsyncMock(side_effect=httpx.ConnectError("down"))
+        
+        score = await transport_service.calculate_transport_score(test_location)
+        accessibility = await transport_service.get_transport_accessibility_info(test_location)
+        
+        assert score['transport_score'] == 0 and score['degraded'] is True
+        assert accessibility['transport_links_count'] == 0
+        assert transport_service.result_cache.get(('score', 51.5074, -0.1278)) is None
+        assert transport_service.result_cache.get(('accessibility', 51.5074, -0.1278, 1000)) is None
+        
+        stop = {"id": "tube1", "commonName": "Tube", "lat": 51.5074, "lon": -0.1278,
+                "modes": [{"modeName": "tube"}], "lines": [], "additionalProperties": []}
+        transport_service.client.get = AsyncMock(return_value=Mock(
+            status_code=200, content=json.dumps({"stopPoints": [stop]}).encode()
+        ))
+        
+        recovered = await transport_service.calculate_transport_score(test_location)
+        assert recovered['transport_score'] == 20 and 'degraded' not in recovered
     
     def test_map_tfl_mode_to_type(self, transport_service):
         """Test TfL mode mapping"""
@@ -389,6 +614,34 @@ class TestTransportDataService:
         result = transport_service._map_tfl_mode_to_type([])
         assert result == "unknown"
     
+    def test_extract_journey_legs_and_fare(self, transport_service):
+        """Test journey leg and fare extraction tolerates missing nested fields"""
+        journey = {
+            "legs": [
+                {
+                    "mode": {"name": "tube"},
+                    "duration": 8,
+                    "departurePoint": {"commonName": "Oxford Circus"},
+                    "arrivalPoint": {"commonName": "Bank"},
+                    "routeOptions": [{"name": "Central"}]
+                },
+                {"duration": 3, "mode": None}
+            ],
+            "fare": {"totalCost": 280}
+        }
+        
+        legs = transport_service._extract_journey_legs(journey)
+        
+        assert legs[0]['mode'] == "tube"
+        assert legs[0]['line_name'] == "Central"
+        assert legs[0]['instruction'] == ""
+        assert legs[1] == {
+            'mode': '', 'duration': 3, 'instruction': '',
+            'departure_point': '', 'arrival_point': '', 'line_name': ''
+        }
+        assert transport_service._extract_fare_info(journey)['total_cost'] == 280
+        assert transport_service._extract_fare_info({}) == {}
+    
     def test_extract_lines_from_stop(self, transport_service):
         """Test line extraction from TfL stop data"""
         stop_data = {
@@ -467,13 +720,11 @@ class TestIntegratedGeospatialService:
         """Test transport service error handling"""
         service = TransportDataService(db=mock_db)
         service.tfl_api_key = "test_key"
+        service.redis = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            # Simulate network error
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                side_effect=httpx.RequestError("Network error")
-            )
-            
-            result = await service.get_nearby_transport_links(test_location)
-            
-            assert result == []
\ No newline at end of file
+        # Simulate network error
+        service.client.get = AsyncMock(side_effect=httpx.RequestError("Network error"))
+        
+        result = await service.get_nearby_transport_links(test_location)
+        
+        assert result == []
\ No newline at end of file
@@ -1,10 +1,15 @@
 import pytest
 import asyncio
+import json
 from unittest.mock import Mock, patch, AsyncMock
 from sqlalchemy.orm import Session
 from app.modules.geospatial.service import GeospatialService
+from app.modules.geospatial.transport_service import TransportResultCache
 from app.models.geospatial import Location, Amenity, CommuteInfo, AmenityCategory
-from app.db.models import Amenity as AmenityDB, Property as PropertyDB
+from app.db.models import Amenity as AmenityDB, Property as PropertyDB, LocationScore as LocationScoreDB
+from app.modules.geospatial.tiles import encode_geohash
+from app.modules.geospatial.distance import haversine_km
+from app.modules.geospatial.scoring import environmental_score
 import httpx
 
 
@@ -105,7 +110,7 @@ class TestGeospatialService:
         with patch('httpx.AsyncClient') as mock_client:
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
+            mock_response.content = json.dumps(mock_response_data).encode()
             
             mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
             
@@ -120,6 +125,9 @@ class TestGeospatialService:
             assert result.transport_mode == "walking"
             assert result.origin == london_location
             assert result.destination == nearby_location
+            
+            requested_url = mock_client.return_value.__aenter__.return_value.get.call_args[0][0]
+            assert requested_url.endswith("-0.127800,51.507400;-0.127000,51.508500")
     
     @pytest.mark.asyncio
     async def test_calculate_walking_distance_fallback(self, geospatial_service, london_location, nearby_location):
@@ -167,16 +175,10 @@ class TestGeospatialService:
         mock_query.filter.return_value = mock_query
         mock_query.order_by.return_value = mock_query
         mock_query.limit.return_value = mock_query
-        mock_query.all.return_value = [mock_amenity]
+        mock_query.all.return_value = [(mock_amenity, 51.5074, -0.1278)]
         
         geospatial_service.db.query.return_value = mock_query
         
-        # Mock coordinates query
-        mock_coords = Mock()
-        mock_coords.lat = 51.5074
-        mock_coords.lng = -0.1278
-        geospatial_service.db.execute.return_value.fetchone.return_value = mock_coords
-        
         amenities = geospatial_service.find_nearby_amenities(
             location=london_location,
             amenity_category="fitness",
@@ -189,6 +191,7 @@ class TestGeospatialService:
         assert amenities[0].category == "fitness"
         assert amenities[0].location.latitude == 51.5074
         assert amenities[0].location.longitude == -0.1278
+        geospatial_service.db.execute.assert_not_called()
     
     def test_find_nearby_amenities_empty_result(self, geospatial_service, london_location):
         """Test finding nearby amenities with no results"""
@@ -225,16 +228,10 @@ class TestGeospatialService:
         mock_query.filter.return_value = mock_query
         mock_query.order_by.return_value = mock_query
         mock_query.limit.return_value = mock_query
-        mock_query.all.return_value = [(mock_property, 500.0)]  # 500m distance
+        mock_query.all.return_value = [(mock_property, 500.0, 51.5074, -0.1278)]  # 500m distance
         
         geospatial_service.db.query.return_value = mock_query
         
-        # Mock coordinates query
-        mock_coords = Mock()
-        mock_coords.lat = 51.5074
-        mock_coords.lng = -0.1278
-        geospatial_service.db.execute.return_value.fetchone.return_value = mock_coords
-        
         properties = geospatial_service.find_properties_within_radius(
             location=london_location,
             radius_km=1.0
@@ -266,7 +263,7 @@ class TestGeospatialService:
         with patch('httpx.AsyncClient') as mock_client:
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
+            mock_response.content = json.dumps(mock_response_data).encode()
             
             mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
             
@@ -319,6 +316,24 @@ class TestGeospatialService:
             "shopping": 8
         }
     
+    def test_get_amenity_density_falls_back_to_live_query(self, geospatial_service, london_location):
+        """Test amenity density falls back to a live query when the tile has no counts"""
+        tile_query = Mock()
+        tile_query.filter.return_value = tile_query
+        tile_query.all.return_value = []
+        
+        live_query = Mock()
+        live_query.filter.return_value = live_query
+        live_query.group_by.return_value = live_query
+        live_query.all.return_value = [("fitness", 2)]
+        
+        geospatial_service.db.query.side_effect = [tile_query, live_query]
+        
+        density = geospatial_service.get_amenity_density(london_location, radius_km=1.0)
+        
+        assert density == {"fitness": 2}
+        live_query.group_by.assert_called_once()
+    
     def test_get_amenity_density_error_handling(self, geospatial_service, london_location):
         """Test amenity density calculation error handling"""
         geospatial_service.db.query.side_effect = Exception("Database error")
@@ -327,6 +342,122 @@ class TestGeospatialService:
         
         assert density == {}
 
+    
+    @pytest.mark.asyncio
+    async def test_get_location_insights_uses_cached_tile_scores(self, geospatial_service, london_location):
+        """Test that fresh tile scores replace the score calculation without changing the response shape"""
+        mock_scores = Mock(spec=LocationScoreDB)
+        mock_scores.transport_score = 80
+        mock_scores.environmental_score = 65
+        mock_scores.amenity_score = 40
+        mock_scores.overall_score = 64
+        mock_scores.amenity_density = {"fitness": 5, "shopping": 15}
+        
+        mock_query = Mock()
+        mock_query.filter.return_value = mock_query
+        mock_query.first.return_value = mock_scores
+        geospatial_service.db.query.return_value = mock_query
+        
+        environmental_data = {'air_quality': {'air_quality_index': 45}}
+        transport_score = {'transport_score': 80, 'breakdown': {'tube_stations_500m': 4}}
+        geospatial_service.environmental_service.refresh_environmental_data_if_stale = AsyncMock(
+            return_value=environmental_data
+        )
+        geospatial_service.transport_service.calculate_transport_score = AsyncMock(return_value=transport_score)
+        geospatial_service.transport_service.get_nearby_transport_links = AsyncMock(return_value=[])
+        geospatial_service.get_amenity_density = Mock()
+        geospatial_service._cache_location_scores = Mock()
+        
+        insights = await geospatial_service.get_location_insights(london_location)
+        
+        assert 'source' not in insights
+        assert insights['overall_score']['overall'] == 64
+        assert insights['amenity_density'] == {"fitness": 5, "shopping": 15}
+        assert insights['environmental_data'] == environmental_data
+        assert insights['transport_score'] == transport_score
+        geospatial_service.get_amenity_density.assert_not_called()
+        geospatial_service._cache_location_scores.assert_not_called()
+        cutoff = mock_query.filter.call_args.args[1].right.value
+        assert cutoff.tzinfo is not None
+    
+    @pytest.mark.asyncio
+    async def test_get_location_insights_degrades_on_slow_subservice(self, geospatial_service, london_location):
+        """Test that a slow sub-service times out without failing the other lookups"""
+        async def slow_transport_score(location):
+            await asyncio.sleep(1)
+            return {'transport_score': 90}
+        
+        geospatial_service.insights_subcall_timeout_seconds = 0.05
+        geospatial_service.get_cached_location_scores = Mock(return_value=None)
+        geospatial_service.get_amenity_density = Mock(return_value={"fitness": 5})
+        geospatial_service._cache_location_scores = Mock()
+        geospatial_service.environmental_service.refresh_environmental_data_if_stale = AsyncMock(return_value=None)
+        geospatial_service.transport_service.calculate_transport_score = slow_transport_score
+        geospatial_service.transport_service.get_nearby_transport_links = AsyncMock(side_effect=httpx.ConnectError("down"))
+        
+        insights = await geospatial_service.get_location_insights(london_location)
+        
+        assert insights['transport_score'] is None
+        assert insights['nearby_transport'] == []
+        assert insights['amenity_density'] == {"fitness": 5}
+        geospatial_service._cache_location_scores.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_get_location_insights_does_not_store_scores_when_tfl_is_down(self, geospatial_service, london_location):
+        """Test a transport score computed during a TfL outage is returned but not merged into the tile"""
+        transport_service = geospatial_service.transport_service
+        transport_service.tfl_api_key = 'test-key'
+        transport_service.result_cache = TransportResultCache()
+        transport_service._cached_get = AsyncMock(return_value=None)
+        geospatial_service.get_cached_location_scores = Mock(return_value=None)
+        geospatial_service.get_amenity_density = Mock(return_value={"fitness": 5})
+        geospatial_service.environmental_service.refresh_environmental_data_if_stale = AsyncMock(
+            return_value={'air_quality': {'air_quality_index': 45}}
+        )
+        
+        insights = await geospatial_service.get_location_insights(london_location)
+        
+        assert insights['transport_score']['transport_score'] == 0
+        assert insights['transport_score']['degraded'] is True
+        geospatial_service.db.merge.assert_not_called()
+        geospatial_service.db.commit.assert_not_called()
+    
+    def test_geohash_tiles(self, london_location, nearby_location):
+        """Test geohash encoding used to key precomputed location scores"""
+        assert encode_geohash(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+        
+        tile = encode_geohash(london_location.latitude, london_location.longitude)
+        assert tile == "gcpvj0d"
+        assert tile == encode_geohash(51.50741, -0.12781)
+    
+    def test_overall_location_score(self, geospatial_service):
+        """Test overall location score combines transport, environment and amenities"""
+        environmental_data = {
+            'air_quality': {'air_quality_index': 45},
+            'flood_risk': {'flood_risk_level': 'low'},
+            'crime_statistics': {'crime_rate': 15}
+        }
+        
+        scores = geospatial_service._calculate_overall_location_score(
+            environmental_data, {'transport_score': 80}, {"fitness": 5, "shopping": 15}
+        )
+        
+        assert scores == {'transport': 80, 'environmental': 100, 'amenities': 40, 'overall': 77}
+    
+    def test_environmental_score_band_boundaries(self):
+        """Test environmental score bands match their inclusive/exclusive boundaries"""
+        assert environmental_score() == 50
+        assert environmental_score(air_quality_index=50) == 70
+        assert environmental_score(air_quality_index=100) == 60
+        assert environmental_score(air_quality_index=150) == 50
+        assert environmental_score(air_quality_index=151) == 30
+        assert environmental_score(flood_risk_level='high') == 25
+        assert environmental_score(flood_risk_level='medium') == 50
+        assert environmental_score(crime_rate=19.9) == 65
+        assert environmental_score(crime_rate=20) == 50
+        assert environmental_score(crime_rate=50) == 50
+        assert environmental_score(crime_rate=50.1) == 30
+        assert environmental_score(200, 'high', 80) == 0
 
 class TestGeospatialAccuracy:
     """Test suite for geospatial calculation accuracy"""
@@ -368,4 +499,18 @@ class TestGeospatialAccuracy:
         
         # Distance should be approximately 0.1 km (100m)
         assert 0.05 <= distance <= 0.15
-        assert distance > 0
\ No newline at end of file
+        assert distance > 0
+    
+    def test_haversine_matches_geodesic_distance(self):
+        """Test that the haversine estimate stays close to the geodesic distance"""
+        london = Location(latitude=51.5074, longitude=-0.1278)
+        manchester = Location(latitude=53.4808, longitude=-2.2426)
+        
+        service = GeospatialService(db=Mock())
+        geodesic_distance = service.calculate_distance(london, manchester)
+        haversine_distance = haversine_km(
+            london.latitude, london.longitude, manchester.latitude, manchester.longitude
+        )
+        
+        # Spherical approximation is within 0.5% at UK latitudes
+        assert abs(haversine_distance - geodesic_distance) <= geodesic_distance * 0.005
@@ -1,11 +1,16 @@
 """
 Tests for the ingestion module
 """
+import logging
 import pytest
+import asyncio
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+import httpx
 
-from app.modules.ingestion.service import IngestionService
+from app.modules.ingestion.service import (
+    COPY_MIN_BATCH_SIZE, DELTA_FIELDS, UPDATE_FROM_STAGE_SQL, IngestionService
+)
 from app.modules.ingestion.adapters.base import RawPropertyData
 from app.modules.ingestion.adapters.rightmove import RightmoveAdapter
 from app.modules.ingestion.adapters.zoopla import ZooplaAdapter
@@ -34,6 +39,14 @@ class TestRightmoveAdapter:
             assert prop.source_id is not None
             assert prop.raw_data is not None
     
+    @pytest.mark.asyncio
+    async def test_iter_properties_streams_search_results(self, adapter):
+        """Test listings are yielded one at a time and match the buffered search"""
+        streamed = [raw async for raw in adapter.iter_properties("London", max_results=3)]
+        searched = await adapter.search_properties("London", max_results=3)
+        
+        assert [raw.source_id for raw in streamed] == [raw.source_id for raw in searched]
+    
     def test_normalize_property_data(self, adapter):
         """Test property data normalization"""
         raw_data = RawPropertyData(
@@ -79,6 +92,70 @@ class TestRightmoveAdapter:
         assert adapter._extract_price("POA") is None
         assert adapter._extract_price("") is None
         assert adapter._extract_price("£1,250,000") == 1250000.0
+        assert adapter._extract_price("Offers over £325,000 (guide)") == 325000.0
+        assert adapter._extract_price(450000) == 450000.0
+
+    def test_extract_room_counts(self, adapter):
+        """Test bedroom and bathroom counts are read from the first number"""
+        assert adapter._extract_bedrooms("3 bedrooms") == 3
+        assert adapter._extract_bedrooms(2) == 2
+        assert adapter._extract_bedrooms("4") == 4
+        assert adapter._extract_bedrooms("Studio") is None
+        assert adapter._extract_bathrooms("1 bath, 2 wc") == 1
+
+    def test_extract_postcode(self, adapter):
+        """Test UK postcode extraction from display addresses"""
+        assert adapter._extract_postcode("10 Downing Street, London SW1A 2AA") == "SW1A 2AA"
+        assert adapter._extract_postcode("Flat 2, 5 High St, e1 6an.") == "E1 6AN"
+        assert adapter._extract_postcode("Baker Street, NW1 6XE, London") == "NW1 6XE"
+        assert adapter._extract_postcode("1 Mock Street, London") is None
+        # Inward codes never use C, I, K, M, O or V
+        assert adapter._extract_postcode("1 Mock Street, SW1A 2CA") is None
+        assert adapter._extract_postcode("") is None
+        # Long addresses are matched on their tail without splitting "SW1A" into "W1A"
+        assert adapter._extract_postcode("Flat 12, Some Very Long Building Name, Westminster SW1A 2AA") == "SW1A 2AA"
+        assert adapter._extract_postcode("Apartment 4, NW1 6XE, Long Road Name With No Code At The End") == "NW1 6XE"
+        tail = "W1A 2AA, Somewhere Far Away Town".ljust(40, ".")
+        assert adapter._extract_postcode("10 Downing Street, S" + tail) == "SW1A 2AA"
+
+    def test_extract_coordinates(self, adapter):
+        """Test coordinates on the equator or meridian are kept"""
+        assert adapter._extract_coordinates({"latitude": 51.5, "longitude": 0}) == (51.5, 0.0)
+        assert adapter._extract_coordinates({"latitude": "51.5", "longitude": None}) == (None, None)
+        assert adapter._extract_coordinates({}) == (None, None)
+
+    def test_scan_key_features(self, adapter):
+        """Test garden, parking and furnished status come from one feature scan"""
+        assert adapter._scan_key_features(
+            {"keyFeatures": ["Private Garden", "Part Furnished", "Off-street parking"]}
+        ) == (True, True, 'part-furnished')
+        assert adapter._scan_key_features({"keyFeatures": ["Unfurnished"]}) == (False, False, 'unfurnished')
+        assert adapter._scan_key_features({"keyFeatures": "Garden"}) == (False, False, None)
+
+    def test_raw_property_data_is_hashable(self):
+        """Test raw listings can be deduplicated in a set despite holding a payload dict"""
+        fetched_at = datetime.now()
+        first = RawPropertyData(source="rightmove", source_id="r1", raw_data={"price": 1}, fetched_at=fetched_at)
+        again = RawPropertyData(source="rightmove", source_id="r1", raw_data={"price": 2}, fetched_at=fetched_at)
+        
+        assert len({first, again}) == 1
+        assert not hasattr(first, '__dict__')
+    
+    def test_calculate_reliability_score(self, adapter):
+        """Test reliability score penalizes missing critical and optional fields"""
+        def raw(data):
+            return RawPropertyData(source="rightmove", source_id="r1", raw_data=data, fetched_at=datetime.now())
+        
+        complete = raw({
+            "price": 450000, "address": "1 Test St", "bedrooms": 2, "description": "Flat",
+            "bathrooms": 1, "property_type": "flat", "images": ["a.jpg"]
+        })
+        partial = raw({"price": 450000, "address": "", "bedrooms": 2, "images": []})
+        
+        assert adapter.calculate_reliability_score(complete) == 1.0
+        assert adapter.calculate_reliability_score(partial) == pytest.approx(0.4)
+        assert adapter.calculate_reliability_score(raw({})) == 0.0
+        assert adapter.calculate_reliability_scores([complete, partial]) == [1.0, pytest.approx(0.4)]
     
     def test_normalize_property_type(self, adapter):
         """Test property type normalization"""
@@ -87,6 +164,8 @@ class TestRightmoveAdapter:
         assert adapter._normalize_property_type("Terraced House") == "house"
         assert adapter._normalize_property_type("Studio") == "studio"
         assert adapter._normalize_property_type("") == "unknown"
+        assert adapter._normalize_property_type("Studio Flat") == "flat"
+        assert adapter._normalize_property_type("Barn Conversion") == "barn conversion"
 
 
 class TestZooplaAdapter:
@@ -144,6 +223,30 @@ class TestZooplaAdapter:
         assert normalized['property_type'] == "flat"
         assert normalized['furnished'] == "furnished"
         assert normalized['source'] == "zoopla"
+    
+    def test_normalize_property_type(self, adapter):
+        """Test Zoopla property type terminology maps to standard types"""
+        assert adapter._normalize_property_type("Semi-Detached") == "house"
+        assert adapter._normalize_property_type("End of terrace house") == "house"
+        assert adapter._normalize_property_type("Studio apartment") == "flat"
+        assert adapter._normalize_property_type("Land") == "land"
+    
+    def test_extract_furnished_status(self, adapter):
+        """Test furnished_state labels and feature text fallback"""
+        assert adapter._extract_furnished_status({"furnished_state": "Partially furnished"}, "") == "part-furnished"
+        assert adapter._extract_furnished_status({"furnished_state": " Unfurnished "}, "") == "unfurnished"
+        assert adapter._extract_furnished_status({"furnished_state": "Flexible"}, "furnished flat") == "furnished"
+        assert adapter._extract_furnished_status({}, "balcony") is None
+    
+    def test_feature_text_collects_all_fields(self, adapter):
+        """Test features, property features and description feed feature checks"""
+        feature_text = adapter._feature_text({
+            "features": ["Private GARDEN"], "property_features": {"ignored": True}, "description": "Allocated Parking"
+        })
+        
+        assert adapter._has_feature(feature_text, 'garden')
+        assert adapter._has_feature(feature_text, 'parking')
+        assert not adapter._has_feature(feature_text, 'ignored')
 
 
 class TestPropertyDeduplicator:
@@ -207,6 +310,78 @@ class TestPropertyDeduplicator:
         assert match.similarity_score > 0.7
         assert match.confidence in ['high', 'medium']
     
+    def test_property_match_is_compact_and_immutable(self, deduplicator, sample_properties):
+        """Test matches are slotted, frozen and carry their reasons as a tuple"""
+        match = deduplicator._compare_properties(sample_properties[0], sample_properties[1])
+        
+        assert not hasattr(match, '__dict__')
+        assert match.match_reasons[0].startswith('Similar address')
+        with pytest.raises(AttributeError):
+            match.confidence = 'low'
+    
+    def test_find_duplicates_skips_distant_pairs(self, deduplicator, sample_properties):
+        """Test only nearby or same-price pairs are compared, with the same matches as a full scan"""
+        far_away = dict(sample_properties[2], source_id='rightmove_3', price=310000, latitude=53.4808, longitude=-2.2426)
+        same_price = dict(sample_properties[0], source_id='zoopla_2', latitude=None, longitude=None)
+        properties = sample_properties + [far_away, same_price]
+        
+        pairs = deduplicator._candidate_pairs(properties)
+        
+        assert (0, 1) in pairs and (0, 4) in pairs
+        assert not any(3 in pair for pair in pairs)
+        full_scan = [
+            (a['source_id'], b['source_id'])
+            for i, a in enumerate(properties) for b in properties[i + 1:]
+            if deduplicator._compare_properties(a, b)
+        ]
+        assert [(m.property1_id, m.property2_id) for m in deduplicator.find_duplicates(properties)] == full_scan
+    
+    def test_compare_properties_skips_fuzzy_and_characteristics_for_hopeless_pairs(self, deduplicator, sample_properties):
+        """Test pairs too far apart in location and price return before the costlier scores run"""
+        distant = dict(sample_properties[1], latitude=53.4808, longitude=-2.2426, price=900000)
+        
+        with patch.object(deduplicator, '_calculate_address_similarity') as address, \
+                patch.object(deduplicator, '_characteristics_score') as characteristics:
+            assert deduplicator._compare_properties(sample_properties[0], distant) is None
+        
+        address.assert_not_called()
+        characteristics.assert_not_called()
+    
+    def test_properties_without_coordinates_are_blocked_by_price(self, deduplicator, sample_properties):
+        """Test listings without coordinates are only compared with listings at the same price"""
+        unlocated = [
+            dict(prop, source_id=f"{prop['source_id']}_nocoords", latitude=None, longitude=None, price=price)
+            for prop, price in zip(sample_properties, (450000, 450000, 299000))
+        ]
+        
+        pairs = deduplicator._candidate_pairs(unlocated)
+        
+        assert pairs == [(0, 1)]
+        substring_address = dict(unlocated[0], source_id='zoopla_9', source='zoopla', address='Flat 2, 123 Test Street, London SW1 1AA')
+        assert deduplicator.find_duplicates([unlocated[0], substring_address])
+    
+    def test_find_duplicates_ignores_unusable_coordinates(self, deduplicator, sample_properties):
+        """Test non-finite or out-of-range coordinates score nothing instead of breaking blocking"""
+        broken = [
+            dict(sample_properties[1], source_id='nan_lat', latitude=float('nan')),
+            dict(sample_properties[1], source_id='bad_lat', latitude=95.0),
+        ]
+        
+        matches = deduplicator.find_duplicates([sample_properties[0]] + broken)
+        
+        assert deduplicator._calculate_coordinate_similarity(sample_properties[0], broken[0]) == 0.0
+        assert all('Close coordinates' not in ' '.join(m.match_reasons) for m in matches)
+    
+    def test_find_duplicates_normalizes_each_address_once(self, deduplicator, sample_properties):
+        """Test addresses are normalized once per property rather than per compared pair"""
+        properties = sample_properties + [dict(sample_properties[0], source_id='zoopla_2', source='zoopla')]
+        
+        with patch.object(deduplicator, '_normalize_address', wraps=deduplicator._normalize_address) as normalize:
+            matches = deduplicator.find_duplicates(properties)
+        
+        assert len(matches) >= 3
+        assert normalize.call_count == len(properties)
+    
     def test_deduplicate_properties(self, deduplicator, sample_properties):
         """Test property deduplication"""
         deduplicated = deduplicator.deduplicate_properties(sample_properties)
@@ -218,6 +393,37 @@ class TestPropertyDeduplicator:
         unique_addresses = [prop['address'] for prop in deduplicated]
         assert '456 Different Road, London SW2 2BB' in unique_addresses
     
+    def test_deduplicate_properties_collapses_exact_repeats(self, deduplicator, sample_properties):
+        """Test the same source listing seen twice is kept once, before any fuzzy matching"""
+        repeat = dict(sample_properties[2], price=310000)
+        
+        with patch.object(deduplicator, 'find_duplicates', wraps=deduplicator.find_duplicates) as find:
+            deduplicated = deduplicator.deduplicate_properties(sample_properties + [repeat])
+        
+        assert len(find.call_args.args[0]) == 3
+        assert [prop['source_id'] for prop in deduplicated].count('rightmove_2') == 1
+        assert sample_properties[2] in deduplicated and repeat not in deduplicated
+    
+    def test_select_best_property_prefers_quality_then_first(self, deduplicator, sample_properties):
+        """Test the highest quality listing is kept, with ties going to the earliest"""
+        sparse = dict(sample_properties[0], source_id='sparse', bathrooms=None, reliability_score=0.5)
+        twin = dict(sample_properties[1], source_id='twin')
+        
+        assert deduplicator._select_best_property([sparse, sample_properties[1]]) is sample_properties[1]
+        assert deduplicator._select_best_property([sample_properties[1], twin]) is sample_properties[1]
+    
+    def test_group_duplicates_handles_long_chains(self, deduplicator):
+        """Test chained matches form one group without recursing per link"""
+        properties = [{'source_id': f"p{i}"} for i in range(5000)] + [{'source_id': 'single'}]
+        matches = [
+            PropertyMatch(f"p{i}", f"p{i + 1}", 0.8, [], 'medium') for i in range(4999)
+        ] + [PropertyMatch('p0', 'single', 0.5, [], 'low')]
+        
+        groups = deduplicator._group_duplicates(properties, matches)
+        
+        assert len(groups) == 1
+        assert [prop['source_id'] for prop in groups[0]] == [f"p{i}" for i in range(5000)]
+    
     def test_address_similarity(self, deduplicator):
         """Test address similarity calculation"""
         addr1 = "123 Test Street, London SW1 1AA"
@@ -230,6 +436,12 @@ class TestPropertyDeduplicator:
         assert similarity1 > 0.8  # Should be very similar
         assert similarity2 < 0.6  # Should be different
     
+    def test_normalize_address(self, deduplicator):
+        """Test abbreviations expand as whole words and punctuation collapses to single spaces"""
+        assert deduplicator._normalize_address("Flat 2, 10 High St.  (Rear)") == "apartment 2 10 high street rear"
+        assert deduplicator._normalize_address("Stratford Rd") == "stratford road"
+        assert deduplicator._normalize_address("") == ""
+    
     def test_coordinate_similarity(self, deduplicator):
         """Test coordinate-based similarity"""
         prop1 = {'latitude': 51.5074, 'longitude': -0.1278}
@@ -241,6 +453,24 @@ class TestPropertyDeduplicator:
         
         assert similarity1 > similarity2
         assert similarity1 > 0.8  # Should be very similar for close coordinates
+    
+    def test_characteristics_similarity_ignores_property_type_case(self, deduplicator):
+        """Test property types compare case-insensitively and missing values are not compared"""
+        prop1 = {'bedrooms': 3, 'bathrooms': 2, 'property_type': 'House'}
+        prop2 = {'bedrooms': 3, 'bathrooms': None, 'property_type': 'house'}
+        
+        assert deduplicator._calculate_characteristics_similarity(prop1, prop2) == 1.0
+        assert deduplicator._calculate_characteristics_similarity(prop1, dict(prop2, bedrooms=2)) == 0.5
+    
+    def test_coordinate_similarity_rejects_distant_latitudes_without_haversine(self, deduplicator):
+        """Test pairs over the match radius apart north-south score zero before any trigonometry"""
+        prop1 = {'latitude': 51.5074, 'longitude': -0.1278}
+        prop2 = {'latitude': 51.5254, 'longitude': -0.1278}  # About 2km north
+        
+        with patch('app.modules.ingestion.deduplication.haversine_km') as haversine:
+            assert deduplicator._calculate_coordinate_similarity(prop1, prop2) == 0.0
+        
+        haversine.assert_not_called()
 
 
 class TestIngestionService:
@@ -250,6 +480,129 @@ class TestIngestionService:
     def service(self):
         return IngestionService()
     
+    def test_save_properties_to_db_commits_batch_once(self, service):
+        """Test a batch is looked up in bulk and committed once, updating rows that already exist"""
+        existing_row = MagicMock(source='rightmove', source_id='rm_1')
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [existing_row]
+        properties = [
+            {'source': 'rightmove', 'source_id': 'rm_1', 'price': 400000, 'address': '1 Test Street'},
+            {'source': 'zoopla', 'source_id': 'zp_1', 'price': 410000, 'address': '2 Test Street'},
+            {'source': 'zoopla', 'source_id': 'zp_1', 'price': 415000, 'address': '2 Test Street'},
+        ]
+        
+        saved = service.save_properties_to_db(properties, db)
+        
+        assert db.query.call_count == 1
+        db.commit.assert_called_once()
+        db.add.assert_called_once()
+        assert saved[0] is existing_row and existing_row.price == 400000
+        assert saved[1] is saved[2] and saved[2].price == 415000
+    
+    def test_save_properties_to_db_falls_back_to_single_rows(self, service):
+        """Test a failed batch commit is retried one property at a time"""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = []
+        db.query.return_value.filter.return_value.first.return_value = None
+        db.commit.side_effect = [Exception("constraint violated"), None, Exception("bad row")]
+        properties = [
+            {'source': 'rightmove', 'source_id': 'rm_1', 'price': 400000, 'address': '1 Test Street'},
+            {'source': 'rightmove', 'source_id': 'rm_2', 'price': 'bad', 'address': '2 Test Street'},
+        ]
+        
+        saved = service.save_properties_to_db(properties, db)
+        
+        assert [prop.source_id for prop in saved] == ['rm_1']
+        assert db.rollback.call_count == 2
+    
+    def test_select_new_or_changed_diffs_one_lookup(self, service):
+        """Test only new, changed or stale listings are selected, from a single existence query, and missing keys count as unchanged"""
+        listing = {'source': 'rightmove', 'title': '1 Test Street', 'price': 400000, 'latitude': 51.5, 'longitude': -0.12}
+        properties = [
+            dict(listing, source_id='new'),
+            dict(listing, source_id='same'),
+            dict(listing, source_id='repriced', price=390000),
+            dict(listing, source_id='stale'),
+            dict(listing, source_id='moved', latitude=51.6),
+            {'source': 'rightmove', 'source_id': 'sparse', 'price': 400000},
+        ]
+        stored_fields = ['1 Test Street', '', 400000.0] + [None] * (len(DELTA_FIELDS) - 3)
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [
+            ('rightmove', source_id, stale, 51.5, -0.12, *stored_fields)
+            for source_id, stale in (
+                ('same', False), ('repriced', False), ('stale', True), ('moved', False), ('sparse', False)
+            )
+        ]
+        
+        selected = service.select_new_or_changed(properties, db, datetime.now())
+        
+        assert db.query.call_count == 1
+        assert [prop['source_id'] for prop in selected] == ['new', 'repriced', 'stale', 'moved']
+    
+    def test_bulk_upsert_properties_copies_large_batches_through_staging(self, service):
+        """Test large batches are COPYed once, with repeats collapsed and values escaped"""
+        db = MagicMock()
+        cursor = db.connection.return_value.connection.cursor.return_value.__enter__.return_value
+        cursor.rowcount = 50
+        copied = []
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.getvalue())
+        properties = [
+            {'source': 'rightmove', 'source_id': f'rm_{i}', 'price': 400000, 'address': f'{i} Test Street',
+             'latitude': 51.5, 'longitude': -0.12, 'description': 'Tab\there', 'garden': True}
+            for i in range(COPY_MIN_BATCH_SIZE)
+        ]
+        properties.append(dict(properties[0], price=395000))
+        
+        with patch.object(service, 'save_properties_to_db') as save:
+            assert service.bulk_upsert_properties(properties, db) == 100
+        
+        save.assert_not_called()
+        db.commit.assert_called_once()
+        lines = copied[0].splitlines()
+        assert len(lines) == COPY_MIN_BATCH_SIZE
+        assert '\t395000\t' in lines[0] and 'Tab\\there' in lines[0] and '\tt\tf\t' in lines[0]
+        assert lines[0].endswith('\t{description,price,address,garden}')
+    
+    def test_copy_upsert_keeps_stored_values_for_missing_keys(self, service, caplog):
+        """Test the staged update only overwrites provided columns and skipped new rows are logged"""
+        db = MagicMock()
+        cursor = db.connection.return_value.connection.cursor.return_value.__enter__.return_value
+        cursor.rowcount = 40
+        properties = [{'source': 'rightmove', 'source_id': f'rm_{i}'} for i in range(COPY_MIN_BATCH_SIZE)]
+        
+        with caplog.at_level(logging.WARNING):
+            assert service.bulk_upsert_properties(properties, db) == 80
+        
+        assert "CASE WHEN 'price' = ANY(s.provided) THEN s.price ELSE p.price END" in UPDATE_FROM_STAGE_SQL
+        assert "Skipped 20 new properties without coordinates" in caplog.text
+    
+    def test_bulk_upsert_properties_uses_orm_for_small_or_failed_batches(self, service):
+        """Test small batches, and batches the COPY fails on, are saved through the ORM path"""
+        db = MagicMock()
+        db.connection.return_value.connection.cursor.return_value.__enter__.return_value.copy_expert.side_effect = \
+            Exception("copy failed")
+        large = [{'source': 'rightmove', 'source_id': f'rm_{i}'} for i in range(COPY_MIN_BATCH_SIZE)]
+        
+        with patch.object(service, 'save_properties_to_db', side_effect=lambda props, db: props) as save:
+            assert service.bulk_upsert_properties(large[:2], db) == 2
+            assert service.bulk_upsert_properties(large, db) == COPY_MIN_BATCH_SIZE
+        
+        assert save.call_count == 2
+        db.rollback.assert_called_once()
+    
+    def test_property_location_is_bound_as_ewkt(self, service):
+        """Test created and updated rows carry an EWKT point only when coordinates are given"""
+        prop_data = {'source': 'rightmove', 'source_id': 'rm_1', 'price': 400000, 'address': '1 Test Street',
+                     'latitude': 51.5074, 'longitude': -0.1278}
+        
+        created = service._create_property_from_dict(prop_data)
+        
+        assert created.location.extended and created.location.data == 'SRID=4326;POINT(-0.1278 51.5074)'
+        service._update_property_from_dict(created, dict(prop_data, latitude=None))
+        assert created.location.data == 'SRID=4326;POINT(-0.1278 51.5074)'
+        assert service._create_property_from_dict(dict(prop_data, longitude=None)).location is None
+    
     @pytest.mark.asyncio
     async def test_sync_properties_for_location(self, service):
         """Test syncing properties from multiple sources"""
@@ -261,7 +614,40 @@ class TestIngestionService:
             sources = {prop.get('source') for prop in properties}
             # At least one source should be present
             assert len(sources) >= 1
+
+    @pytest.mark.asyncio
+    async def test_sync_properties_for_location_queries_sources_concurrently(self, service):
+        """Test both sources are in flight at once rather than awaited one after the other"""
+        zoopla_started = asyncio.Event()
+        
+        async def rightmove_search(*args, **kwargs):
+            # Only completes if the Zoopla search starts while this one is still pending
+            await asyncio.wait_for(zoopla_started.wait(), timeout=1)
+            return []
+        
+        async def zoopla_search(*args, **kwargs):
+            zoopla_started.set()
+            return []
+        
+        service.rightmove_adapter.search_properties = rightmove_search
+        service.zoopla_adapter.search_properties = zoopla_search
+        
+        with patch('app.modules.ingestion.adapters.base.logger') as adapter_logger:
+            properties = await service.sync_properties_for_location("London", radius_km=5, max_results=3)
+        
+        assert properties == []
+        adapter_logger.error.assert_not_called()
     
+    @pytest.mark.asyncio
+    async def test_sync_properties_for_location_tolerates_failing_source(self, service):
+        """Test one failing source does not drop results from the others"""
+        service.zoopla_adapter.search_properties = AsyncMock(side_effect=httpx.ConnectError("down"))
+
+        properties = await service.sync_properties_for_location("London", radius_km=5, max_results=3)
+
+        assert len(properties) > 0
+        assert {prop['source'] for prop in properties} == {'rightmove'}
+
     @pytest.mark.asyncio
     async def test_sync_rightmove_properties(self, service):
         """Test syncing from Rightmove only"""
@@ -308,6 +694,80 @@ class TestIngestionService:
         assert len(deduplicated) <= len(sample_properties)
 
 
+class TestSharedClient:
+    """Test the HTTP client shared by property adapters"""
+    
+    @pytest.mark.asyncio
+    async def test_adapters_share_client_across_context_exits(self):
+        """Test adapters reuse one client that survives leaving the adapter context"""
+        from app.core.http import close_shared_client
+        
+        rightmove = RightmoveAdapter()
+        zoopla = ZooplaAdapter()
+        
+        async with rightmove as adapter:
+            client = adapter.client
+        
+        assert zoopla.client is client
+        assert not client.is_closed
+        
+        await close_shared_client()
+        assert client.is_closed
+        assert rightmove.client is not client
+        await close_shared_client()
+
+
+class TestRequestRetries:
+    """Test retry behaviour of adapter HTTP requests"""
+    
+    def test_is_retriable_error(self):
+        """Test only network errors and transient statuses are retried"""
+        from app.modules.ingestion.adapters.base import is_retriable_error
+        
+        request = httpx.Request("GET", "https://api.example.com/properties")
+        
+        def status_error(code):
+            response = httpx.Response(code, request=request)
+            return httpx.HTTPStatusError("error", request=request, response=response)
+        
+        assert is_retriable_error(httpx.ConnectError("down", request=request))
+        assert is_retriable_error(status_error(429))
+        assert is_retriable_error(status_error(503))
+        assert not is_retriable_error(status_error(404))
+        assert not is_retriable_error(ValueError("bad payload"))
+    
+    @pytest.mark.asyncio
+    async def test_make_request_does_not_retry_client_errors(self):
+        """Test a permanent 4xx fails after a single request"""
+        adapter = RightmoveAdapter()
+        request = httpx.Request("GET", "https://api.example.com/properties")
+        mock_client = MagicMock()
+        mock_client.get = AsyncMock(return_value=httpx.Response(404, request=request))
+        
+        with patch.object(type(adapter), 'client', new_callable=PropertyMock, return_value=mock_client):
+            with pytest.raises(httpx.HTTPStatusError):
+                await adapter._make_request("https://api.example.com/properties")
+        
+        assert mock_client.get.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_make_request_honors_retry_after(self):
+        """Test a 429 with a short Retry-After is retried inline"""
+        adapter = RightmoveAdapter()
+        request = httpx.Request("GET", "https://api.example.com/properties")
+        mock_client = MagicMock()
+        mock_client.get = AsyncMock(side_effect=[
+            httpx.Response(429, headers={"Retry-After": "0"}, request=request),
+            httpx.Response(200, request=request)
+        ])
+        
+        with patch.object(type(adapter), 'client', new_callable=PropertyMock, return_value=mock_client):
+            response = await adapter._make_request("https://api.example.com/properties")
+        
+        assert response.status_code == 200
+        assert mock_client.get.await_count == 2
+
+
 class TestRateLimiter:
     """Test rate limiting functionality"""
     
@@ -326,6 +786,21 @@ class TestRateLimiter:
         # Third call should be delayed (but we won't wait in test)
         # Just verify the limiter tracks calls correctly
         assert len(limiter.calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_concurrent_acquire(self):
+        """Test concurrent acquirers are not over-admitted"""
+        from app.modules.ingestion.adapters.base import RateLimiter
+        
+        limiter = RateLimiter(max_calls=2, time_window=0.2)
+        
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+        elapsed = asyncio.get_running_loop().time() - start
+        
+        # The third call has to wait for the first to leave the window
+        assert elapsed >= 0.15
+        assert len(limiter.calls) == 2
 
 
 @pytest.mark.asyncio